@@ -2,9 +2,20 @@
 
 import os
 
+# --- 布局缩放 ---
+# 下面所有的像素尺寸和坐标 (窗口、图片、字体、位置、间距) 都乘以 LAYOUT_SCALE，
+# 图片直接按缩放后的尺寸加载，绘制时不再缩放。用 main.py --layout-scale 或环境变量 SUSHI_LAYOUT_SCALE 设置
+LAYOUT_SCALE = float(os.environ.get("SUSHI_LAYOUT_SCALE") or 1)
+
+
+def px(value):
+    """按布局缩放换算像素值 (取整)"""
+    return round(value * LAYOUT_SCALE)
+
+
 # --- 屏幕和显示 ---
-SCREEN_WIDTH = 1024
-SCREEN_HEIGHT = 768
+SCREEN_WIDTH = px(1024)
+SCREEN_HEIGHT = px(768)
 FPS = 60
 
 # --- 颜色定义 (部分颜色仍可用于文本或调试) ---
@@ -33,6 +44,7 @@ SOUNDS_DIR = os.path.join(ASSETS_DIR, "sounds")  # 确保这个路径是正确
 START_BG_IMG = "start_bg.png"
 RESTAURANT_BG_IMG = "restaurant_bg.png"
 START_BUTTON_IMG = "start_button.png"
+START_BUTTON_SIZE = (px(300), px(271))  # 开始按钮的显示大小 (图片的原始尺寸)
 TIMES_UP_IMG_FILENAME = "time's_up.png"  # 新增：时间到图片
 GLOBAL_TIMER_ICON_FILENAME = "clock.png"       # 全局游戏时钟图标
 ORDER_TIMER_ICON_FILENAME = "timer_icon.png"   # 顾客订单计时器图标
@@ -88,11 +100,23 @@ TIME_OVER_SOUND_FILENAME = "time_over.wav"  # 新增
 WIN_SOUND_FILENAME = "win.wav"             # 新增
 LOSE_SOUND_FILENAME = "lose.wav"           # 新增
 
+# --- 音频通道 ---
+AUDIO_SFX_CHANNELS = 12      # 音效可用的固定通道数 (另有 2 个通道保留给背景音乐)
+BGM_CROSSFADE_MS = 800       # 切换背景音乐时的交叉淡入淡出时长
+BGM_STOP_FADE_MS = 300       # 时间到时背景音乐的淡出时长
+# 音效注册表: 名字 -> (文件名, 优先级, 同时发声上限)。优先级高的音效在通道用完时可以抢占优先级低的
+SOUND_EFFECTS = {
+    "click": (CLICK_SOUND_FILENAME, 0, 3),
+    "time_over": (TIME_OVER_SOUND_FILENAME, 10, 1),
+    "win": (WIN_SOUND_FILENAME, 10, 1),
+    "lose": (LOSE_SOUND_FILENAME, 10, 1),
+}
+
 # --- 字体文件名和大小 ---
 CUSTOM_FONT_FILENAME = "s.ttf"
-DEFAULT_FONT_SIZE = 28
-LARGE_FONT_SIZE = 40
-SMALL_FONT_SIZE = 22  # For order text
+DEFAULT_FONT_SIZE = px(28)
+LARGE_FONT_SIZE = px(40)
+SMALL_FONT_SIZE = px(22)  # For order text
 
 # --- 游戏状态常量 ---
 STATE_START_SCREEN = "start_screen"
@@ -102,10 +126,57 @@ STATE_GAME_OVER = "game_over"  # 新增：游戏结束状态
 # --- 游戏参数 ---
 GAME_DURATION_SECONDS = 60  # 游戏总时长
 
+# --- 垃圾回收管理 ---
+GC_MANAGEMENT_ENABLED = True     # 是否在游戏生命周期中管理垃圾回收
+GC_ROUND_GEN2_THRESHOLD = None   # 游戏进行中的第2代回收阈值，None 表示整局推迟完整回收
+
+# --- 状态快照与倒带 ---
+SNAPSHOT_HISTORY_SECONDS = 10  # 每个逻辑帧保存一个快照，环形缓冲区保留最近多少秒
+REWIND_SECONDS = 2             # 按 F5 倒带的秒数
+
+# --- 画质自适应 ---
+QUALITY_GOVERNOR_ENABLED = True   # 帧耗时超过预算时逐级关闭可选的绘制工作 (见 game_logic/quality.py)
+FRAME_BUDGET_MS = 16.0            # 每帧的耗时预算 (毫秒，不含等待下一帧的时间)
+QUALITY_SLOW_ANIMATION_FACTOR = 3  # 降级时顾客动画每帧时长放大的倍数
+
+# --- 卡顿记录器 ---
+# 环形缓冲区始终保存最近几秒每帧的数据 (各阶段耗时、GC、资源加载、背景音乐解码、存档写盘、画质级别)，
+# 某一帧超过阈值时把缓冲区连同推断的原因写到存档目录的 hitches 子目录 (见 game_logic/flight_recorder.py)
+FLIGHT_RECORDER_ENABLED = True
+FLIGHT_RECORDER_SECONDS = 5         # 缓冲区保留最近多少秒
+HITCH_THRESHOLD_MS = 50.0           # 两帧之间的间隔超过多少毫秒算卡顿
+HITCH_POST_FRAMES = 30              # 卡顿之后再记录多少帧才写盘 (报告中能看到恢复过程)
+HITCH_COOLDOWN_SECONDS = 10         # 两次写盘的最短间隔，连续卡顿只写一份报告
+HITCH_MAX_FILES = 20                # 目录中最多保留的报告数，更旧的会被删除
+
+# --- 纹理图集 ---
+ATLAS_ENABLED = True  # 已构建图集 (python -m tools.build_atlas) 时从图集取小图
+# 每种布局缩放各有一套图集 (图片按缩放后的尺寸打包)；缩放不为 1 且还没有图集时，首次启动自动构建
+ATLAS_DIR = os.path.join(IMAGES_DIR, "atlas", f"{LAYOUT_SCALE:g}x")
+# 打包进图集的图片目录 (背景图缩放不为 1 时也需要缩放，一并缓存)
+ATLAS_SOURCE_DIRS = (UI_IMAGES_DIR, SUSHI_IMAGES_DIR, DRINK_IMAGES_DIR, BACKGROUND_IMAGES_DIR)
+ATLAS_SHEET_SIZE = (px(1024), px(1024))  # 每张图集的最大尺寸 (比它大的图片单独成一张)
+# 字形图集：界面文字由预先栅格化的字形拼出 (与纹理图集一起构建，放在 ATLAS_DIR 中)
+GLYPH_ATLAS_ENABLED = True
+# 收集可显示字符的源文件 (其中的字符串字面量；另外还收集本文件中的显示名称)
+GLYPH_SOURCE_FILES = tuple(os.path.join(BASE_DIR, "game_logic", name)
+                           for name in ("scenes.py", "sushi_elements.py", "customer.py"))
+
+# --- 热重载 (开发用，python main.py --hot-reload) ---
+HOT_RELOAD_DIRS = (IMAGES_DIR, SOUNDS_DIR)  # 轮询修改时间的资源目录 (另外总是检查 config.py)
+HOT_RELOAD_INTERVAL_SECONDS = 0.5           # 每隔多久检查一次
+
+# --- 订单事件日志 ---
+ANALYTICS_ENABLED = True                  # 是否记录订单事件 (写在存档目录的 analytics 子目录中)
+ANALYTICS_MAX_FILE_BYTES = 8 * 1024 * 1024  # 单个日志文件的大小上限，超过后换新文件
+ANALYTICS_MAX_FILES = 32                  # 目录中最多保留的日志文件数，更旧的会被删除
+
 # --- 关卡系统参数 ---
 INITIAL_TARGET_TIPS = 100       # 第一关的目标小费
 TARGET_TIPS_INCREMENT = 50      # 每关增加的小费
-SAVE_FILE_NAME = "save.dat"     # 用于保存关卡数据的文件名
+SAVE_FILE_NAME = "save.dat"     # 旧版存档文件名 (只保存关卡数)，首次运行时导入
+SAVE_STORE_FILENAME = "save.json"  # 存档文件名 (多个玩家档案，每关最高小费)
+SAVE_DIR = None                 # 存档目录；None 表示使用系统的用户数据目录，也可以设为 BASE_DIR
 
 # +++ 小费系统参数 +++
 TIP_PERFECT_ORDER = 20       # 订单全对的小费
@@ -140,60 +211,65 @@ DRINK_TYPES = {  # 饮品
 }
 
 # --- 游戏元素尺寸和位置 ---
-INGREDIENT_AREA_Y = 500
-INGREDIENT_WIDTH = 75  # 容器图片的宽度
-INGREDIENT_HEIGHT = 90  # 容器图片的高度 (假设是方形，如果不是请调整)
-RICE_CONTAINER_POS = (700, INGREDIENT_AREA_Y)
+INGREDIENT_AREA_Y = px(500)
+INGREDIENT_WIDTH = px(75)  # 容器图片的宽度
+INGREDIENT_HEIGHT = px(90)  # 容器图片的高度 (假设是方形，如果不是请调整)
+RICE_CONTAINER_POS = (px(700), INGREDIENT_AREA_Y)
 TOPPING_OCTOPUS_POS = (
-    RICE_CONTAINER_POS[0] + INGREDIENT_WIDTH + 20, INGREDIENT_AREA_Y)
+    RICE_CONTAINER_POS[0] + INGREDIENT_WIDTH + px(20), INGREDIENT_AREA_Y)
 TOPPING_SCALLOP_POS = (
-    RICE_CONTAINER_POS[0], INGREDIENT_AREA_Y+INGREDIENT_HEIGHT+10)
+    RICE_CONTAINER_POS[0], INGREDIENT_AREA_Y+INGREDIENT_HEIGHT+px(10))
 TOPPING_SALMON_POS = (
-    RICE_CONTAINER_POS[0] + INGREDIENT_WIDTH + 20, INGREDIENT_AREA_Y+INGREDIENT_HEIGHT+10)
+    RICE_CONTAINER_POS[0] + INGREDIENT_WIDTH + px(20), INGREDIENT_AREA_Y+INGREDIENT_HEIGHT+px(10))
 TOPPING_TUNA_POS = (
-    TOPPING_OCTOPUS_POS[0] + INGREDIENT_WIDTH + 20, INGREDIENT_AREA_Y)
+    TOPPING_OCTOPUS_POS[0] + INGREDIENT_WIDTH + px(20), INGREDIENT_AREA_Y)
 
 # 菜板 (尺寸应接近菜板图片的实际大小)
-CUTTING_BOARD_IMG_WIDTH = 216  # 假设菜板图片的宽度
-CUTTING_BOARD_IMG_HEIGHT = 180  # 假设菜板图片的高度
-CUTTING_BOARD_POS = (SCREEN_WIDTH // 2-CUTTING_BOARD_IMG_WIDTH // 2, 510)
+CUTTING_BOARD_IMG_WIDTH = px(216)  # 假设菜板图片的宽度
+CUTTING_BOARD_IMG_HEIGHT = px(180)  # 假设菜板图片的高度
+CUTTING_BOARD_POS = (SCREEN_WIDTH // 2-CUTTING_BOARD_IMG_WIDTH // 2, px(510))
 
 # 饭团和配料在菜板上的显示大小
-RICE_BALL_ON_BOARD_SIZE = (80, 67)
-TOPPING_ON_BOARD_SIZE = (80, 67)
+RICE_BALL_ON_BOARD_SIZE = (px(80), px(67))
+TOPPING_ON_BOARD_SIZE = (px(80), px(67))
 
 # --- 顾客区定义 ---
 NUM_CUSTOMER_SPOTS = 3
-CUSTOMER_SPOT_WIDTH = 150  # 每个顾客“桌子”的宽度
-CUSTOMER_SPOT_HEIGHT = 100  # 每个顾客“桌子”的高度
+CUSTOMER_SPOT_WIDTH = px(150)  # 每个顾客“桌子”的宽度
+CUSTOMER_SPOT_HEIGHT = px(100)  # 每个顾客“桌子”的高度
 CUSTOMER_SPOT_COLOR = (0, 0, 255, 100)  # 半透明蓝色作为占位符 (R, G, B, Alpha)
 
 # 顾客区位置 
 # 假设它们在屏幕上半部分，水平排列
-CUSTOMER_AREA_Y_OFFSET = 300  # 离屏幕顶部的距离
-CUSTOMER_AREA_PADDING = 180   # 顾客区之间的间隔以及与屏幕边缘的间隔
-
-start_x_customer_area=100
-# 例如，对于3个顾客区，它们的位置可能是：
-CUSTOMER_SPOT_POSITIONS = [
-    (start_x_customer_area, CUSTOMER_AREA_Y_OFFSET),
-    (start_x_customer_area + CUSTOMER_SPOT_WIDTH +
-     CUSTOMER_AREA_PADDING, CUSTOMER_AREA_Y_OFFSET),
-    (start_x_customer_area + 2 * (CUSTOMER_SPOT_WIDTH +
-     CUSTOMER_AREA_PADDING), CUSTOMER_AREA_Y_OFFSET)
-]
+CUSTOMER_AREA_Y_OFFSET = px(300)  # 离屏幕顶部的距离
+CUSTOMER_AREA_PADDING = px(180)   # 顾客区之间的间隔以及与屏幕边缘的间隔
+
+start_x_customer_area=px(100)
+# 顾客位按网格排列：第一个顾客位在 CUSTOMER_SPOT_ORIGIN，每行 CUSTOMER_SPOT_COLUMNS 个
+# (None 表示全部排成一行，即可横向滚动的长柜台)。默认 3 个顾客位排成一行：
+# x = 100, 430, 760
+CUSTOMER_SPOT_ORIGIN = (start_x_customer_area, CUSTOMER_AREA_Y_OFFSET)
+CUSTOMER_SPOT_COLUMNS = 3
+CUSTOMER_SPOT_STEP = (CUSTOMER_SPOT_WIDTH + CUSTOMER_AREA_PADDING, px(400))  # 相邻列、相邻行的间距
+# 顾客区视口 (屏幕上显示顾客的范围)；顾客位超出视口时可以用鼠标滚轮滚动
+CUSTOMER_VIEWPORT_RECT = (0, 0, SCREEN_WIDTH, CUSTOMER_AREA_Y_OFFSET + CUSTOMER_SPOT_HEIGHT + px(20))
+CUSTOMER_SCROLL_STEP = px(60)  # 鼠标滚轮每格滚动的像素
+CUSTOMER_SCROLLBAR_COLOR = (90, 90, 90)
 
 # --- Customer Visuals & Order Bubble ---
-CUSTOMER_IMAGE_SIZE = (120, 180)  # 顾客图片显示大小 
+CUSTOMER_IMAGE_SIZE = (px(120), px(180))  # 顾客图片显示大小 
 # 顾客动画每帧的持续时间 (毫秒)，例如 100ms = 10 FPS for the GIF
 CUSTOMER_ANIMATION_FRAME_DURATION = 100
+# 顾客动画帧的存储格式：True 时存成 8 位调色板 Surface (透明用 colorkey)，像素内存是 RGBA 的四分之一，
+# 适合内存小的展台机器 (python -m tools.gif_storage 比较两种格式的画质、内存和 blit 速度)
+CUSTOMER_ANIMATION_PALETTIZED = False
 # 新增：顾客图片底部相对于其桌子区顶部的垂直偏移量
 # 正值表示顾客图片的底部在桌子区顶部之上多少像素 (即两者间的空隙)
 # 负值表示顾客图片的底部会进入桌子区 (重叠)
-CUSTOMER_IMAGE_BOTTOM_Y_OFFSET_ABOVE_TABLE = -10  # 例如，顾客图片的脚部比桌子顶部高10像素
-ORDER_BUBBLE_SIZE = (150, 120)   # 订单气泡图片显示大小
-ORDER_ITEM_IMAGE_SIZE = (50, 50)  # 订单中寿司/饮品小图的显示大小
-ORDER_BUBBLE_OFFSET_X = 30     # 气泡相对于顾客位置的X偏移
+CUSTOMER_IMAGE_BOTTOM_Y_OFFSET_ABOVE_TABLE = px(-10)  # 例如，顾客图片的脚部比桌子顶部高10像素
+ORDER_BUBBLE_SIZE = (px(150), px(120))   # 订单气泡图片显示大小
+ORDER_ITEM_IMAGE_SIZE = (px(50), px(50))  # 订单中寿司/饮品小图的显示大小
+ORDER_BUBBLE_OFFSET_X = px(30)     # 气泡相对于顾客位置的X偏移
 ORDER_BUBBLE_OFFSET_Y = -ORDER_BUBBLE_SIZE[1]  # 气泡在顾客头顶上方一点
 
 # --- 饮品机图片文件名 (假设你有点菜板类似的交互元素) ---
@@ -203,13 +279,13 @@ BEER_TAP_IMG_FILENAME = "beer_tap.png"            # 啤酒龙头图片
 MISO_DISPENSER_IMG_FILENAME = "miso_dispenser.png"  # 味增汤锅图片
 
 # --- 饮品机位置 ---
-INGREDIENT_AREA_Y_DRINKS = 500 # 可以和食材在同一水平线
-DRINK_DISPENSER_WIDTH = 130  # 假设和食材容器一样大小
-DRINK_DISPENSER_HEIGHT = 130
+INGREDIENT_AREA_Y_DRINKS = px(500) # 可以和食材在同一水平线
+DRINK_DISPENSER_WIDTH = px(130)  # 假设和食材容器一样大小
+DRINK_DISPENSER_HEIGHT = px(130)
 
 SAKE_DISPENSER_POS = (0, INGREDIENT_AREA_Y_DRINKS)
-BEER_TAP_POS = (SAKE_DISPENSER_POS[0] + DRINK_DISPENSER_WIDTH + 10, INGREDIENT_AREA_Y_DRINKS)
-MISO_DISPENSER_POS = (BEER_TAP_POS[0] + DRINK_DISPENSER_WIDTH + 10, INGREDIENT_AREA_Y_DRINKS)
+BEER_TAP_POS = (SAKE_DISPENSER_POS[0] + DRINK_DISPENSER_WIDTH + px(10), INGREDIENT_AREA_Y_DRINKS)
+MISO_DISPENSER_POS = (BEER_TAP_POS[0] + DRINK_DISPENSER_WIDTH + px(10), INGREDIENT_AREA_Y_DRINKS)
 
 # --- 饮品定义 (确保 image_file 指向的是饮品本身的图片，而不是饮品机的) ---
 DRINK_TYPES = {
@@ -219,7 +295,7 @@ DRINK_TYPES = {
 }
 
 # --- 玩家手持物品的图片大小---
-HELD_ITEM_IMAGE_SIZE = (70, 70) # 举例，你可以根据实际图片调整
+HELD_ITEM_IMAGE_SIZE = (px(70), px(70)) # 举例，你可以根据实际图片调整
 
 # --- Customer Visuals & Order Bubble ---
 CUSTOMER_HAPPY_LEAVE_DELAY_MS = 3000  # 顾客开心后停留3秒
@@ -237,24 +313,24 @@ CUSTOMER_SPOT_COLOR_ANGRY = (255, 0, 0, 100)    # 生气颜色
 CUSTOMER_SPOT_COLOR_DEFAULT = (200, 200, 200, 100)  # 默认颜色
 
 # --- 计时器 UI ---
-TIMER_ICON_POS = (10, 15)  # 左上角
-TIMER_ICON_SIZE = (80, 80)  # 时钟图标大小
-TIMER_TEXT_OFFSET_X = 10  # 文本在图标右侧的偏移
-TIMES_UP_IMAGE_SIZE = (600,600 )  # 时间到图片的大小 (根据你的图片调整)
+TIMER_ICON_POS = (px(10), px(15))  # 左上角
+TIMER_ICON_SIZE = (px(80), px(80))  # 时钟图标大小
+TIMER_TEXT_OFFSET_X = px(10)  # 文本在图标右侧的偏移
+TIMES_UP_IMAGE_SIZE = (px(600),px(600) )  # 时间到图片的大小 (根据你的图片调整)
 
 # +++ 小费 UI +++
-TIP_ICON_POS = (SCREEN_WIDTH - 150, 20)  # 右上角，预留空间给文字
-TIP_ICON_SIZE = (40, 40)
-TIP_TEXT_OFFSET_X = 10
+TIP_ICON_POS = (SCREEN_WIDTH - px(150), px(20))  # 右上角，预留空间给文字
+TIP_ICON_SIZE = (px(40), px(40))
+TIP_TEXT_OFFSET_X = px(10)
 
 # --- 游戏结束界面图片 ---
-TIMES_UP_IMAGE_SIZE = (400, 400)
-WIN_LOSE_IMAGE_SIZE = (400, 400)  # 胜利/失败图片的大小 (根据你的图片调整)
+TIMES_UP_IMAGE_SIZE = (px(400), px(400))
+WIN_LOSE_IMAGE_SIZE = (px(400), px(400))  # 胜利/失败图片的大小 (根据你的图片调整)
 TIMES_UP_DISPLAY_DURATION_MS = 2000  # "Time's Up" 显示时长 (毫秒)
 
 # +++ 新增订单计时器相关配置 +++
 ORDER_DURATION_SECONDS = 10  # 每个订单的默认持续时间（秒）
-ORDER_TIMER_ICON_SIZE = (30, 30)  # 订单计时器图标大小
-ORDER_TIMER_OFFSET_X = 5  # 订单计时器相对于订单气泡的位置X (可以调整)
-ORDER_TIMER_OFFSET_Y = ORDER_BUBBLE_SIZE[1] + 5  # 订单计时器在订单气泡下方的位置Y (可以调整)
+ORDER_TIMER_ICON_SIZE = (px(30), px(30))  # 订单计时器图标大小
+ORDER_TIMER_OFFSET_X = px(5)  # 订单计时器相对于订单气泡的位置X (可以调整)
+ORDER_TIMER_OFFSET_Y = ORDER_BUBBLE_SIZE[1] + px(5)  # 订单计时器在订单气泡下方的位置Y (可以调整)
 ORDER_TIMER_TEXT_COLOR = RED  # 订单倒计时文本颜色
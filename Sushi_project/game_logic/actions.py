@@ -0,0 +1,81 @@
+# game_logic/actions.py
+"""玩家动作层：把语义动作翻译成与玩家完全相同的点击
+
+机器人、外部控制接口等都通过这里操作游戏，它们只能做玩家能做的事：
+点击容器、点击菜板、点击顾客位。动作用元组表示：
+    ("start",)            点击开始按钮 (或在结果画面点击继续)
+    ("rice",)             点击米饭容器
+    ("topping", key)      点击配料容器，例如 ("topping", "salmon")
+    ("drink", key)        点击饮品机，例如 ("drink", "sake")
+    ("pickup",)           点击菜板，拿起完成的寿司
+    ("serve", spot)       点击顾客位，把手上的物品送给该顾客
+                          (顾客位不在视口内时先把它滚动进来，与玩家用滚轮滚动一样)
+"""
+
+import pygame
+
+from config import STATE_START_SCREEN, STATE_GAME_OVER
+from .sushi_elements import RiceContainer, ToppingContainer, DrinkDispenser
+
+
+class GameActions:
+    def __init__(self, game):
+        # game: 游戏主模块 (或具有相同属性的对象)
+        self.game = game
+        self.refresh_layout()
+
+    def refresh_layout(self):
+        """根据当前元素位置重新计算每个动作的点击坐标 (布局改变后调用)"""
+        game = self.game
+        self.targets = {("start",): game.start_button_rect.center,
+                        ("pickup",): game.cutting_b.rect.center}
+        for element in game.interactive_elements:
+            if isinstance(element, RiceContainer):
+                self.targets[("rice",)] = element.rect.center
+            elif isinstance(element, ToppingContainer):
+                self.targets[("topping", element.topping_key)] = element.rect.center
+            elif isinstance(element, DrinkDispenser):
+                self.targets[("drink", element.drink_key)] = element.rect.center
+        for spot_index, spot_rect in enumerate(game.customer_spot_rects):
+            self.targets[("serve", spot_index)] = spot_rect.center  # 世界坐标，取用时减去滚动偏移
+
+    def position(self, action):
+        """动作对应的点击坐标 (屏幕坐标)；未知动作抛出 KeyError"""
+        action = tuple(action)
+        x, y = self.targets[action]
+        if action[0] == "serve":
+            layout = self.game.spot_layout
+            return (x - layout.scroll_x, y - layout.scroll_y)
+        return (x, y)
+
+    def action_at(self, pos):
+        """屏幕坐标 pos 处的一次点击对应的动作，没有效果的位置返回 None
+
+        与 perform 相反：联机客户端把本地的点击翻译成动作发给服务器。
+        """
+        game = self.game
+        if game.current_game_state == STATE_START_SCREEN:
+            return ("start",) if game.start_button_rect.collidepoint(pos) else None
+        if game.current_game_state == STATE_GAME_OVER:
+            return ("start",) if game.game_over_phase == "showing_result" else None
+        spot_index = game.spot_layout.spot_at(pos)
+        if spot_index is not None:
+            return ("serve", spot_index)
+        for element in game.interactive_elements:
+            if element.is_clicked(pos):
+                if isinstance(element, RiceContainer):
+                    return ("rice",)
+                if isinstance(element, ToppingContainer):
+                    return ("topping", element.topping_key)
+                if isinstance(element, DrinkDispenser):
+                    return ("drink", element.drink_key)
+        if game.cutting_b.rect.collidepoint(pos):
+            return ("pickup",)
+        return None
+
+    def perform(self, action):
+        """以一次鼠标左键点击执行动作，返回游戏是否继续运行"""
+        if action[0] == "serve" and tuple(action) in self.targets:
+            self.game.spot_layout.scroll_to(action[1])
+        event = pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=self.position(action))
+        return self.game.handle_event(event)
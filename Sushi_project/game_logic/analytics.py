@@ -0,0 +1,190 @@
+# game_logic/analytics.py
+"""订单事件日志：把每个订单的生命周期事件以定长二进制记录追加到轮转的日志文件中
+
+事件来自 Customer.generate_order (生成订单)、receive_item (每上一个菜、订单完成)
+和 update (订单超时)，一局结束时再写一条整局小费记录。
+
+每条记录 24 字节，小端，按 4 字节对齐 (查询工具可以把整个文件按 u32/u16/u8 直接切片)：
+    偏移  类型  字段
+    0     u8    事件类型 (EV_*)
+    1     u8    标志位 (FLAG_*)
+    2     u16   顾客位
+    4     u16   关卡
+    6     u8    订单寿司 (SUSHI_KEYS 的序号，NO_ITEM 表示无)
+    7     u8    订单饮品 (DRINK_KEYS 的序号)
+    8     u32   会话 (随机种子的低 32 位)
+    12    u32   逻辑帧号
+    16    u32   订单已等待的毫秒数
+    20    i16   小费 (订单完成时为本单小费，一局结束时为整局小费)
+    22    u16   会话内的局序号
+
+每个文件以 16 字节的文件头开始 (魔数、记录大小、格式版本)。写入先进预分配的缓冲区，
+缓冲区满或一局结束时才写盘；文件超过大小上限时换新文件，目录中只保留最近的若干个文件。
+
+倒带 (GameEngine.rewind) 时调用 rewind_to()，丢掉本会话中倒带点之后的记录，
+倒带后重玩的订单只会记录一次，查询工具不会重复统计。
+"""
+
+import os
+import struct
+import time
+
+from config import SUSHI_TYPES, DRINK_TYPES
+
+LOG_MAGIC = b"SUSHIEV\x00"
+LOG_VERSION = 1
+HEADER = struct.Struct("<8sHH4x")
+RECORD = struct.Struct("<BBHHBBIIIhH")
+RECORD_SESSION_TICK = struct.Struct("<8xII8x")  # 只读出记录中的会话和帧号
+LOG_SUFFIX = ".evlog"
+
+# 事件类型
+EV_SPAWN = 1      # 生成订单
+EV_SERVE = 2      # 上了一个菜 (寿司或饮品)
+EV_FULFILL = 3    # 寿司和饮品都上齐，订单完成
+EV_TIMEOUT = 4    # 订单超时
+EV_ROUND_END = 5  # 一局结束
+EVENT_NAMES = {EV_SPAWN: "生成", EV_SERVE: "上菜", EV_FULFILL: "完成",
+               EV_TIMEOUT: "超时", EV_ROUND_END: "整局"}
+
+# 标志位
+FLAG_SUSHI_OK = 1     # 寿司正确 (上菜事件中只标记本次上的菜)
+FLAG_DRINK_OK = 2     # 饮品正确
+FLAG_SERVED_DRINK = 4  # 上菜事件：本次上的是饮品
+FLAG_WON = 8          # 整局事件：达到目标小费
+
+SUSHI_KEYS = list(SUSHI_TYPES)
+DRINK_KEYS = list(DRINK_TYPES)
+NO_ITEM = 255
+
+
+def item_index(keys, key):
+    return keys.index(key) if key in keys else NO_ITEM
+
+
+class EventLog:
+    def __init__(self, directory, max_file_bytes=8 * 1024 * 1024, max_files=32, buffer_records=4096):
+        self.directory = directory
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.session = 0
+        self.round_index = 0
+        self.level = 1
+        self.records_written = 0
+        self._buffer = bytearray(RECORD.size * buffer_records)  # 预分配，追加时不再分配内存
+        self._pending = 0
+        self._file = None
+        self._file_bytes = 0
+        self._file_serial = 0
+        os.makedirs(directory, exist_ok=True)
+
+    # --- 会话和局 ---
+    def begin_session(self, seed):
+        self.session = seed & 0xFFFFFFFF
+        self.round_index = 0
+
+    def begin_round(self, level):
+        self.round_index = (self.round_index + 1) & 0xFFFF
+        self.level = level
+
+    # --- 追加记录 ---
+    def append(self, kind, spot, order, tick, wait_ms=0, flags=0, tip=0):
+        if self._pending * RECORD.size == len(self._buffer):
+            self.flush()
+        order = order or {}
+        RECORD.pack_into(self._buffer, self._pending * RECORD.size, kind, flags, spot, self.level,
+                         item_index(SUSHI_KEYS, order.get("sushi")), item_index(DRINK_KEYS, order.get("drink")),
+                         self.session, tick, max(0, wait_ms), max(-32768, min(32767, tip)), self.round_index)
+        self._pending += 1
+
+    def round_end(self, tick, tips, won):
+        self.append(EV_ROUND_END, 0, None, tick, flags=FLAG_WON if won else 0, tip=tips)
+        self.flush()
+
+    # --- 倒带 ---
+    def _is_rewound(self, data, offset, tick):
+        """记录属于本会话且发生在倒带点 tick 或之后 (快照在帧号前进之后才保存，所以不含第 tick 帧的事件)"""
+        session, record_tick = RECORD_SESSION_TICK.unpack_from(data, offset)
+        return session == self.session and record_tick >= tick
+
+    def rewind_to(self, tick):
+        """游戏状态倒带到第 tick 帧时调用：丢弃本会话中帧号 >= tick 的记录，返回丢弃的条数
+
+        同一会话的记录按帧号递增追加，所以只需从末尾往前删：先删缓冲区里的，
+        缓冲区删空后再从当前日志文件末尾截掉已写盘的；已经轮转出去的旧文件不再改动。
+        """
+        dropped = 0
+        while self._pending and self._is_rewound(self._buffer, (self._pending - 1) * RECORD.size, tick):
+            self._pending -= 1
+            dropped += 1
+        if self._pending or self._file is None:
+            return dropped
+        end = self._file_bytes
+        try:
+            while end > HEADER.size:
+                self._file.seek(end - RECORD.size)
+                if not self._is_rewound(self._file.read(RECORD.size), 0, tick):
+                    break
+                end -= RECORD.size
+            if end < self._file_bytes:
+                self._file.truncate(end)
+                truncated = (self._file_bytes - end) // RECORD.size
+                self._file_bytes = end
+                self.records_written -= truncated
+                dropped += truncated
+            self._file.seek(end)
+        except OSError as e:
+            print(f"无法截断订单事件日志: {e}")
+        return dropped
+
+    # --- 写盘和轮转 ---
+    def _open_next_file(self):
+        if self._file is not None:
+            self._file.close()
+        self._file_serial += 1
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.directory, f"events-{stamp}-{os.getpid()}-{self._file_serial:03d}{LOG_SUFFIX}")
+        self._file = open(path, "w+b")  # 倒带时要读回文件末尾的记录
+        self._file.write(HEADER.pack(LOG_MAGIC, RECORD.size, LOG_VERSION))
+        self._file_bytes = HEADER.size
+        self._prune()
+
+    def _prune(self):
+        """只保留最近的 max_files 个日志文件"""
+        paths = log_files(self.directory)
+        for path in paths[:max(0, len(paths) - self.max_files)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def flush(self):
+        if not self._pending:
+            return
+        size = self._pending * RECORD.size
+        try:
+            if self._file is None or self._file_bytes + size > self.max_file_bytes:
+                self._open_next_file()
+            self._file.write(memoryview(self._buffer)[:size])
+            self._file.flush()
+            self._file_bytes += size
+            self.records_written += self._pending
+        except OSError as e:
+            print(f"无法写入订单事件日志: {e}")
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def log_files(directory):
+    """目录中的日志文件，按修改时间从旧到新排列"""
+    try:
+        names = [name for name in os.listdir(directory) if name.endswith(LOG_SUFFIX)]
+    except OSError:
+        return []
+    paths = [os.path.join(directory, name) for name in names]
+    return sorted(paths, key=lambda path: (os.path.getmtime(path), path))
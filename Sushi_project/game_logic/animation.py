@@ -0,0 +1,176 @@
+# game_logic/animation.py
+"""按需解码的 GIF 动画：启动时只解码第一帧，其余帧在第一次用到时或在后台线程中解码
+
+load_gif_frames 在启动时解码并缩放三个顾客 GIF 的全部帧，但 "happy" 和 "angry" 只短暂播放，
+有的一局根本不会出现。load_clip() 返回的 AnimationClip 与帧列表用法相同 (len、下标、真值)：
+    - 创建时只读 GIF 头 (帧数) 并解码第一帧，顾客第一次出现时就有图可画；
+    - 其余帧按顺序解码 (GIF 的后一帧依赖前一帧)，在下标第一次访问到时当场解码，
+      或者由 decode_pending_in_background() 交给后台线程，一次解码一帧、帧与帧之间让出 CPU；
+    - 解码后的帧缓存在 AnimationClip 中，同一个 GIF、同一尺寸在进程中只有一个 AnimationClip (模块级缓存)，
+      所有顾客以及热重载 config 后重建的对象共用。
+引擎在 load() 结束时把剩余的帧交给后台线程，此时窗口已经打开、开始画面马上就能显示。
+palettized=True 时帧存成 8 位调色板 Surface (见 sushi_elements.gif_frame_surface)。
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import UI_IMAGES_DIR
+from . import flight_recorder, hot_reload
+
+BACKGROUND_YIELD_SECONDS = 0.002  # 后台线程每解码一帧后让出 CPU 的时间 (单核机器上不与主循环抢时间)
+
+_clips = {}       # (目录, 文件名, 尺寸, 是否调色板) -> AnimationClip
+_clips_lock = threading.Lock()
+_worker = None    # 后台解码线程 (第一次需要时创建)
+
+
+class AnimationClip:
+    def __init__(self, directory, filename, size, palettized=False):
+        self.directory = directory
+        self.filename = filename
+        self.size = tuple(size) if size else None
+        self.palettized = palettized
+        self.path = os.path.join(directory, filename)
+        self._lock = threading.Lock()
+        self._image = None      # 还有帧没解码时打开着的 Pillow 图片
+        self._frames = []
+        self._count = 0
+        self.decode_ms = 0.0    # 解码全部已解码帧的累计耗时
+        self.on_demand = 0      # 在主线程中因为用到才当场解码的帧数
+        self._open()
+
+    def _open(self):
+        """读 GIF 头并解码第一帧 (调用时持有 _lock 或还没有其他线程访问)"""
+        from .sushi_elements import open_gif
+        self._frames = []
+        self._count = 0
+        try:
+            self._image = open_gif(self.path)
+            self._count = self._image.n_frames
+        except FileNotFoundError:
+            print(f"GIF 文件未找到: {self.path}")
+            return
+        except Exception as e:
+            print(f"加载或处理GIF {self.path} 时出错: {e}")
+            return
+        self._decode_next()
+        if not self._frames:
+            print(f"警告: 未能从 {self.path} 加载任何帧。")
+
+    def _decode_next(self):
+        """解码下一帧 (调用时持有 _lock)；出错时把帧数截断到已解码的帧"""
+        from .sushi_elements import gif_frame_surface
+        index = len(self._frames)
+        start = time.perf_counter()
+        try:
+            self._image.seek(index)
+            self._frames.append(gif_frame_surface(self._image, self.size, self.palettized))
+        except Exception as e:
+            print(f"解码 GIF {self.path} 第 {index} 帧时出错: {e}")
+            self._count = index
+        duration_ms = (time.perf_counter() - start) * 1000
+        self.decode_ms += duration_ms
+        flight_recorder.note_load("gif", f"{self.filename}#{index}", duration_ms)
+        if len(self._frames) >= self._count:
+            self._image.close()
+            self._image = None
+
+    # --- 与帧列表相同的用法 ---
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return self._count > 0
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        frames = self._frames
+        if 0 <= index < len(frames):
+            return frames[index]
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        with self._lock:
+            if threading.current_thread() is threading.main_thread():
+                self.on_demand += max(0, index + 1 - len(self._frames))
+            while len(self._frames) <= index < self._count:
+                self._decode_next()
+            return self._frames[index]
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self[index]
+
+    # --- 解码 ---
+    @property
+    def decoded(self):
+        return len(self._frames)
+
+    @property
+    def ready(self):
+        return len(self._frames) >= self._count
+
+    def decode_remaining(self, yield_seconds=0.0):
+        """解码剩余的全部帧；每一帧单独持锁，主线程随时可以插进来取它需要的帧"""
+        while not self.ready:
+            with self._lock:
+                if self._image is not None and len(self._frames) < self._count:
+                    self._decode_next()
+            if yield_seconds:
+                time.sleep(yield_seconds)
+
+    def reload(self):
+        """文件改动后重新解码 (热重载)：丢掉已解码的帧，重新解码第一帧，其余帧照常按需或在后台解码"""
+        with self._lock:
+            if self._image is not None:
+                self._image.close()
+            self.decode_ms = 0.0
+            self._open()
+        decode_pending_in_background()
+
+
+def load_clip(gif_filename, target_size, directory=UI_IMAGES_DIR, palettized=False):
+    """取得 GIF 动画 (同一个文件、尺寸和格式只解码一次)；只立即解码第一帧"""
+    if not gif_filename:
+        print("警告: load_clip 收到空文件名。")
+        return []
+    key = (os.path.normpath(directory), gif_filename, tuple(target_size) if target_size else None, palettized)
+    with _clips_lock:
+        clip = _clips.get(key)
+        if clip is None:
+            clip = _clips[key] = AnimationClip(directory, gif_filename, target_size, palettized)
+            hot_reload.track_gif(directory, gif_filename, target_size, clip)
+    return clip
+
+
+def decode_pending_in_background():
+    """把所有动画剩余的帧交给后台线程解码 (按创建顺序，一次一帧)"""
+    global _worker
+    with _clips_lock:
+        pending = [clip for clip in _clips.values() if not clip.ready]
+        if not pending:
+            return
+        if _worker is None:
+            _worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gif-decoder")
+        for clip in pending:
+            _worker.submit(clip.decode_remaining, BACKGROUND_YIELD_SECONDS)
+
+
+def shutdown():
+    """停止后台解码 (还没开始的任务直接取消)"""
+    global _worker
+    with _clips_lock:
+        worker, _worker = _worker, None
+    if worker is not None:
+        worker.shutdown(wait=True, cancel_futures=True)
+
+
+def format_text():
+    with _clips_lock:
+        clips = list(_clips.values())
+    parts = [f"{clip.filename} {clip.decoded}/{len(clip)} 帧 ({clip.decode_ms:.0f}ms, 当场解码 {clip.on_demand} 帧)"
+             for clip in clips]
+    return "GIF 动画: " + ("; ".join(parts) if parts else "没有加载")
@@ -0,0 +1,306 @@
+# game_logic/atlas.py
+"""纹理图集：把 ui、sushi、drinks 目录下的小图按游戏实际使用的尺寸打包成几张大图
+
+构建 (python -m tools.build_atlas) 时记录游戏加载过程中对 load_scaled_image 的全部调用
+(目录, 文件名, 尺寸)，按同样的方式缩放后用 skyline 算法排进若干张图集，
+写出图集 PNG 和清单 atlas.json (每张小图所在的图集和矩形，以及源文件的修改时间、大小和内容摘要)。
+不透明的图片和带 alpha 的图片分开打包，不透明图集 convert() 后 blit 时不做 alpha 混合，与原来一致。
+以 opaque=True 加载的图片 (全屏背景图) 即使带 alpha 通道也打包进不透明图集。
+
+布局缩放 (config.LAYOUT_SCALE) 不为 1 时，每种缩放各有一套图集 (包括缩放后的背景图)，
+缩放只在构建时做一次，之后每次启动直接取用缩放好的图片。
+
+运行时引擎先 load_atlas()：读入清单和几张图集，之后 load_scaled_image 先查图集，
+命中时返回图集的子 Surface (与图集共享像素，不再单独打开、解码和分配)，
+没有命中 (图集未构建、源文件内容变了、尺寸不在清单中) 时照常从磁盘加载。
+源文件的修改时间与清单相同时直接认为没变；不同时 (复制、检出、touch 过) 再比较大小和内容摘要，
+内容没变的图片照常使用图集。没有任何图片可用的图集不加载。
+当前加载的图集放在模块级变量中 (与 runtime 模块的做法相同)。
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+import pygame
+
+MANIFEST_FILENAME = "atlas.json"
+MANIFEST_VERSION = 3  # 版本 2 增加了 opaque 标记；版本 3 增加了源文件的大小和内容摘要
+
+_atlas = None       # 当前加载的 TextureAtlas
+_recorded = None    # 构建时记录的加载请求集合
+_lock = threading.Lock()  # 场景资源在后台线程加载，记录和子 Surface 缓存都要加锁
+
+
+def _size_key(size):
+    return tuple(size) if size else None
+
+
+def file_signature(path):
+    """文件的修改时间、大小和内容摘要，记入清单，用于判断源文件是否改过 (见 source_unchanged)"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return {"mtime": os.path.getmtime(path), "bytes": os.path.getsize(path), "hash": digest.hexdigest()}
+
+
+def source_unchanged(path, signature):
+    """path 的内容是否与构建时的 signature 相同：修改时间相同时不读文件，否则比较大小和内容摘要"""
+    if os.path.getmtime(path) == signature["mtime"]:
+        return True
+    if os.path.getsize(path) != signature["bytes"]:
+        return False
+    return file_signature(path)["hash"] == signature["hash"]
+
+
+class SkylinePacker:
+    """skyline 矩形装箱：维护各段的"天际线"高度，每个矩形放在使其顶边最低的位置"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.skyline = [(0, 0, width)]  # (x, 高度, 宽度)
+        self.used_height = 0
+
+    def _fit(self, index, w, h):
+        x = self.skyline[index][0]
+        if x + w > self.width:
+            return None
+        y = 0
+        remaining = w
+        while remaining > 0:
+            _, seg_y, seg_w = self.skyline[index]
+            y = max(y, seg_y)
+            if y + h > self.height:
+                return None
+            remaining -= seg_w
+            index += 1
+        return y
+
+    def insert(self, w, h):
+        """放入一个 w×h 的矩形，返回左上角 (x, y)；放不下时返回 None"""
+        best = None
+        for index, (x, _, seg_w) in enumerate(self.skyline):
+            y = self._fit(index, w, h)
+            if y is not None and (best is None or (y + h, seg_w) < best[0]):
+                best = ((y + h, seg_w), index, x, y)
+        if best is None:
+            return None
+        _, index, x, y = best
+        self.skyline.insert(index, (x, y + h, w))
+        following = index + 1
+        while following < len(self.skyline):  # 被新矩形盖住的段截短或删除
+            seg_x, seg_y, seg_w = self.skyline[following]
+            covered = x + w - seg_x
+            if covered <= 0:
+                break
+            if seg_w <= covered:
+                del self.skyline[following]
+                continue
+            self.skyline[following] = (seg_x + covered, seg_y, seg_w - covered)
+            break
+        merged = [self.skyline[0]]
+        for seg in self.skyline[1:]:  # 合并等高的相邻段
+            if seg[1] == merged[-1][1]:
+                merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + seg[2])
+            else:
+                merged.append(seg)
+        self.skyline = merged
+        self.used_height = max(self.used_height, y + h)
+        return (x, y)
+
+
+# --- 构建 ---
+def start_recording():
+    """开始记录 load_scaled_image 的加载请求 (构建图集用)；记录期间不使用已有的图集"""
+    global _recorded
+    _recorded = set()
+
+
+def stop_recording():
+    global _recorded
+    requests, _recorded = _recorded or set(), None
+    return requests
+
+
+def is_recording():
+    return _recorded is not None
+
+
+def filter_requests(requests, source_dirs):
+    """只保留 source_dirs 目录下的加载请求"""
+    source_dirs = {os.path.normpath(directory) for directory in source_dirs}
+    return {request for request in requests if request[0] in source_dirs}
+
+
+def build_atlas(requests, output_dir, images_dir, sheet_size=(1024, 1024), padding=1):
+    """把 requests 中的 (目录, 文件名, 尺寸, 是否不透明) 打包成图集，写出图集 PNG 和清单，返回清单"""
+    groups = {False: [], True: []}  # 是否带 alpha -> [(key, 缩放后的 Surface)]
+    for directory, filename, size, opaque in sorted(requests, key=lambda r: (r[0], r[1], r[2] or (), r[3])):
+        path = os.path.join(directory, filename)
+        try:
+            image = pygame.image.load(path)
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"跳过无法加载的图片 {path}: {e}")
+            continue
+        if size:
+            image = pygame.transform.scale(image, size)
+        groups[image.get_alpha() is not None and not opaque].append(((directory, filename, size, opaque), image))
+
+    os.makedirs(output_dir, exist_ok=True)
+    for name in os.listdir(output_dir):  # 清掉上次构建的图集
+        if name.startswith("atlas_") and name.endswith(".png"):
+            os.remove(os.path.join(output_dir, name))
+
+    sheets = []
+    entries = []
+    signatures = {}  # 源文件 -> 签名 (同一个文件可能以几种尺寸打包)
+    for alpha, items in groups.items():
+        # 先放高的，skyline 算法在这种顺序下浪费最少
+        items.sort(key=lambda item: (-item[1].get_height(), -item[1].get_width()))
+        pending = items
+        while pending:
+            width = max(sheet_size[0], max(image.get_width() for _, image in pending) + padding)
+            height = max(sheet_size[1], max(image.get_height() for _, image in pending) + padding)
+            packer = SkylinePacker(width, height)
+            placed = []
+            pending = [item for item in pending if not _place(packer, item, padding, placed)]
+            sheet_index = len(sheets)
+            flags = pygame.SRCALPHA if alpha else 0
+            sheet = pygame.Surface((width, packer.used_height), flags, 32)
+            for key, image, (x, y) in placed:
+                # 叠在全 0 的图集上取最大值等于原样复制：带 alpha 的连同 alpha 一起复制，
+                # 不透明图集只复制颜色 (与运行时 convert() 丢掉 alpha 通道的结果一致)
+                sheet.blit(image, (x, y), special_flags=pygame.BLEND_RGBA_MAX if alpha else pygame.BLEND_RGB_MAX)
+                directory, filename, size, opaque = key
+                path = os.path.join(directory, filename)
+                if path not in signatures:
+                    signatures[path] = file_signature(path)
+                entries.append({
+                    "dir": os.path.relpath(directory, images_dir).replace(os.sep, "/"),
+                    "file": filename,
+                    "size": list(size) if size else None,
+                    "opaque": opaque,
+                    "sheet": sheet_index,
+                    "rect": [x, y, image.get_width(), image.get_height()],
+                    **signatures[path],
+                })
+            sheet_file = f"atlas_{'alpha' if alpha else 'opaque'}_{sheet_index}.png"
+            pygame.image.save(sheet, os.path.join(output_dir, sheet_file))
+            sheets.append({"file": sheet_file, "alpha": alpha, "size": [width, packer.used_height]})
+
+    manifest = {"version": MANIFEST_VERSION, "sheets": sheets, "entries": entries}
+    with open(os.path.join(output_dir, MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    return manifest
+
+
+def _place(packer, item, padding, placed):
+    key, image = item
+    pos = packer.insert(image.get_width() + padding, image.get_height() + padding)
+    if pos is None:
+        return False
+    placed.append((key, image, pos))
+    return True
+
+
+# --- 运行时 ---
+class TextureAtlas:
+    def __init__(self, directory, images_dir, manifest):
+        from .sushi_elements import convert_for_display
+        self.directory = directory
+        self.entries = {}
+        self.stale = []  # 源文件在构建图集之后被修改过的图片 (不使用图集中的旧版本)
+        unchanged = {}   # 源文件 -> 是否没变 (同一个文件的几种尺寸只检查一次)
+        for entry in manifest["entries"]:
+            source_dir = os.path.normpath(os.path.join(images_dir, entry["dir"]))
+            path = os.path.join(source_dir, entry["file"])
+            if path not in unchanged:
+                try:
+                    unchanged[path] = source_unchanged(path, entry)
+                except OSError:
+                    unchanged[path] = True  # 源文件不在了，图集里的版本仍然可用
+                if not unchanged[path]:
+                    self.stale.append(entry["file"])
+            if unchanged[path]:
+                key = (source_dir, entry["file"], _size_key(entry["size"]), entry["opaque"])
+                self.entries[key] = (entry["sheet"], pygame.Rect(entry["rect"]))
+        # 只加载还有图片可用的图集 (源文件全改过的图集不解码、不占内存)
+        used = {sheet_index for sheet_index, _ in self.entries.values()}
+        self.sheets = [convert_for_display(pygame.image.load(os.path.join(directory, sheet["file"])))
+                       if index in used else None
+                       for index, sheet in enumerate(manifest["sheets"])]
+        self._subsurfaces = {}
+        self.hits = 0
+
+    def get(self, directory, filename, size, opaque=False):
+        key = (os.path.normpath(directory), filename, _size_key(size), opaque)
+        with _lock:
+            image = self._subsurfaces.get(key)
+            if image is None:
+                location = self.entries.get(key)
+                if location is None:
+                    return None
+                sheet_index, rect = location
+                image = self._subsurfaces[key] = self.sheets[sheet_index].subsurface(rect)
+            self.hits += 1
+        return image
+
+    def invalidate(self, directory, filename):
+        """源文件被修改 (热重载)：之后对该文件的查找不再命中图集，改为从磁盘加载"""
+        directory = os.path.normpath(directory)
+        with _lock:
+            for key in [key for key in self.entries if key[0] == directory and key[1] == filename]:
+                del self.entries[key]
+                self._subsurfaces.pop(key, None)
+        if filename not in self.stale:
+            self.stale.append(filename)
+
+    def format_text(self):
+        loaded = [sheet for sheet in self.sheets if sheet is not None]
+        pixels = sum(sheet.get_width() * sheet.get_height() for sheet in loaded)
+        text = f"图集: {len(loaded)} 张 ({pixels * 4 / 1024 / 1024:.1f} MB), {len(self.entries)} 个图片"
+        if self.stale:
+            text += f"; {len(self.stale)} 个源文件已修改，改为单独加载 (请重新运行 python -m tools.build_atlas)"
+        return text
+
+
+def load_atlas(directory, images_dir):
+    """读入图集清单和图集；没有构建过图集或清单版本不符时返回 None (全部单独加载)"""
+    global _atlas
+    path = os.path.join(directory, MANIFEST_FILENAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"无法读取图集清单 {path}: {e}")
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        print(f"图集清单版本不符，忽略图集: {path}")
+        return None
+    try:
+        _atlas = TextureAtlas(directory, images_dir, manifest)
+    except (pygame.error, FileNotFoundError) as e:
+        print(f"无法加载图集，改为单独加载图片: {e}")
+        return None
+    return _atlas
+
+
+def unload_atlas():
+    global _atlas
+    _atlas = None
+
+
+def lookup(directory, filename, size, opaque=False):
+    """load_scaled_image 调用：返回图集中的子 Surface，没有时返回 None"""
+    if _recorded is not None:
+        with _lock:
+            _recorded.add((os.path.normpath(directory), filename, _size_key(size), opaque))
+        return None
+    if _atlas is None:
+        return None
+    return _atlas.get(directory, filename, size, opaque)
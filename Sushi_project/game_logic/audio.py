@@ -0,0 +1,217 @@
+# game_logic/audio.py
+"""音频子系统：音效注册表、预解码背景音乐的交叉淡入淡出、带优先级的固定通道池
+
+- 所有音效在启动时解码一次，保存在注册表中，按名字播放。
+- 背景音乐在后台线程中预先解码为 Sound，切换时不再读盘；
+  两首背景音乐在两个保留通道上交替播放，实现交叉淡入淡出。
+  代价是内存：整首解码成 PCM (44.1kHz 16 位立体声每分钟约 10 MB)，
+  现在的两首 (2 分 22 秒和 1 分 22 秒) 共约 39 MB，换更长的曲子时要注意。
+  解码失败时不缓存失败的结果，之后的 load_music / prefetch_music 会重新尝试。
+- 音效只使用固定数量的通道。每个音效有优先级和同时发声数上限：
+  超过上限时重新触发最早的那一个发声；通道用完时，高优先级音效抢占最低优先级的通道，
+  低优先级的音效则直接丢弃。因此连续狂点也不会挤掉胜利/失败/时间到的提示音。
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+MUSIC_CHANNELS = 2  # 通道 0、1 保留给背景音乐，交替使用
+
+
+class SoundSpec:
+    """一个已注册音效的参数"""
+
+    def __init__(self, name, sound, priority, max_voices):
+        self.name = name
+        self.sound = sound
+        self.priority = priority
+        self.max_voices = max_voices
+
+
+class AudioManager:
+    def __init__(self, sounds_dir, num_channels=12, music_volume=0.5, sfx_volume=0.8, crossfade_ms=800,
+                 enabled=True):
+        self.sounds_dir = sounds_dir
+        self.music_volume = music_volume
+        self.sfx_volume = sfx_volume
+        self.crossfade_ms = crossfade_ms
+        # enabled=False (静音) 时即使同一进程里别的引擎已经初始化了混音器，也不占用通道、不解码
+        self.enabled = enabled and pygame.mixer.get_init() is not None
+
+        self.sounds = {}           # 名字 -> SoundSpec
+        self.music_tracks = {}     # 文件名 -> 预解码的 Sound
+        self._music_pending = {}   # 文件名 -> 解码中的 Future
+        self.current_music = None
+        self._music_slot = 0       # 当前背景音乐所在的保留通道
+        self._voices = []          # 每个音效通道上的 (音效名, 优先级, 开始序号)
+        self._voice_serial = 0
+        # 统计：播放、重新触发、抢占、丢弃的次数
+        self.stats = {"played": 0, "retriggered": 0, "stolen": 0, "dropped": 0}
+        self.music_load_ms = {}    # 文件名 -> 解码耗时 (毫秒)
+        self._music_lock = threading.Lock()
+        self._loader = None
+
+        if not self.enabled:
+            if enabled:
+                print("混音器未初始化，音频已禁用。")
+            return
+        pygame.mixer.set_num_channels(MUSIC_CHANNELS + num_channels)
+        pygame.mixer.set_reserved(MUSIC_CHANNELS)
+        self._music_channels = [pygame.mixer.Channel(i) for i in range(MUSIC_CHANNELS)]
+        self._sfx_channels = [pygame.mixer.Channel(MUSIC_CHANNELS + i) for i in range(num_channels)]
+        self._voices = [None] * num_channels
+        self._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-loader")
+
+    # --- 音效 ---
+    def load_sound(self, name, filename, priority=0, max_voices=1):
+        """解码并注册一个音效；文件缺失或无法解码时打印警告，播放时静默跳过"""
+        if not self.enabled:
+            return None
+        path = os.path.join(self.sounds_dir, filename)
+        if not os.path.exists(path):
+            print(f"警告: 音效文件未找到: {path}")
+            return None
+        try:
+            sound = pygame.mixer.Sound(path)
+        except pygame.error as e:
+            print(f"无法加载音效 {filename}: {e}")
+            return None
+        sound.set_volume(self.sfx_volume)
+        self.sounds[name] = SoundSpec(name, sound, priority, max(1, max_voices))
+        return sound
+
+    def _active_voices(self):
+        """清理已播放完的通道，返回仍在发声的 [(通道序号, 音效名, 优先级, 开始序号)]"""
+        active = []
+        for index, voice in enumerate(self._voices):
+            if voice is None:
+                continue
+            if not self._sfx_channels[index].get_busy():
+                self._voices[index] = None
+                continue
+            active.append((index,) + voice)
+        return active
+
+    def play(self, name):
+        """播放已注册的音效，返回使用的通道；被丢弃或未注册时返回 None"""
+        spec = self.sounds.get(name)
+        if spec is None:
+            return None
+        active = self._active_voices()
+
+        same = [voice for voice in active if voice[1] == name]
+        if len(same) >= spec.max_voices:
+            # 达到同时发声上限：重新触发最早的那一个，不占用新通道
+            index = min(same, key=lambda voice: voice[3])[0]
+            self.stats["retriggered"] += 1
+        else:
+            busy = {voice[0] for voice in active}
+            free = [i for i in range(len(self._sfx_channels)) if i not in busy]
+            if free:
+                index = free[0]
+            else:
+                # 通道用完：抢占优先级最低 (同优先级中最早开始) 的发声
+                victim = min(active, key=lambda voice: (voice[2], voice[3]))
+                if victim[2] >= spec.priority:
+                    self.stats["dropped"] += 1
+                    return None
+                index = victim[0]
+                self.stats["stolen"] += 1
+
+        channel = self._sfx_channels[index]
+        channel.play(spec.sound)
+        self._voice_serial += 1
+        self._voices[index] = (name, spec.priority, self._voice_serial)
+        self.stats["played"] += 1
+        return channel
+
+    # --- 背景音乐 ---
+    def _decode_music(self, filename):
+        start = time.perf_counter()
+        sound = pygame.mixer.Sound(os.path.join(self.sounds_dir, filename))
+        sound.set_volume(self.music_volume)
+        self.music_load_ms[filename] = (time.perf_counter() - start) * 1000
+        return sound
+
+    def prefetch_music(self, filename):
+        """在后台线程中预先解码背景音乐，切换时直接使用内存中的数据"""
+        if not self.enabled:
+            return
+        with self._music_lock:
+            if filename not in self.music_tracks and filename not in self._music_pending:
+                self._music_pending[filename] = self._loader.submit(self._decode_music, filename)
+
+    def reload_music(self, filename):
+        """丢掉已解码的背景音乐并在后台重新解码 (热重载)；正在播放的旧版本下次切换时才换掉"""
+        with self._music_lock:
+            self.music_tracks.pop(filename, None)
+        self.prefetch_music(filename)
+
+    def load_music(self, filename):
+        """取得已解码的背景音乐；还在解码时等待它完成，没有预取时当场解码。
+        可以在其他线程 (例如场景预加载) 中调用"""
+        if not self.enabled:
+            return None
+        self.prefetch_music(filename)
+        with self._music_lock:
+            future = self._music_pending.get(filename)
+        if future is not None:
+            try:
+                sound = future.result()
+            finally:
+                # 解码失败时也要去掉这一项，否则以后的调用一直重新抛出同一个异常，预取也不再重试
+                with self._music_lock:
+                    if self._music_pending.get(filename) is future:
+                        del self._music_pending[filename]
+            with self._music_lock:
+                self.music_tracks[filename] = sound
+        return self.music_tracks[filename]
+
+    def play_music(self, filename, loops=-1, crossfade_ms=None):
+        """切换到指定背景音乐，与正在播放的音乐交叉淡入淡出"""
+        if not self.enabled:
+            return
+        fade = self.crossfade_ms if crossfade_ms is None else crossfade_ms
+        active = self._music_channels[self._music_slot]
+        if self.current_music == filename and active.get_busy():
+            return
+        try:
+            if filename not in self.music_tracks:
+                print(f"背景音乐 {filename} 尚未预加载完成，等待解码...")
+            sound = self.load_music(filename)
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"无法加载或播放背景音乐 {filename}: {e}")
+            return
+
+        if active.get_busy():
+            active.fadeout(fade)
+            self._music_slot = 1 - self._music_slot
+        channel = self._music_channels[self._music_slot]
+        channel.stop()  # 上一次淡出可能还没结束
+        channel.play(sound, loops=loops, fade_ms=fade if self.current_music else 0)
+        self.current_music = filename
+        print(f"正在播放背景音乐: {filename}")
+
+    def stop_music(self, fade_ms=0):
+        """停止背景音乐；fade_ms > 0 时淡出"""
+        if not self.enabled:
+            return
+        channel = self._music_channels[self._music_slot]
+        if fade_ms > 0:
+            channel.fadeout(fade_ms)
+        else:
+            channel.stop()
+        self.current_music = None
+
+    def format_stats(self):
+        stats = self.stats
+        return (f"音效: 播放 {stats['played']} 次, 重新触发 {stats['retriggered']} 次, "
+                f"抢占 {stats['stolen']} 次, 丢弃 {stats['dropped']} 次")
+
+    def shutdown(self):
+        if self._loader is not None:
+            self._loader.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,140 @@
+# game_logic/bots.py
+"""服务策略机器人
+
+机器人和玩家一样，只通过 GameActions 中的点击动作操作游戏，
+每隔 reaction_ticks 个逻辑帧做一次决定 (模拟人的操作速度)。
+不同策略的区别只在于 "先服务哪位顾客" 和 "先做寿司还是先拿饮品"。
+"""
+
+import random
+
+from config import FPS
+
+# 完成一件物品大约需要的点击次数 (用于估计能否在时限内完成)
+_SUSHI_CLICKS = 4   # 米饭, 配料, 拿起, 送餐
+_DRINK_CLICKS = 2   # 饮品机, 送餐
+
+
+def _needs(customer):
+    """顾客还缺的物品类别列表"""
+    needed = []
+    if customer.sushi_received_key is None:
+        needed.append("sushi")
+    if customer.drink_received_key is None:
+        needed.append("drink")
+    return needed
+
+
+class ServingBot:
+    """策略基类：子类覆盖 rank_customer() 和 item_order()"""
+
+    name = "base"
+
+    def __init__(self, reaction_ticks=15, seed=0):
+        self.reaction_ticks = reaction_ticks
+        self.rng = random.Random(seed)
+        self._cooldown = 0
+
+    # --- 策略钩子 ---
+    def rank_customer(self, customer):
+        """排序键，值越小越先服务"""
+        return customer.order_remaining_seconds
+
+    def item_order(self, customer):
+        """对一位顾客，先做哪样"""
+        return _needs(customer)
+
+    def pick_target(self, waiting):
+        return min(waiting, key=self.rank_customer) if waiting else None
+
+    # --- 通用决策 ---
+    def decide(self, game):
+        """根据当前局面返回下一个动作，或 None 表示这次不操作"""
+        hand = game.player_h
+        board = game.cutting_b
+        waiting = [c for c in game.customers
+                   if c.state == "waiting" and c.order and not c.order_fulfilled]
+
+        if hand.is_holding:
+            category, key = hand.held_item_category, hand.held_item_key
+            takers = [c for c in waiting if category in _needs(c)]
+            if not takers:
+                return None
+            # 优先送给正好点了这件物品的顾客
+            exact = [c for c in takers if c.order[category] == key]
+            target = min(exact or takers, key=self.rank_customer)
+            return ("serve", target.spot_index)
+
+        target = self.pick_target(waiting)
+        if target is None:
+            return None
+        for item in self.item_order(target):
+            if item == "drink":
+                return ("drink", target.order["drink"])
+            if board.is_complete():
+                return ("pickup",)
+            if not board.has_rice:
+                return ("rice",)
+            return ("topping", target.order["sushi"])
+        return None
+
+    def act(self, game, actions):
+        """每个逻辑帧调用一次；到了反应时间就执行一个动作，返回执行的动作或 None"""
+        if self._cooldown > 0:
+            self._cooldown -= 1
+            return None
+        action = self.decide(game)
+        if action is not None:
+            actions.perform(action)
+            self._cooldown = self.reaction_ticks
+        return action
+
+
+class NearestDeadlineBot(ServingBot):
+    """最早截止优先：先服务剩余时间最少的顾客，先做寿司再拿饮品"""
+    name = "nearest_deadline"
+
+
+class DrinksFirstBot(ServingBot):
+    """饮品优先：先把所有顾客的饮品送完 (饮品只需两次点击)，再做寿司"""
+    name = "drinks_first"
+
+    def pick_target(self, waiting):
+        thirsty = [c for c in waiting if "drink" in _needs(c)]
+        return super().pick_target(thirsty or waiting)
+
+    def item_order(self, customer):
+        return sorted(_needs(customer), key=lambda item: item != "drink")
+
+
+class GreedyTipBot(ServingBot):
+    """按小费贪心：优先完成只差一件的订单 (马上拿到全额小费)，
+    放弃剩余时间已经不够完成的订单，其余按截止时间排序"""
+    name = "greedy_tip"
+
+    def _clicks_needed(self, customer):
+        needed = _needs(customer)
+        return (_SUSHI_CLICKS if "sushi" in needed else 0) + (_DRINK_CLICKS if "drink" in needed else 0)
+
+    def rank_customer(self, customer):
+        seconds_needed = self._clicks_needed(customer) * self.reaction_ticks / FPS
+        hopeless = customer.order_remaining_seconds < seconds_needed
+        return (hopeless, len(_needs(customer)), customer.order_remaining_seconds)
+
+    def item_order(self, customer):
+        # 剩余时间不多时先做快的饮品，保住部分小费
+        needed = _needs(customer)
+        if customer.order_remaining_seconds * FPS < _SUSHI_CLICKS * self.reaction_ticks:
+            return sorted(needed, key=lambda item: item != "drink")
+        return needed
+
+
+class RandomBot(ServingBot):
+    """随机服务一位等待中的顾客 (基准线)"""
+    name = "random"
+
+    def pick_target(self, waiting):
+        return self.rng.choice(waiting) if waiting else None
+
+
+STRATEGIES = {bot.name: bot for bot in (NearestDeadlineBot, DrinksFirstBot, GreedyTipBot, RandomBot)}
@@ -0,0 +1,174 @@
+# game_logic/capture.py
+"""异步画面录制：主循环只把一帧像素复制进预分配的缓冲区，编码和写盘都在写线程中进行
+
+- 环形缓冲：启动时分配 ring_size 块与显示 Surface 同样大小的缓冲区，录制过程中不再分配内存。
+  主循环每帧从空闲队列取一块，把 Surface 的原始像素整块复制进去 (一次 memcpy)，交给写线程。
+- 降级方式是丢帧：没有空闲缓冲区 (写线程跟不上) 时直接丢弃这一帧并计数，主循环从不等待。
+  离线渲染 (例如从录像生成视频) 可以用 block=True，此时等待写线程而不丢帧。
+- 输出格式：
+    png  每帧一个 PNG 文件 (frame_000000.png ...)。pygame.image.save 编码时一直持有 GIL，
+         会拖住主循环，所以这里用标准库自己编码：切片重排通道，压缩交给 zlib (压缩时释放 GIL)
+    raw  所有帧依次写入 frames.raw (不含行填充的原始像素)，并生成 capture.json 说明像素格式，
+         可以用 ffmpeg -f rawvideo -pixel_format bgr0 -video_size 800x600 -framerate 60 -i frames.raw 转成视频
+"""
+
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+
+FORMATS = ("png", "raw")
+PNG_COMPRESS_LEVEL = 1  # 录制优先速度
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(rgb, width, height, level=PNG_COMPRESS_LEVEL):
+    """把紧密排列的 RGB 像素编码为 PNG (每行使用 None 过滤)"""
+    row_bytes = width * 3
+    scanlines = bytearray((row_bytes + 1) * height)  # 每行前面一个过滤类型字节 (0)
+    for y in range(height):
+        start = y * (row_bytes + 1) + 1
+        scanlines[start:start + row_bytes] = rgb[y * row_bytes:(y + 1) * row_bytes]
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)  # 8 位 RGB
+    return (b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", header)
+            + _png_chunk(b"IDAT", zlib.compress(scanlines, level)) + _png_chunk(b"IEND", b""))
+
+
+def ffmpeg_pixel_format(surface):
+    """Surface 在内存中的像素格式 (ffmpeg 的名字，例如 bgr0、bgra、rgb24)，只支持 24/32 位"""
+    size = surface.get_bytesize()
+    if size not in (3, 4):
+        raise ValueError(f"不支持录制 {size * 8} 位的 Surface")
+    rmask, gmask, bmask, amask = surface.get_masks()
+    names = {rmask: "r", gmask: "g", bmask: "b"}
+    if size == 4:
+        names[amask or 0xFFFFFFFF ^ (rmask | gmask | bmask)] = "a" if amask else "0"
+    # 小端机器上，掩码最低的字节在内存中最前面
+    name = "".join(names[mask] for mask in sorted(names))
+    return name if size == 4 else name + "24"
+
+
+class FrameCapture:
+    def __init__(self, directory, surface, fmt="png", ring_size=8, fps=60, block=False):
+        if fmt not in FORMATS:
+            raise ValueError(f"未知的录制格式: {fmt}")
+        self.directory = directory
+        self.fmt = fmt
+        self.fps = fps
+        self.block = block
+        self.size = surface.get_size()
+        self.pitch = surface.get_pitch()
+        self.bytes_per_pixel = surface.get_bytesize()
+        self.pixel_format = ffmpeg_pixel_format(surface)
+        # R、G、B 在每个像素中的字节偏移 (小端：掩码最低位所在的字节)
+        self._channel_offsets = [(mask.bit_length() - 1) // 8 for mask in surface.get_masks()[:3]]
+        frame_bytes = self.pitch * self.size[1]
+
+        # 统计
+        self.submitted = 0     # 主循环提交的帧数
+        self.dropped = 0       # 没有空闲缓冲区而丢弃的帧数
+        self.dropped_frames = []  # 被丢弃的帧序号 (raw 格式据此还原时间轴)
+        self.written = 0       # 写线程已写盘的帧数
+        self.copy_ms = 0.0     # 主循环复制像素的累计耗时
+        self.encode_ms = 0.0   # 写线程编码和写盘的累计耗时
+
+        self._slots = [bytearray(frame_bytes) for _ in range(ring_size)]
+        self._free = deque(range(ring_size))
+        self._filled = deque()   # (缓冲区序号, 帧序号)
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._closing = False
+        self._raw_file = None
+        self._rgb = bytearray(self.size[0] * self.size[1] * 3) if fmt == "png" else None
+
+        os.makedirs(directory, exist_ok=True)
+        if fmt == "raw":
+            self._raw_file = open(os.path.join(directory, "frames.raw"), "wb")
+        self._thread = threading.Thread(target=self._writer, name="capture-writer", daemon=True)
+        self._thread.start()
+
+    # --- 主循环 ---
+    def submit(self, surface):
+        """复制一帧交给写线程；没有空闲缓冲区时丢弃并返回 False (block=True 时等待)"""
+        self.submitted += 1
+        with self._lock:
+            if self.block:
+                self._ready.wait_for(lambda: self._free)
+            if not self._free:
+                self.dropped += 1
+                self.dropped_frames.append(self.submitted - 1)
+                return False
+            slot = self._free.popleft()
+        start = time.perf_counter()
+        with memoryview(surface.get_buffer()) as pixels:
+            self._slots[slot][:] = pixels
+        self.copy_ms += (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._filled.append((slot, self.submitted - 1))
+            self._ready.notify_all()
+        return True
+
+    # --- 写线程 ---
+    def _writer(self):
+        while True:
+            with self._lock:
+                self._ready.wait_for(lambda: self._filled or self._closing)
+                if not self._filled:
+                    return
+                slot, frame_index = self._filled.popleft()
+            start = time.perf_counter()
+            try:
+                self._encode(self._slots[slot], frame_index)
+            except OSError as e:
+                print(f"无法写入录制帧 {frame_index}: {e}")
+            self.encode_ms += (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.written += 1
+                self._free.append(slot)
+                self._ready.notify_all()
+
+    def _encode(self, buffer, frame_index):
+        width, height = self.size
+        row_bytes = width * self.bytes_per_pixel
+        if self.fmt == "png":
+            if row_bytes != self.pitch:
+                buffer = b"".join(buffer[y * self.pitch:y * self.pitch + row_bytes] for y in range(height))
+            step = self.bytes_per_pixel
+            for channel, offset in enumerate(self._channel_offsets):
+                self._rgb[channel::3] = buffer[offset::step]
+            with open(os.path.join(self.directory, f"frame_{frame_index:06d}.png"), "wb") as f:
+                f.write(encode_png(self._rgb, width, height))
+            return
+        if row_bytes == self.pitch:
+            self._raw_file.write(buffer)
+        else:  # 去掉每行末尾的填充字节
+            view = memoryview(buffer)
+            for y in range(height):
+                self._raw_file.write(view[y * self.pitch:y * self.pitch + row_bytes])
+
+    # --- 结束 ---
+    def close(self):
+        """写完已提交的帧，停止写线程；raw 格式同时写出 capture.json"""
+        with self._lock:
+            self._closing = True
+            self._ready.notify_all()
+        self._thread.join()
+        if self._raw_file is not None:
+            self._raw_file.close()
+            with open(os.path.join(self.directory, "capture.json"), "w", encoding="utf-8") as f:
+                json.dump({"width": self.size[0], "height": self.size[1], "pixel_format": self.pixel_format,
+                           "fps": self.fps, "frames": self.written, "dropped": self.dropped,
+                           "dropped_frames": self.dropped_frames}, f)
+
+    def format_stats(self):
+        copy_avg = self.copy_ms / max(1, self.submitted - self.dropped)
+        encode_avg = self.encode_ms / max(1, self.written)
+        return (f"录制: 提交 {self.submitted} 帧, 写入 {self.written} 帧, 丢弃 {self.dropped} 帧 "
+                f"({self.dropped / max(1, self.submitted):.1%}); 主循环复制平均 {copy_avg:.2f}ms, "
+                f"写线程编码平均 {encode_avg:.2f}ms -> {self.directory}")
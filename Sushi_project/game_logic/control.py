@@ -0,0 +1,259 @@
+# game_logic/control.py
+"""外部控制接口：自动化代理和测试台通过套接字用语义动作操作游戏，不再模拟像素点击
+
+传输层是 Unix 域套接字或本机回环 TCP，每行一个 JSON (NDJSON)：每个请求一行，每个响应一行。
+请求中的字段都可以省略，按下面的顺序处理：
+    {"id": 1,
+     "reset": {"seed": 7, "level": 1},          开始新的一局 (begin_session 后点击开始)
+     "actions": [["rice"], ["topping", "salmon"], ["pickup"], ["serve", 0], ["wait", 30], ["drink", "sake"]],
+     "step": 1,                                  执行完动作后再推进多少个逻辑帧 (仅同步模式)
+     "observe": true}                            是否返回观测 (默认 true)
+动作与 GameActions 相同 (最终都是一次点击，代理只能做玩家能做的事)，
+另有 ["wait", n] 在一批动作中间推进 n 个逻辑帧 (仅同步模式)。
+响应：
+    {"id": 1, "tick": 1234, "results": ["ok", "no_effect", "invalid", ...], "obs": {...}}
+    results 与 actions 一一对应：ok 表示动作改变了菜板、手、小费、顾客或界面，
+    no_effect 表示点击了但没有效果 (例如没放米饭就放配料)，invalid 表示不认识的动作。
+    请求本身有错时返回 {"id": ..., "error": "..."}。
+观测 (observe) 只包含决策需要的内容：
+    {"tick", "state": "start"|"running"|"over", "level", "time_left" (秒), "tips", "target",
+     "board": [有米饭, 配料或 null], "hand": [类别, 物品] 或 null,
+     "orders": [[顾客位, 寿司, 饮品, 剩余逻辑帧, 已收寿司或 null, 已收饮品或 null], ...]}
+    orders 只列出正在等待、订单还没完成的顾客。
+
+同步模式 (lockstep，默认)：游戏只在请求 step / wait 时前进，与真实时间无关，
+代理每秒可以推进几千个逻辑帧。实时模式：服务器按逻辑帧率自己运行，请求中的动作立即执行。
+"""
+
+import asyncio
+import json
+import os
+import socket
+import time
+
+from config import FPS, ORDER_DURATION_SECONDS, STATE_GAME_OVER, STATE_GAME_RUNNING, STATE_START_SCREEN
+from . import runtime
+from .actions import GameActions
+
+DEFAULT_PORT = 7790
+STATE_NAMES = {STATE_START_SCREEN: "start", STATE_GAME_RUNNING: "running", STATE_GAME_OVER: "over"}
+MAX_STEPS_PER_REQUEST = 60 * 60 * 10  # 一次请求最多推进的逻辑帧数 (10 分钟)
+
+
+def parse_action(item):
+    """把 JSON 中的动作 (列表) 转成动作元组；格式不对时返回 None"""
+    if not isinstance(item, list) or not item or not isinstance(item[0], str):
+        return None
+    if not all(isinstance(part, (str, int)) and not isinstance(part, bool) for part in item):
+        return None
+    return tuple(item)
+
+
+class ControlSession:
+    """处理控制请求 (与传输层无关，也可以在同一进程中直接调用 handle)"""
+
+    def __init__(self, game, lockstep=True):
+        self.game = game
+        self.lockstep = lockstep
+        self.actions = GameActions(game)
+        # 统计
+        self.requests = 0
+        self.actions_performed = 0
+        self.steps = 0
+        self.errors = 0
+        self.busy_s = 0.0
+
+    def step(self, ticks):
+        game = self.game
+        for _ in range(ticks):
+            game.update_game()
+            runtime.advance_tick()
+        self.steps += ticks
+
+    def reset(self, seed=None, level=None):
+        self.game.begin_session(runtime.new_seed() if seed is None else int(seed), level)
+        self.actions.perform(("start",))
+
+    def perform(self, action):
+        """执行一个动作，返回 ok / no_effect / invalid"""
+        if action is None:
+            return "invalid"
+        if action[0] == "wait":
+            if not self.lockstep or len(action) != 2 or not isinstance(action[1], int) or action[1] < 0:
+                return "invalid"
+            self.step(min(action[1], MAX_STEPS_PER_REQUEST))
+            return "ok"
+        if action not in self.actions.targets:
+            return "invalid"
+        before = self.game.input_effect_signature()
+        self.actions.perform(action)
+        self.actions_performed += 1
+        return "ok" if self.game.input_effect_signature() != before else "no_effect"
+
+    def observe(self):
+        game = self.game
+        now = runtime.get_ticks()
+        orders = []
+        for customer in game.customers:
+            if customer.state != "waiting" or not customer.order or customer.order_fulfilled:
+                continue
+            start = customer.order_timer_start_ticks
+            remaining_ms = (start + ORDER_DURATION_SECONDS * 1000 - now) if start is not None else ORDER_DURATION_SECONDS * 1000
+            orders.append([customer.spot_index, customer.order["sushi"], customer.order["drink"],
+                           max(0, -(-remaining_ms * FPS // 1000)),
+                           customer.sushi_received_key, customer.drink_received_key])
+        hand = game.player_h
+        board = game.cutting_b
+        return {
+            "tick": runtime.logic_tick,
+            "state": STATE_NAMES[game.current_game_state],
+            "level": game.current_level,
+            "time_left": game.remaining_time,
+            "tips": game.total_tips,
+            "target": game.current_target_tips,
+            "board": [board.has_rice, board.topping_key],
+            "hand": [hand.held_item_category, hand.held_item_key] if hand.is_holding else None,
+            "orders": orders,
+        }
+
+    def handle(self, request):
+        """处理一个请求 (dict)，返回响应 (dict)"""
+        start = time.perf_counter()
+        self.requests += 1
+        response = {"id": request.get("id")} if isinstance(request, dict) else {"id": None}
+        try:
+            if not isinstance(request, dict):
+                raise ValueError("请求必须是 JSON 对象")
+            if "reset" in request:
+                options = request["reset"] or {}
+                self.reset(options.get("seed"), options.get("level"))
+            actions = request.get("actions") or []
+            if not isinstance(actions, list):
+                raise ValueError("actions 必须是列表")
+            steps = request.get("step", 0)
+            if not isinstance(steps, int) or not 0 <= steps <= MAX_STEPS_PER_REQUEST:
+                raise ValueError(f"step 必须是 0 到 {MAX_STEPS_PER_REQUEST} 之间的整数")
+            if steps and not self.lockstep:
+                raise ValueError("实时模式下游戏自己运行，不能请求 step")
+            response["results"] = [self.perform(parse_action(item)) for item in actions]
+            if steps:
+                self.step(steps)
+            response["tick"] = runtime.logic_tick
+            if request.get("observe", True):
+                response["obs"] = self.observe()
+        except (ValueError, TypeError, AttributeError) as e:
+            self.errors += 1
+            response = {"id": response["id"], "error": str(e)}
+        self.busy_s += time.perf_counter() - start
+        return response
+
+    def format_text(self):
+        return (f"控制接口: {self.requests} 个请求, {self.actions_performed} 个动作, {self.steps} 个逻辑帧, "
+                f"{self.errors} 个错误; 处理请求平均 {self.busy_s / max(1, self.requests) * 1e6:.1f}us")
+
+
+class ControlServer:
+    """在 Unix 域套接字 (path) 或回环 TCP 端口上提供 ControlSession"""
+
+    def __init__(self, game, lockstep=True):
+        self.session = ControlSession(game, lockstep)
+        self.lockstep = lockstep
+        self._server = None
+        self.running = False
+        self.clients = 0
+
+    async def start(self, path=None, host="127.0.0.1", port=DEFAULT_PORT):
+        """开始监听；返回监听的地址 (套接字路径或端口号)"""
+        if path is not None:
+            if os.path.exists(path):
+                os.remove(path)  # 上次没有正常退出留下的套接字文件
+            self._server = await asyncio.start_unix_server(self._handle_client, path)
+            address = path
+        else:
+            self._server = await asyncio.start_server(self._handle_client, host, port)
+            address = self._server.sockets[0].getsockname()[1]
+        self.running = True
+        return address
+
+    async def _handle_client(self, reader, writer):
+        self.clients += 1
+        try:
+            while self.running:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    response = {"id": None, "error": f"不是有效的 JSON: {e}"}
+                    self.session.errors += 1
+                else:
+                    response = self.session.handle(request)
+                writer.write(json.dumps(response, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+                if writer.transport.get_write_buffer_size() > 64 * 1024:
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    async def run(self):
+        """同步模式下只等待请求；实时模式下按逻辑帧率运行游戏"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while self.running:
+            if self.lockstep:
+                await asyncio.sleep(0.5)
+                continue
+            self.session.step(1)
+            next_tick += 1 / FPS
+            if next_tick < loop.time() - 0.25:
+                next_tick = loop.time()  # 落后太多时放弃追赶
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+    async def stop(self):
+        self.running = False
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+class ControlClient:
+    """阻塞式客户端 (代理、测试脚本用)：每次 call 发送一个请求并等待响应"""
+
+    def __init__(self, path=None, host="127.0.0.1", port=DEFAULT_PORT, timeout=None):
+        if path is not None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(path)
+        else:
+            self.sock = socket.create_connection((host, port))
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(timeout)
+        self._reader = self.sock.makefile("rb")
+        self._next_id = 0
+
+    def call(self, actions=None, step=0, observe=True, reset=None):
+        """发送一个请求，返回响应 (dict)；服务器报告错误时抛出 ValueError"""
+        self._next_id += 1
+        request = {"id": self._next_id}
+        if reset is not None:
+            request["reset"] = reset
+        if actions:
+            request["actions"] = [list(action) for action in actions]
+        if step:
+            request["step"] = step
+        if not observe:
+            request["observe"] = False
+        self.sock.sendall(json.dumps(request, separators=(",", ":")).encode("utf-8") + b"\n")
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("控制接口已关闭连接")
+        response = json.loads(line)
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response
+
+    def close(self):
+        self._reader.close()
+        self.sock.close()
@@ -0,0 +1,411 @@
+# game_logic/coop.py
+"""本地联机合作：两个工位 (两名玩家) 共用一家餐厅的一局，服务器说了算
+
+- 服务器 (CoopServer) 运行完整的游戏逻辑：顾客生成、订单和计时、小费都只在服务器上计算。
+  每个工位有自己的菜板和手持物品 (Station)；处理某个工位的动作时，把它的菜板和手换到
+  game.cutting_b / game.player_h 上，再通过 GameActions 以点击执行，与单人游戏走同一条路径。
+- 客户端只发送动作，每行一个文本 (见 format_action)：
+      start / rice / topping salmon / drink sake / pickup / serve 3
+  服务器在下一个逻辑帧开始时统一执行收到的动作。
+- 服务器按固定频率 (send_rate) 广播状态。状态 = 游戏快照 (snapshot.py，定长二进制)
+  + 每个工位的菜板和手持物品；所有客户端收到同一个字节流，编码开销与客户端数量无关。
+  每次广播与上一次广播的状态按字节异或后做 raw deflate：没变的字节全是 0，
+  标准 3 个顾客位每次广播通常只有十几个字节。新连上的客户端先收到一个完整的关键帧。
+
+帧格式 (服务器 -> 客户端)：FRAME 头 (类型, 逻辑帧号, 负载长度) + 负载
+    HELLO     JSON：分配的工位、工位数、顾客位数量和每行个数、逻辑帧率、广播频率
+    KEYFRAME  deflate(完整状态)
+    DELTA     deflate(状态 XOR 上一次广播的状态)
+
+服务器统计每个逻辑帧的耗时 (逻辑、编码、发送分开) 和每次广播发给每个客户端的字节数，
+用 python -m tools.coop_bench 测量连接很多客户端时的情况。
+"""
+
+import asyncio
+import copy
+import json
+import struct
+import time
+import zlib
+from collections import deque
+
+from config import FPS
+from . import runtime
+from .actions import GameActions
+from .input_pipeline import percentile
+from .snapshot import (
+    HAND_CATEGORIES, SUSHI_KEYS, DRINK_KEYS, TOPPING_KEYS,
+    _board_message, restore_snapshot, snapshot_size, snapshot_tick, take_snapshot,
+)
+from .sushi_elements import PlayerHand
+
+HELLO, KEYFRAME, DELTA = 0, 1, 2
+FRAME = struct.Struct("<BII")      # 类型, 逻辑帧号, 负载长度
+# 菜板有米饭, 菜板配料, 手持类别, 手持物品
+STATION_STRUCT = struct.Struct("<?BBB")
+
+DEFAULT_PORT = 7788
+MAX_ACTIONS_PER_TICK = 8           # 每个客户端每个逻辑帧最多执行的动作数，多余的丢弃
+MAX_WRITE_BUFFER = 256 * 1024      # 客户端积压的未发送数据超过这个量时断开 (跟不上广播)
+COMPRESS_LEVEL = 6
+
+
+# --- 动作的文本格式 ---
+def format_action(action):
+    return " ".join(str(part) for part in action)
+
+
+def parse_action(line):
+    """把一行文本解析为动作元组；格式不对时返回 None (是否有效由服务器对照 GameActions.targets 判断)"""
+    parts = line.split()
+    if not parts:
+        return None
+    if parts[0] == "serve" and len(parts) == 2:
+        try:
+            return ("serve", int(parts[1]))
+        except ValueError:
+            return None
+    return tuple(parts)
+
+
+# --- 状态编码 ---
+def xor_bytes(a, b):
+    """两个等长字节串逐字节异或"""
+    return (int.from_bytes(a, "little") ^ int.from_bytes(b, "little")).to_bytes(len(a), "little")
+
+
+def encode_frame(kind, tick, payload):
+    return FRAME.pack(kind, tick, len(payload)) + payload
+
+
+class Station:
+    """一个工位：自己的菜板和手持物品 (容器、饮品机和顾客是大家共用的)"""
+
+    def __init__(self, index, cutting_board, hand):
+        self.index = index
+        self.cutting_b = cutting_board
+        self.player_h = hand
+
+    def pack(self):
+        hand = self.player_h
+        hand_keys = SUSHI_KEYS if hand.held_item_category == "sushi" else DRINK_KEYS
+        return STATION_STRUCT.pack(self.cutting_b.has_rice, TOPPING_KEYS.index(self.cutting_b.topping_key),
+                                   HAND_CATEGORIES.index(hand.held_item_category),
+                                   hand_keys.index(hand.held_item_key) if hand.is_holding else 0)
+
+
+def unpack_station(game, data, offset):
+    """把状态中一个工位的菜板和手持物品恢复到 game.cutting_b / game.player_h"""
+    has_rice, topping, category, key = STATION_STRUCT.unpack_from(data, offset)
+    board = game.cutting_b
+    board.has_rice = has_rice
+    board.topping_key = TOPPING_KEYS[topping]
+    board.message = _board_message(board)
+    hand = game.player_h
+    hand.drop_item()
+    if HAND_CATEGORIES[category] == "sushi":
+        hand.pickup_sushi(SUSHI_KEYS[key])
+    elif HAND_CATEGORIES[category] == "drink":
+        hand.pickup_drink(DRINK_KEYS[key])
+
+
+class ClientConnection:
+    __slots__ = ("station", "reader", "writer", "actions", "bytes_sent", "dropped_actions")
+
+    def __init__(self, station, reader, writer):
+        self.station = station
+        self.reader = reader
+        self.writer = writer
+        self.actions = deque()
+        self.bytes_sent = 0
+        self.dropped_actions = 0
+
+
+class CoopServer:
+    def __init__(self, game, stations=2, send_rate=20, history=4096):
+        self.game = game
+        self.actions = GameActions(game)
+        # 工位 0 用引擎原来的菜板和手，其余工位各复制一块菜板 (共用图片和位置)
+        self.stations = [Station(0, game.cutting_b, game.player_h)]
+        for index in range(1, stations):
+            board = _copy_board(game.cutting_b)
+            self.stations.append(Station(index, board, PlayerHand()))
+        self.send_every = max(1, round(FPS / send_rate))
+        self.clients = []
+        self._next_station = 0
+        self._server = None
+        self._last_state = None
+        self.running = False
+        # 统计
+        self.ticks = 0
+        self.broadcasts = 0
+        self.actions_applied = 0
+        self.invalid_actions = 0
+        self.dropped_clients = 0
+        self.late_ticks = 0              # 开始时已经落后一个逻辑帧以上的帧数
+        self.tick_ms = deque(maxlen=history)
+        self.logic_ms = deque(maxlen=history)
+        self.encode_ms = deque(maxlen=history)
+        self.send_ms = deque(maxlen=history)
+        self.delta_bytes = deque(maxlen=history)    # 每次广播发给每个客户端的字节数 (含帧头)
+        self.broadcast_bytes = deque(maxlen=history)  # 每次广播发给全部客户端的字节数
+        self.bytes_sent = 0
+
+    # --- 状态 ---
+    def state_size(self):
+        return snapshot_size(len(self.game.customers)) + STATION_STRUCT.size * len(self.stations)
+
+    def _use_station(self, station):
+        self.game.cutting_b = station.cutting_b
+        self.game.player_h = station.player_h
+
+    def encode_state(self):
+        """当前状态：游戏快照 (工位 0 的菜板和手) + 全部工位的菜板和手"""
+        self._use_station(self.stations[0])
+        return take_snapshot(self.game) + b"".join(station.pack() for station in self.stations)
+
+    # --- 连接 ---
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        self.running = True
+        return self._server.sockets[0].getsockname()[1]
+
+    async def _handle_client(self, reader, writer):
+        station = self.stations[self._next_station % len(self.stations)]
+        self._next_station += 1
+        client = ClientConnection(station, reader, writer)
+        game = self.game
+        hello = json.dumps({"station": station.index, "stations": len(self.stations),
+                            "num_spots": game.num_spots, "spot_columns": game.spot_columns,
+                            "tick_rate": FPS, "send_rate": FPS / self.send_every}).encode("utf-8")
+        writer.write(encode_frame(HELLO, runtime.logic_tick, hello))
+        if self._last_state is None:
+            self._last_state = self.encode_state()
+        # 关键帧是上一次广播的状态，之后的增量都相对于它
+        keyframe = zlib.compress(self._last_state, COMPRESS_LEVEL, wbits=-15)
+        writer.write(encode_frame(KEYFRAME, snapshot_tick(self._last_state), keyframe))
+        self.clients.append(client)
+        try:
+            while self.running:
+                line = await reader.readline()
+                if not line:
+                    break
+                action = parse_action(line.decode("utf-8", "replace"))
+                if action is None:
+                    self.invalid_actions += 1
+                elif len(client.actions) >= MAX_ACTIONS_PER_TICK:
+                    client.dropped_actions += 1
+                else:
+                    client.actions.append(action)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._disconnect(client)
+
+    def _disconnect(self, client):
+        if client in self.clients:
+            self.clients.remove(client)
+        client.writer.close()
+
+    # --- 逻辑帧 ---
+    def _apply_actions(self):
+        """按连接顺序执行各客户端在上一个逻辑帧内发来的动作"""
+        targets = self.actions.targets
+        for client in self.clients:
+            if not client.actions:
+                continue
+            self._use_station(client.station)
+            while client.actions:
+                action = client.actions.popleft()
+                if action not in targets:
+                    self.invalid_actions += 1
+                    continue
+                self.actions.perform(action)
+                self.actions_applied += 1
+        self._use_station(self.stations[0])
+
+    def step(self):
+        """执行一个逻辑帧，到了广播的帧就广播状态"""
+        start = time.perf_counter()
+        self._apply_actions()
+        self.game.update_game()
+        runtime.advance_tick()
+        logic_end = time.perf_counter()
+        self.logic_ms.append((logic_end - start) * 1000)
+        self.ticks += 1
+        if runtime.logic_tick % self.send_every == 0:
+            self.broadcast()
+        self.tick_ms.append((time.perf_counter() - start) * 1000)
+
+    def broadcast(self):
+        if not self.clients:
+            self._last_state = None  # 没人连接时不编码，下一个连上的客户端收到当时的关键帧
+            return
+        start = time.perf_counter()
+        state = self.encode_state()
+        if self._last_state is None or len(self._last_state) != len(state):
+            kind, payload = KEYFRAME, zlib.compress(state, COMPRESS_LEVEL, wbits=-15)
+        else:
+            kind, payload = DELTA, zlib.compress(xor_bytes(state, self._last_state), COMPRESS_LEVEL, wbits=-15)
+        self._last_state = state
+        frame = encode_frame(kind, runtime.logic_tick, payload)
+        encoded = time.perf_counter()
+        sent = 0
+        for client in list(self.clients):
+            transport = client.writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                print(f"客户端 (工位 {client.station.index}) 跟不上广播，断开连接")
+                self.dropped_clients += 1
+                self._disconnect(client)
+                continue
+            client.writer.write(frame)
+            client.bytes_sent += len(frame)
+            sent += len(frame)
+        self.encode_ms.append((encoded - start) * 1000)
+        self.send_ms.append((time.perf_counter() - encoded) * 1000)
+        self.delta_bytes.append(len(frame))
+        self.broadcast_bytes.append(sent)
+        self.bytes_sent += sent
+        self.broadcasts += 1
+
+    async def run(self, seconds=None):
+        """按逻辑帧率运行，直到 stop() 或经过 seconds 秒；落后时补帧，落后太多时放弃追赶"""
+        loop = asyncio.get_running_loop()
+        step = 1 / FPS
+        next_tick = loop.time()
+        end = next_tick + seconds if seconds is not None else None
+        while self.running and (end is None or loop.time() < end):
+            self.step()
+            next_tick += step
+            delay = next_tick - loop.time()
+            if delay < -step:
+                self.late_ticks += 1
+                if delay < -0.25:
+                    next_tick = loop.time()
+            await asyncio.sleep(max(0.0, delay))
+
+    async def stop(self):
+        self.running = False
+        for client in list(self.clients):
+            self._disconnect(client)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._use_station(self.stations[0])
+
+    # --- 统计 ---
+    def report(self):
+        tick = sorted(self.tick_ms)
+        delta = sorted(self.delta_bytes)
+        per_second = FPS / self.send_every
+        return {
+            "clients": len(self.clients),
+            "stations": len(self.stations),
+            "ticks": self.ticks,
+            "broadcasts": self.broadcasts,
+            "state_bytes": self.state_size(),
+            "tick_ms": {f"p{p}": round(percentile(tick, p), 3) for p in (50, 90, 99, 100)},
+            "logic_ms_mean": round(sum(self.logic_ms) / max(1, len(self.logic_ms)), 3),
+            "encode_ms_mean": round(sum(self.encode_ms) / max(1, len(self.encode_ms)), 3),
+            "send_ms_mean": round(sum(self.send_ms) / max(1, len(self.send_ms)), 3),
+            "late_ticks": self.late_ticks,
+            "bytes_per_client_per_broadcast": {f"p{p}": percentile(delta, p) for p in (50, 99, 100)},
+            "bytes_per_broadcast_mean": round(sum(self.broadcast_bytes) / max(1, len(self.broadcast_bytes)), 1),
+            "bytes_per_client_per_second": round(sum(delta) / max(1, len(delta)) * per_second, 1),
+            "bytes_sent": self.bytes_sent,
+            "actions_applied": self.actions_applied,
+            "invalid_actions": self.invalid_actions,
+            "dropped_clients": self.dropped_clients,
+        }
+
+    def format_text(self):
+        report = self.report()
+        tick = report["tick_ms"]
+        delta = report["bytes_per_client_per_broadcast"]
+        return (f"联机服务器: {report['clients']} 个客户端, {report['stations']} 个工位, {report['ticks']} 帧, "
+                f"{report['broadcasts']} 次广播; 每帧耗时 p50 {tick['p50']:.3f}ms p99 {tick['p99']:.3f}ms "
+                f"最长 {tick['p100']:.3f}ms (逻辑 {report['logic_ms_mean']:.3f}ms, "
+                f"编码 {report['encode_ms_mean']:.3f}ms, 发送 {report['send_ms_mean']:.3f}ms), "
+                f"落后 {report['late_ticks']} 帧; 状态 {report['state_bytes']} 字节, "
+                f"每次广播每个客户端 p50 {delta['p50']} 字节 p99 {delta['p99']} 字节 "
+                f"({report['bytes_per_client_per_second'] / 1024:.2f} KB/s), "
+                f"全部客户端平均 {report['bytes_per_broadcast_mean'] / 1024:.2f} KB/次; "
+                f"执行 {report['actions_applied']} 个动作, 无效 {report['invalid_actions']} 个")
+
+
+def _copy_board(board):
+    """复制一块空菜板 (共用图片，矩形另外复制)"""
+    board = copy.copy(board)
+    board.rect = board.rect.copy()
+    board.clear()
+    return board
+
+
+class CoopClient:
+    """联机客户端：只发送动作，接收并解码服务器广播的状态"""
+
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.info = None     # 服务器的 HELLO
+        self.state = None    # 最近一次收到的完整状态
+        self.tick = 0
+        self.frames = 0
+        self.bytes_received = 0
+
+    @property
+    def station(self):
+        return self.info["station"]
+
+    async def connect(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        kind = await self.receive()
+        if kind != HELLO:
+            raise ConnectionError("服务器没有先发送 HELLO")
+        return self.info
+
+    async def receive(self):
+        """读入并解码一帧，返回帧类型"""
+        header = await self.reader.readexactly(FRAME.size)
+        kind, tick, length = FRAME.unpack(header)
+        payload = await self.reader.readexactly(length)
+        self.bytes_received += FRAME.size + length
+        if kind == HELLO:
+            self.info = json.loads(payload.decode("utf-8"))
+            return kind
+        data = zlib.decompress(payload, wbits=-15)
+        if kind == DELTA:
+            if self.state is None or len(data) != len(self.state):
+                raise ValueError("收到增量之前没有收到关键帧")
+            data = xor_bytes(data, self.state)
+        if snapshot_tick(data) != tick:
+            raise ValueError(f"解码出的状态帧号 {snapshot_tick(data)} 与帧头 {tick} 不符")
+        self.state = data
+        self.tick = tick
+        self.frames += 1
+        return kind
+
+    def send(self, action):
+        self.writer.write(format_action(action).encode("utf-8") + b"\n")
+
+    def apply_to(self, game):
+        """把最近的状态恢复到本地游戏 (只用于显示)：共用的部分来自快照，菜板和手换成自己工位的，
+        顾客区保持本地的滚动位置"""
+        if self.state is None:
+            return
+        layout = game.spot_layout
+        scroll = (layout.scroll_x, layout.scroll_y)
+        restore_snapshot(game, self.state)
+        layout.scroll_to_offset(*scroll)
+        unpack_station(game, self.state, snapshot_size(len(game.customers)) + STATION_STRUCT.size * self.station)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+
@@ -1,11 +1,12 @@
 # game_logic/customer.py
 
 import pygame
-import random
-import os
-# 从 sushi_elements.py 导入新的 load_gif_frames 函数
-# 或者直接从 game_logic.sushi_elements 导入
-from .sushi_elements import load_gif_frames
+from . import glyph_atlas, quality, runtime  # 字形图集；画质开关；逻辑时钟和随机数生成器
+from .analytics import (
+    EV_SPAWN, EV_SERVE, EV_FULFILL, EV_TIMEOUT, FLAG_SUSHI_OK, FLAG_DRINK_OK, FLAG_SERVED_DRINK,
+)
+from .animation import load_clip  # GIF 动画：只立即解码第一帧，其余帧按需或在后台解码
+from .sushi_elements import load_scaled_image  # 与其他图片共用同一个加载函数 (图集、热重载、卡顿记录)
 from config import (
     SUSHI_TYPES, DRINK_TYPES, CUSTOMER_IMAGES_DIR, UI_IMAGES_DIR, DRINK_IMAGES_DIR, # 添加 DRINK_IMAGES_DIR
     CUSTOMER_WAITING_IMG_FILENAME, CUSTOMER_HAPPY_IMG_FILENAME, CUSTOMER_ANGRY_IMG_FILENAME,
@@ -16,31 +17,16 @@ from config import (
     TIP_PERFECT_ORDER, TIP_PARTIAL_ORDER, TIP_WRONG_ORDER,  # 导入小费常量
     ORDER_DURATION_SECONDS, ORDER_TIMER_ICON_SIZE,  # 新增导入
     ORDER_TIMER_OFFSET_X, ORDER_TIMER_OFFSET_Y, ORDER_TIMER_TEXT_COLOR,  # 新增导入
-    CUSTOMER_ANIMATION_FRAME_DURATION  # 导入动画帧时长
+    CUSTOMER_ANIMATION_FRAME_DURATION,  # 导入动画帧时长
+    CUSTOMER_ANIMATION_PALETTIZED,  # 动画帧是否存成 8 位调色板
+    px,
 )
 
-# 确保 load_scaled_image 在这里可用 (如果它不在 utils.py 中)
-# (load_scaled_image 函数定义保持不变)
-def load_scaled_image(image_filename, size=None, directory=UI_IMAGES_DIR):
-    if not image_filename:
-        return None
-    path = os.path.join(directory, image_filename)
-    try:
-        image = pygame.image.load(path)
-        if image.get_alpha() is None:
-            image = image.convert()
-        else:
-            image = image.convert_alpha()
-        if size:
-            image = pygame.transform.scale(image, size)
-        return image
-    except pygame.error as e:
-        print(f"无法加载或缩放图片 {path}: {e}")
-        return None
-
-
 class Customer:
-    def __init__(self, spot_index, table_spot_rect, preloaded_sushi_images, preloaded_drink_images, order_timer_icon_surface):
+    def __init__(self, spot_index, table_spot_rect, preloaded_sushi_images, preloaded_drink_images, order_timer_icon_surface,
+                 shared=None):
+        # shared: 另一个已加载资源的 Customer；不为 None 时直接共用它的动画帧、气泡图片和字体，
+        # 几百个顾客位时不必每个顾客都解码一遍 GIF
         self.spot_index = spot_index
         self.rect = pygame.Rect((0, 0), CUSTOMER_IMAGE_SIZE)
         self.rect.midbottom = (table_spot_rect.centerx,
@@ -56,57 +42,68 @@ class Customer:
         self.order_timer_start_ticks = None
         self.order_remaining_seconds = ORDER_DURATION_SECONDS
         self.timer_icon_image = order_timer_icon_surface  # 用于订单倒计时
+        self.event_log = None  # 订单事件日志 (analytics.EventLog)，由引擎设置；None 表示不记录
 
         # +++ 动画相关属性 +++
-        self.animation_frames = {  # 存储每个状态的动画帧列表
-            "waiting": load_gif_frames(CUSTOMER_WAITING_IMG_FILENAME, CUSTOMER_IMAGE_SIZE, directory=CUSTOMER_IMAGES_DIR),
-            "happy": load_gif_frames(CUSTOMER_HAPPY_IMG_FILENAME, CUSTOMER_IMAGE_SIZE, directory=CUSTOMER_IMAGES_DIR),
-            "angry": load_gif_frames(CUSTOMER_ANGRY_IMG_FILENAME, CUSTOMER_IMAGE_SIZE, directory=CUSTOMER_IMAGES_DIR),
-        }
         self.current_animation_frame_index = 0
         self.last_animation_update_time = 0
         self.animation_frame_duration = CUSTOMER_ANIMATION_FRAME_DURATION
         self.current_image = None  # 将由动画逻辑更新
 
-        self.order_bubble_image = load_scaled_image(  # 这个是静态图
-            ORDER_BUBBLE_IMG_FILENAME, ORDER_BUBBLE_SIZE, directory=UI_IMAGES_DIR)
-
         self.sushi_item_images = preloaded_sushi_images
         self.drink_item_images = preloaded_drink_images
 
+        if shared is not None:
+            self.animation_frames = shared.animation_frames
+            self.order_bubble_image = shared.order_bubble_image
+            self.small_font = shared.small_font
+            return
+
+        self.animation_frames = {  # 存储每个状态的动画 (AnimationClip，用法与帧列表相同)
+            state: load_clip(filename, CUSTOMER_IMAGE_SIZE, directory=CUSTOMER_IMAGES_DIR,
+                             palettized=CUSTOMER_ANIMATION_PALETTIZED)
+            for state, filename in (("waiting", CUSTOMER_WAITING_IMG_FILENAME),
+                                    ("happy", CUSTOMER_HAPPY_IMG_FILENAME),
+                                    ("angry", CUSTOMER_ANGRY_IMG_FILENAME))
+        }
+
+        self.order_bubble_image = load_scaled_image(  # 这个是静态图
+            ORDER_BUBBLE_IMG_FILENAME, ORDER_BUBBLE_SIZE, directory=UI_IMAGES_DIR)
+
         try:
-            from config import FONTS_DIR, CUSTOM_FONT_FILENAME
-            font_file = os.path.join(FONTS_DIR, CUSTOM_FONT_FILENAME)
-            if not os.path.exists(font_file):
-                font_file = None
-            self.small_font = pygame.font.Font(font_file, SMALL_FONT_SIZE)
+            self.small_font = glyph_atlas.load_font(glyph_atlas.custom_font_path(), SMALL_FONT_SIZE)
         except Exception:
             self.small_font = pygame.font.SysFont(None, SMALL_FONT_SIZE)
 
     def generate_order(self):
         if self.state == "empty":
             # ... (订单生成逻辑不变) ...
-            sushi_key = random.choice(list(SUSHI_TYPES.keys()))
-            drink_key = random.choice(list(DRINK_TYPES.keys()))
+            sushi_key = runtime.rng.choice(list(SUSHI_TYPES.keys()))
+            drink_key = runtime.rng.choice(list(DRINK_TYPES.keys()))
             self.order = {"sushi": sushi_key, "drink": drink_key}
             self.order_fulfilled = False
             self.sushi_received_key = None
             self.drink_received_key = None
             self.departure_timer_start = None
             self.set_state("waiting")  # 这会触发动画的重置
-            self.order_timer_start_ticks = pygame.time.get_ticks()
+            self.order_timer_start_ticks = runtime.get_ticks()
             self.order_remaining_seconds = ORDER_DURATION_SECONDS
+            self._log_event(EV_SPAWN)
             # print(f"顾客 {self.spot_index+1} 点单: {SUSHI_TYPES[sushi_key]['name']} 和 {DRINK_TYPES[drink_key]['name']}. 时限: {self.order_remaining_seconds}s")
             return True
         return False
 
+    def _log_event(self, kind, wait_ms=0, flags=0, tip=0):
+        if self.event_log is not None:
+            self.event_log.append(kind, self.spot_index, self.order, runtime.logic_tick, wait_ms, flags, tip)
+
     def set_state(self, new_state):
         previous_state = self.state
         self.state = new_state
 
         # 重置动画帧索引，以便新状态的动画从头开始
         self.current_animation_frame_index = 0
-        self.last_animation_update_time = pygame.time.get_ticks()  # 重置动画更新时间
+        self.last_animation_update_time = runtime.get_ticks()  # 重置动画更新时间
 
         # 更新当前图像为新状态的第一帧 (如果动画帧存在)
         if self.state in self.animation_frames and self.animation_frames[self.state]:
@@ -115,11 +112,11 @@ class Customer:
             self.current_image = None  # 对于 "empty" 或其他无动画状态
 
         if self.state == "happy":
-            self.departure_timer_start = pygame.time.get_ticks()
+            self.departure_timer_start = runtime.get_ticks()
             self.leave_delay = CUSTOMER_HAPPY_LEAVE_DELAY_MS
             self.order_timer_start_ticks = None
         elif self.state == "angry":
-            self.departure_timer_start = pygame.time.get_ticks()
+            self.departure_timer_start = runtime.get_ticks()
             self.leave_delay = CUSTOMER_ANGRY_LEAVE_DELAY_MS
             self.order_timer_start_ticks = None
 
@@ -134,7 +131,9 @@ class Customer:
                 self.current_image = None  # 或者设置为一个静态占位图
                 return
 
-            if current_ticks - self.last_animation_update_time > self.animation_frame_duration:
+            # 画质降级时动画降速 (见 quality.py)
+            frame_duration = self.animation_frame_duration * quality.settings.animation_slowdown
+            if current_ticks - self.last_animation_update_time > frame_duration:
                 self.last_animation_update_time = current_ticks
                 self.current_animation_frame_index = (
                     self.current_animation_frame_index + 1) % len(frames)
@@ -150,13 +149,17 @@ class Customer:
         current_drink_order = self.order["drink"]
         made_change = False
         tip_earned = 0
+        wait_ms = runtime.get_ticks() - (self.order_timer_start_ticks or 0)
 
         if item_category == "sushi" and not self.sushi_received_key:
             self.sushi_received_key = item_key
             made_change = True
+            self._log_event(EV_SERVE, wait_ms, FLAG_SUSHI_OK if item_key == current_sushi_order else 0)
         elif item_category == "drink" and not self.drink_received_key:
             self.drink_received_key = item_key
             made_change = True
+            self._log_event(EV_SERVE, wait_ms,
+                            FLAG_SERVED_DRINK | (FLAG_DRINK_OK if item_key == current_drink_order else 0))
         else:
             return 0
 
@@ -177,10 +180,13 @@ class Customer:
                 self.set_state("angry")
                 tip_earned = TIP_WRONG_ORDER
                 #print(f"顾客 {self.spot_index+1} 订单完全错误! 获得小费: {tip_earned}")
+            self._log_event(EV_FULFILL, wait_ms,
+                            (FLAG_SUSHI_OK if sushi_correct else 0) | (FLAG_DRINK_OK if drink_correct else 0),
+                            tip_earned)
         return tip_earned
 
     def update(self):
-        current_ticks = pygame.time.get_ticks()
+        current_ticks = runtime.get_ticks()
 
         # +++ 调用动画处理 +++
         self._animate(current_ticks)
@@ -192,6 +198,9 @@ class Customer:
             if self.order_remaining_seconds <= 0:
                 self.order_remaining_seconds = 0
                 #print(f"顾客 {self.spot_index+1} 订单超时!")
+                self._log_event(EV_TIMEOUT, elapsed_order_time_ms,
+                                (FLAG_SUSHI_OK if self.sushi_received_key == self.order["sushi"] else 0) |
+                                (FLAG_DRINK_OK if self.drink_received_key == self.order["drink"] else 0))
                 self.set_state("angry") # 顾客生气
                 self.order_fulfilled = True # 标记订单结束（虽然是失败的）
                 # 生气离开的计时器会在 set_state("angry") 中启动
@@ -214,20 +223,32 @@ class Customer:
         return False
 
 
-    def draw(self, surface):
+    def draw_bounds(self):
+        """顾客图片、订单气泡和计时器可能占据的范围 (世界坐标)，用于顾客区的可见性判断"""
+        bubble = pygame.Rect(self.rect.centerx - ORDER_BUBBLE_SIZE[0] // 2 + ORDER_BUBBLE_OFFSET_X,
+                             self.rect.top + ORDER_BUBBLE_OFFSET_Y, *ORDER_BUBBLE_SIZE)
+        timer_text_width = self.small_font.size(str(ORDER_DURATION_SECONDS))[0] if self.small_font else 0
+        timer = pygame.Rect(self.rect.centerx - ORDER_TIMER_ICON_SIZE[0] // 2 + ORDER_TIMER_OFFSET_X,
+                            self.rect.top - ORDER_TIMER_ICON_SIZE[1] - px(5),
+                            ORDER_TIMER_ICON_SIZE[0] + px(5) + timer_text_width, ORDER_TIMER_ICON_SIZE[1])
+        return self.rect.unionall([bubble, timer])
+
+    def draw(self, surface, offset=(0, 0)):
+        """绘制顾客；offset 为顾客区的滚动偏移 (世界坐标减去 offset 即屏幕坐标)"""
         if self.state == "empty": # 如果是空位，不绘制顾客和订单气泡
             return
+        rect = self.rect.move(-offset[0], -offset[1])
 
         # 绘制顾客 (现在 current_image 会是动画的当前帧)
         if self.current_image:
-            surface.blit(self.current_image, self.rect)
+            surface.blit(self.current_image, rect)
         # 如果状态不是 empty 但没有 current_image (例如GIF加载失败)
         elif self.state != "empty":
             # 可以画一个占位符
-            pygame.draw.rect(surface, (100, 100, 100), self.rect, 2)
+            pygame.draw.rect(surface, (100, 100, 100), rect, px(2))
             if self.small_font:
-                text_surf = self.small_font.render(self.state, True, BLACK)
-                text_rect = text_surf.get_rect(center=self.rect.center)
+                text_surf = self.small_font.render(self.state, quality.settings.text_antialias, BLACK)
+                text_rect = text_surf.get_rect(center=rect.center)
                 surface.blit(text_surf, text_rect)
 
         # --- 订单气泡绘制逻辑 (保持不变) ---
@@ -238,11 +259,11 @@ class Customer:
 
         # 只有在等待状态且有订单时才绘制订单气泡
         if self.state == "waiting" and self.order and self.order_bubble_image:
-            bubble_x = self.rect.centerx - ORDER_BUBBLE_SIZE[0] // 2 + ORDER_BUBBLE_OFFSET_X
-            bubble_y = self.rect.top + ORDER_BUBBLE_OFFSET_Y
+            bubble_x = rect.centerx - ORDER_BUBBLE_SIZE[0] // 2 + ORDER_BUBBLE_OFFSET_X
+            bubble_y = rect.top + ORDER_BUBBLE_OFFSET_Y
             surface.blit(self.order_bubble_image, (bubble_x, bubble_y))
 
-            item_start_x = bubble_x+23
+            item_start_x = bubble_x+px(23)
             item_y_center = bubble_y + ORDER_BUBBLE_SIZE[1] //2
             items_to_draw = []
             
@@ -270,43 +291,41 @@ class Customer:
                     item_name_fallback = DRINK_TYPES.get(
                         item_info["key"], {}).get('name', "饮品")
 
-                if img_to_draw:
-                    img_scaled = pygame.transform.scale(
-                        img_to_draw, ORDER_ITEM_IMAGE_SIZE)
-                    img_rect = img_scaled.get_rect(centery=item_y_center)
+                if img_to_draw:  # 预加载时已是 ORDER_ITEM_IMAGE_SIZE，不必每帧缩放
+                    img_rect = img_to_draw.get_rect(centery=item_y_center)
                     img_rect.left = item_start_x
-                    surface.blit(img_scaled, img_rect)
-                    item_start_x += ORDER_ITEM_IMAGE_SIZE[0] + 5
+                    surface.blit(img_to_draw, img_rect)
+                    item_start_x += ORDER_ITEM_IMAGE_SIZE[0] + px(5)
                 else:
                     text_surf = self.small_font.render(
-                        item_name_fallback, True, BLACK)
+                        item_name_fallback, quality.settings.text_antialias, BLACK)
                     text_rect = text_surf.get_rect(
                         centery=item_y_center, left=item_start_x)
                     surface.blit(text_surf, text_rect)
-                    item_start_x += text_rect.width + 10
+                    item_start_x += text_rect.width + px(10)
 
                 if i < len(items_to_draw) - 1:  # 如果不是最后一个元素，且后面还有元素，则画 "+"
-                    plus_text = self.small_font.render("+", True, BLACK)
+                    plus_text = self.small_font.render("+", quality.settings.text_antialias, BLACK)
                     plus_rect = plus_text.get_rect(
                         centery=item_y_center, left=item_start_x)
                     surface.blit(plus_text, plus_rect)
-                    item_start_x += plus_rect.width + 5
+                    item_start_x += plus_rect.width + px(5)
 
         # +++ 绘制订单计时器 +++
         if self.state == "waiting" and self.order_timer_start_ticks is not None and self.timer_icon_image:
-            timer_icon_x = self.rect.centerx - \
+            timer_icon_x = rect.centerx - \
                 ORDER_TIMER_ICON_SIZE[0] // 2 + ORDER_TIMER_OFFSET_X
             if bubble_drawn:  # 如果有气泡，显示在气泡下方
                 timer_icon_y = bubble_base_y + ORDER_TIMER_OFFSET_Y
             else:  # 如果没有气泡（例如图片加载失败），显示在顾客头顶一个固定偏移处
-                timer_icon_y = self.rect.top - \
-                    ORDER_TIMER_ICON_SIZE[1] - 5  # 气泡上方再往上一点
+                timer_icon_y = rect.top - \
+                    ORDER_TIMER_ICON_SIZE[1] - px(5)  # 气泡上方再往上一点
 
             surface.blit(self.timer_icon_image, (timer_icon_x, timer_icon_y))
 
             time_text = f"{max(0, self.order_remaining_seconds)}"  # 只显示秒
             time_surf = self.small_font.render(
-                time_text, True, ORDER_TIMER_TEXT_COLOR)
-            time_rect = time_surf.get_rect(midleft=(timer_icon_x + ORDER_TIMER_ICON_SIZE[0] + 5,
+                time_text, quality.settings.text_antialias, ORDER_TIMER_TEXT_COLOR)
+            time_rect = time_surf.get_rect(midleft=(timer_icon_x + ORDER_TIMER_ICON_SIZE[0] + px(5),
                                                     timer_icon_y + ORDER_TIMER_ICON_SIZE[1] // 2))
             surface.blit(time_surf, time_rect)
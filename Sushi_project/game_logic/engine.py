@@ -0,0 +1,585 @@
+# game_logic/engine.py
+"""游戏引擎：持有全部游戏状态、资源和子系统
+
+导入本模块没有副作用：不调用 pygame.init()、不打开窗口、不初始化混音器、不读盘。
+但 pygame 模块本身是要导入的：game_logic 的各个模块在模块级就用到 pygame 的常量和类型
+(Rect、事件类型等)，而引擎离不开 pygame，推迟导入只会让第一次调用变慢。
+导入耗时几乎都在 pygame 本身 (python -X importtime：pygame 约 190ms，其中 pygame.pkgdata
+导入 pkg_resources 就占了约 140ms；game_logic 的全部模块加起来约 15ms)。
+不需要 pygame 的纯逻辑模块 (runtime、snapshot、bots) 单独导入时不会导入 pygame。
+子系统按需初始化：
+    init_video()  只有需要渲染到窗口时才调用 (打开显示窗口)
+    init_audio()  audio_enabled 为 True 时才初始化混音器并解码音效；否则只创建静音的 AudioManager
+    load()        加载字体、图片、创建游戏对象；没有显示窗口时图片保持原始像素格式
+GIF 只有在真正解码时才导入 PIL；顾客动画启动时只解码第一帧 (见 animation.py)。
+
+引擎对象的属性名与原来 main.py 的全局变量一致 (total_tips、customers、cutting_b ...)，
+录像回放、快照、机器人等工具都通过这些属性操作游戏。
+"""
+
+import os
+import time
+
+import pygame
+
+from config import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, FPS,
+    BACKGROUND_IMAGES_DIR, UI_IMAGES_DIR, SUSHI_IMAGES_DIR, DRINK_IMAGES_DIR, SOUNDS_DIR,
+    START_BG_IMG, RESTAURANT_BG_IMG, START_BUTTON_IMG, RESET_BUTTON_IMG,
+    GLOBAL_TIMER_ICON_FILENAME, TIMER_ICON_SIZE, ORDER_TIMER_ICON_FILENAME, ORDER_TIMER_ICON_SIZE,
+    TIP_ICON_FILENAME, TIP_ICON_SIZE,
+    CUSTOM_FONT_FILENAME, DEFAULT_FONT_SIZE, LARGE_FONT_SIZE, SMALL_FONT_SIZE,
+    MUSIC_VOLUME, SFX_VOLUME, AUDIO_SFX_CHANNELS, BGM_CROSSFADE_MS, BGM_STOP_FADE_MS, SOUND_EFFECTS,
+    START_SCREEN_BGM, GAME_RUNNING_BGM,
+    RICE_CONTAINER_POS, RICE_CONTAINER_IMG_FILENAME, INGREDIENT_WIDTH, INGREDIENT_HEIGHT,
+    TOPPING_OCTOPUS_POS, TOPPING_SCALLOP_POS, TOPPING_SALMON_POS, TOPPING_TUNA_POS,
+    OCTOPUS_CONTAINER_IMG_FILENAME, SCALLOP_CONTAINER_IMG_FILENAME,
+    SALMON_CONTAINER_IMG_FILENAME, TUNA_CONTAINER_IMG_FILENAME,
+    DRINK_TYPES, DRINK_DISPENSER_WIDTH, DRINK_DISPENSER_HEIGHT,
+    CUTTING_BOARD_POS, CUTTING_BOARD_IMG_WIDTH, CUTTING_BOARD_IMG_HEIGHT, CUTTING_BOARD_IMG_FILENAME,
+    SUSHI_TYPES, ORDER_ITEM_IMAGE_SIZE,
+    CUSTOMER_SPOT_WIDTH, CUSTOMER_SPOT_HEIGHT, NUM_CUSTOMER_SPOTS, CUSTOMER_ANIMATION_PALETTIZED,
+    CUSTOMER_SPOT_ORIGIN, CUSTOMER_SPOT_COLUMNS, CUSTOMER_SPOT_STEP, CUSTOMER_VIEWPORT_RECT, CUSTOMER_SCROLL_STEP,
+    STATE_START_SCREEN, GAME_DURATION_SECONDS, ORDER_DURATION_SECONDS,
+    INITIAL_TARGET_TIPS, TARGET_TIPS_INCREMENT, BASE_DIR, SAVE_FILE_NAME, SAVE_STORE_FILENAME, SAVE_DIR,
+    NEW_CUSTOMER_SPAWN_DELAY_MAX_MS,
+    GC_MANAGEMENT_ENABLED, GC_ROUND_GEN2_THRESHOLD, SNAPSHOT_HISTORY_SECONDS,
+    ANALYTICS_ENABLED, ANALYTICS_MAX_FILE_BYTES, ANALYTICS_MAX_FILES,
+    QUALITY_GOVERNOR_ENABLED, FRAME_BUDGET_MS, QUALITY_SLOW_ANIMATION_FACTOR,
+    ATLAS_ENABLED, ATLAS_DIR, ATLAS_SOURCE_DIRS, ATLAS_SHEET_SIZE, IMAGES_DIR, GLYPH_ATLAS_ENABLED,
+    FLIGHT_RECORDER_ENABLED, FLIGHT_RECORDER_SECONDS, HITCH_THRESHOLD_MS, HITCH_POST_FRAMES,
+    HITCH_COOLDOWN_SECONDS, HITCH_MAX_FILES,
+    LAYOUT_SCALE, START_BUTTON_SIZE, px,
+)
+from . import animation, atlas, glyph_atlas, runtime
+from .analytics import EventLog
+from .audio import AudioManager
+from .customer import Customer
+from .flight_recorder import FlightRecorder
+from .gc_control import GCController
+from .input_pipeline import InputPipeline
+from .memory_report import build_surface_report
+from .quality import QualityGovernor
+from .save_store import SaveStore, resolve_save_dir
+from .scenes import create_scene_manager, scene_for_state
+from .snapshot import SnapshotRing, restore_snapshot, take_snapshot
+from .spot_layout import SpotLayout
+from .sushi_elements import (
+    enable_palette_gif_decoding, load_scaled_image, RiceContainer, ToppingContainer, CuttingBoard, PlayerHand, DrinkDispenser,
+)
+
+
+class GameEngine:
+    def __init__(self, audio_enabled=True, save_enabled=True, profile=None, analytics_dir=None, num_spots=None,
+                 spot_columns=None):
+        self.audio_enabled = audio_enabled
+        # 录像回放等工具会关闭存档，既不读取也不覆盖玩家进度
+        self.progress_saving_enabled = save_enabled
+        self.profile = profile
+        # 订单事件日志目录；None 时游戏本身记录到存档目录下，工具 (关闭存档时) 不记录
+        self.analytics_dir = analytics_dir
+        # 顾客位数量 (默认 NUM_CUSTOMER_SPOTS)；宴会关卡、压力测试可以设置成几百个
+        self.num_spots = NUM_CUSTOMER_SPOTS if num_spots is None else num_spots
+        # 每行顾客位数 (默认 CUSTOMER_SPOT_COLUMNS)；0 表示全部排成一行的长柜台
+        self.spot_columns = CUSTOMER_SPOT_COLUMNS if spot_columns is None else (spot_columns or None)
+        self._spot_columns_arg = spot_columns
+        self.loaded = False
+
+        # 子系统 (按需初始化)
+        self.screen = None
+        self.clock = None
+        self.audio = None
+        self.save_store = None
+        self.event_log = None
+        self.scene_manager = None
+        self.texture_atlas = None
+        self.gc_controller = GCController(round_gen2_threshold=GC_ROUND_GEN2_THRESHOLD,
+                                          enabled=GC_MANAGEMENT_ENABLED)
+        # 状态快照 (每个逻辑帧一个，用于倒带调试)
+        self.snapshot_ring = SnapshotRing(SNAPSHOT_HISTORY_SECONDS * FPS, self.num_spots)
+        # 自适应画质 (只有主循环调用 record_frame_time，工具渲染时始终是最高画质)
+        self.quality_governor = QualityGovernor(FRAME_BUDGET_MS,
+                                                slow_animation_factor=QUALITY_SLOW_ANIMATION_FACTOR,
+                                                enabled=QUALITY_GOVERNOR_ENABLED)
+        # 输入管线 (主循环 install 后才过滤事件队列、追踪点击延迟；工具直接调用 handle_event)
+        self.input_pipeline = InputPipeline(self.input_effect_signature)
+        # 卡顿记录器 (只有主循环 open_flight_recorder，工具不记录)
+        self.flight_recorder = None
+
+        # --- 游戏状态和计时器变量 ---
+        self.current_game_state = STATE_START_SCREEN
+        self.current_level = 1           # load() 时从存档读取
+        self.current_target_tips = 0     # 当前关卡的目标金额，将在 reset_game_state 中设置
+        self.game_start_time = 0         # 游戏开始的时刻 (runtime.get_ticks())
+        self.remaining_time = GAME_DURATION_SECONDS  # 剩余时间（秒）
+        self.total_tips = 0
+        self.game_over_phase = ""        # 用于游戏结束时的阶段控制: "showing_times_up", "showing_result"
+        self.game_over_transition_timer = 0  # 用于 "Time's Up" 显示后的延迟
+        self.result_sound_played = False     # 确保胜利/失败音效只播放一次
+
+    # --- 子系统初始化 ---
+    def init_video(self):
+        """打开显示窗口 (只在需要渲染时调用)；在 load() 之前调用可让图片转换为显示格式"""
+        if self.screen is None:
+            pygame.display.init()
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("我的寿司餐厅")
+            self.clock = pygame.time.Clock()
+        return self.screen
+
+    def init_audio(self):
+        """初始化混音器并加载音效；audio_enabled 为 False 时不碰混音器，只创建静音的 AudioManager"""
+        if self.audio is not None:
+            return self.audio
+        if self.audio_enabled:
+            try:
+                pygame.mixer.init()
+            except pygame.error as e:
+                print(f"无法初始化混音器，音频已禁用: {e}")
+        # 音效在这里解码进注册表；两首背景音乐在后台线程中预先解码，切换时不再读盘
+        self.audio = AudioManager(SOUNDS_DIR, num_channels=AUDIO_SFX_CHANNELS, music_volume=MUSIC_VOLUME,
+                                  sfx_volume=SFX_VOLUME, crossfade_ms=BGM_CROSSFADE_MS, enabled=self.audio_enabled)
+        for sound_name, (sound_file, priority, max_voices) in SOUND_EFFECTS.items():
+            self.audio.load_sound(sound_name, sound_file, priority, max_voices)
+        self.audio.prefetch_music(START_SCREEN_BGM)
+        self.audio.prefetch_music(GAME_RUNNING_BGM)
+        return self.audio
+
+    def render_surface(self):
+        """绘制目标：有窗口时是窗口，否则是一块离屏 Surface"""
+        if self.screen is None:
+            self.screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        return self.screen
+
+    # --- 资源加载 ---
+    def load(self):
+        """加载字体和图片、创建游戏对象 (只执行一次)"""
+        if self.loaded:
+            return self
+        pygame.font.init()
+        if CUSTOMER_ANIMATION_PALETTIZED:
+            enable_palette_gif_decoding()  # Pillow 的进程级设置：在解码任何 GIF 之前设置一次
+        self.init_audio()
+        self.open_save_store()
+        self.open_event_log()
+        self.current_level = self.load_level()  # 游戏启动时加载关卡
+        try:
+            self._load_atlas()
+            self._load_images()
+        except pygame.error as e:  # Pygame 特有的加载错误
+            print(f"Pygame 资源加载错误: {e}")
+            raise SystemExit(1)
+        except FileNotFoundError as e:  # 文件未找到错误
+            print(f"资源文件未找到: {e}")
+            raise SystemExit(1)
+        self._load_fonts()
+        self._create_game_objects()
+        # 开始、游戏中、时间到、结果四个场景；场景根据状态变量自动切换
+        self.scene_manager = create_scene_manager(self)
+        if self._building_atlas:
+            self._build_scaled_atlas()
+        self.scene_manager.preload(scene_for_state(self))
+        animation.decode_pending_in_background()  # 顾客动画除第一帧外的帧在后台解码
+        self.loaded = True
+        return self
+
+    def _load_atlas(self):
+        """读入纹理图集 (需在打开显示窗口之后，图集才能转换为显示格式)；之后的小图从图集中取
+
+        布局缩放不为 1 而这一缩放还没有图集 (或者有源文件改过) 时，记录本次加载的图片，加载完成后重新构建图集，
+        以后启动时直接取缩放好的图片，不再逐个缩放。
+        """
+        self.texture_atlas = atlas.load_atlas(ATLAS_DIR, IMAGES_DIR) if ATLAS_ENABLED else None
+        if self.texture_atlas is not None and self.texture_atlas.stale:
+            if LAYOUT_SCALE == 1:
+                print(self.texture_atlas.format_text())
+            else:
+                # 缩放后的图集是自动生成的缓存：源文件改过就整个重建，而不是每次启动都单独缩放这些图片
+                print(f"布局缩放 {LAYOUT_SCALE:g} 的图集中有 {len(self.texture_atlas.stale)} 个源文件已修改，重新构建")
+                atlas.unload_atlas()
+                self.texture_atlas = None
+        self.glyph_atlas = glyph_atlas.load_glyph_atlas(ATLAS_DIR) if GLYPH_ATLAS_ENABLED else None
+        if self.glyph_atlas is not None and not self.glyph_atlas.matches(glyph_atlas.custom_font_path()):
+            print("字形图集不是用当前的字体构建的，文字改用字体渲染 (请重新运行 python -m tools.build_atlas)")
+        self._building_atlas = (ATLAS_ENABLED and self.texture_atlas is None and LAYOUT_SCALE != 1
+                                and not atlas.is_recording())
+        if self._building_atlas:
+            atlas.start_recording()
+
+    def _build_scaled_atlas(self):
+        """首次以某个布局缩放启动：加载全部场景的资源后，把按缩放后尺寸加载的图片打包成图集"""
+        try:
+            self.scene_manager.load_all()
+        finally:
+            requests = atlas.stop_recording()
+        start = time.perf_counter()
+        try:
+            manifest = atlas.build_atlas(atlas.filter_requests(requests, ATLAS_SOURCE_DIRS),
+                                         ATLAS_DIR, IMAGES_DIR, ATLAS_SHEET_SIZE)
+        except (OSError, pygame.error) as e:
+            print(f"无法写入布局缩放 {LAYOUT_SCALE:g} 的图集，本次按原样运行: {e}")
+            return
+        if GLYPH_ATLAS_ENABLED:
+            glyphs = glyph_atlas.build_default_glyph_atlas(ATLAS_DIR)
+            print(f"已为布局缩放 {LAYOUT_SCALE:g} 构建字形图集 ({len(glyphs['glyphs'])} 个字形)")
+        print(f"已为布局缩放 {LAYOUT_SCALE:g} 构建图集 ({len(manifest['entries'])} 个图片, "
+              f"{time.perf_counter() - start:.2f}s)，下次启动直接使用: {ATLAS_DIR}")
+
+    def _load_images(self):
+        def load_background(filename):
+            # 背景图铺满窗口，不透明；布局缩放不为 1 时缩放后的版本缓存在图集中
+            size = None if LAYOUT_SCALE == 1 else (SCREEN_WIDTH, SCREEN_HEIGHT)
+            image = load_scaled_image(filename, size, directory=BACKGROUND_IMAGES_DIR, opaque=True)
+            if image is None:
+                raise FileNotFoundError(os.path.join(BACKGROUND_IMAGES_DIR, filename))
+            return image
+
+        self.start_background_image = load_background(START_BG_IMG)
+        self.restaurant_background_image = load_background(RESTAURANT_BG_IMG)
+        self.start_button_image = load_scaled_image(START_BUTTON_IMG, START_BUTTON_SIZE, directory=UI_IMAGES_DIR)
+        if self.start_button_image is None:
+            raise FileNotFoundError(os.path.join(UI_IMAGES_DIR, START_BUTTON_IMG))
+        self.start_button_rect = self.start_button_image.get_rect()
+        self.reset_button_image = load_scaled_image(RESET_BUTTON_IMG, self.start_button_image.get_size(),
+                                                    directory=UI_IMAGES_DIR)
+        self.reset_button_rect = self.reset_button_image.get_rect() if self.reset_button_image \
+            else pygame.Rect(0, 0, 0, 0)
+        # --- 按钮位置 ---
+        self.start_button_rect.centerx = SCREEN_WIDTH // 4
+        self.start_button_rect.centery = SCREEN_HEIGHT // 2 + px(220)
+        self.reset_button_rect.centerx = 3 * SCREEN_WIDTH // 4
+        self.reset_button_rect.centery = SCREEN_HEIGHT // 2 + px(220)
+
+        # 全局计时器图标
+        self.global_timer_icon_image = load_scaled_image(
+            GLOBAL_TIMER_ICON_FILENAME, TIMER_ICON_SIZE, directory=UI_IMAGES_DIR)
+        # 订单计时器图标 (传递给顾客)
+        self.customer_order_timer_icon = load_scaled_image(
+            ORDER_TIMER_ICON_FILENAME, ORDER_TIMER_ICON_SIZE, directory=UI_IMAGES_DIR)
+        # 小费图片 (时间到、胜利、失败图片由对应场景在后台预加载)
+        self.tip_icon_image = load_scaled_image(TIP_ICON_FILENAME, TIP_ICON_SIZE, directory=UI_IMAGES_DIR)
+
+    def _load_fonts(self):
+        # 字形图集中有的字号不打开字体文件，文字由字形拼出 (见 glyph_atlas.py)
+        try:
+            font_file_path = glyph_atlas.custom_font_path()
+            if font_file_path is None:
+                print(f"警告: 自定义字体 '{CUSTOM_FONT_FILENAME}' 未找到。将使用系统字体。")
+            self.custom_font = glyph_atlas.load_font(font_file_path, DEFAULT_FONT_SIZE)
+            self.custom_font_large = glyph_atlas.load_font(font_file_path, LARGE_FONT_SIZE)
+            self.small_font = glyph_atlas.load_font(font_file_path, SMALL_FONT_SIZE)
+        except Exception as e:
+            print(f"加载自定义字体失败: {e}. 使用系统字体。")
+            self.custom_font = pygame.font.SysFont(None, DEFAULT_FONT_SIZE)
+            self.custom_font_large = pygame.font.SysFont(None, LARGE_FONT_SIZE)
+            self.small_font = pygame.font.SysFont(None, SMALL_FONT_SIZE)
+
+    def _create_game_objects(self, shared_customer=None):
+        self.interactive_elements = []  # 所有可点击的元素
+
+        # 米饭容器
+        self.rice_cont = RiceContainer(RICE_CONTAINER_POS, (INGREDIENT_WIDTH, INGREDIENT_HEIGHT),
+                                       RICE_CONTAINER_IMG_FILENAME)
+        self.interactive_elements.append(self.rice_cont)
+
+        # 配料容器
+        topping_configs = {
+            "octopus": {"pos": TOPPING_OCTOPUS_POS, "img_file": OCTOPUS_CONTAINER_IMG_FILENAME},
+            "scallop": {"pos": TOPPING_SCALLOP_POS, "img_file": SCALLOP_CONTAINER_IMG_FILENAME},
+            "salmon": {"pos": TOPPING_SALMON_POS, "img_file": SALMON_CONTAINER_IMG_FILENAME},
+            "tuna": {"pos": TOPPING_TUNA_POS, "img_file": TUNA_CONTAINER_IMG_FILENAME},
+        }
+        for key, config_val in topping_configs.items():
+            self.interactive_elements.append(ToppingContainer(
+                key, config_val["pos"], (INGREDIENT_WIDTH, INGREDIENT_HEIGHT), config_val["img_file"]))
+
+        # 饮品机
+        self.drink_dispensers = []
+        for drink_key, drink_data in DRINK_TYPES.items():
+            dispenser = DrinkDispenser(
+                drink_key,
+                drink_data["dispenser_pos"],
+                (DRINK_DISPENSER_WIDTH, DRINK_DISPENSER_HEIGHT),
+                drink_data["dispenser_img"]  # 使用 config.py 中为饮品机定义的图片
+            )
+            self.drink_dispensers.append(dispenser)
+            self.interactive_elements.append(dispenser)
+
+        # 菜板 (不是 ClickableElement，但它的 rect 用于检测点击)
+        self.cutting_b = CuttingBoard(CUTTING_BOARD_POS, (CUTTING_BOARD_IMG_WIDTH, CUTTING_BOARD_IMG_HEIGHT),
+                                      CUTTING_BOARD_IMG_FILENAME)
+        # 玩家手持物品状态
+        self.player_h = PlayerHand()
+
+        # --- 预加载订单气泡用的寿司和饮品图片 ---
+        self.preloaded_sushi_images_for_order = {}
+        for key, data in SUSHI_TYPES.items():
+            img = load_scaled_image(data["image_file"], ORDER_ITEM_IMAGE_SIZE, directory=SUSHI_IMAGES_DIR)
+            if img:
+                self.preloaded_sushi_images_for_order[key] = img
+            else:
+                print(f"警告: 寿司图片 '{data['image_file']}' 加载失败，用于订单 {key}")
+
+        self.preloaded_drink_images_for_order = {}
+        for key, data in DRINK_TYPES.items():
+            img = load_scaled_image(data.get("image_file"), ORDER_ITEM_IMAGE_SIZE, directory=DRINK_IMAGES_DIR)
+            if img:
+                self.preloaded_drink_images_for_order[key] = img
+            else:
+                print(f"警告: 饮品图片 '{data.get('image_file')}' 加载失败，用于订单 {key}")
+
+        # --- 顾客区 (网格布局，可滚动；顾客位矩形是世界坐标，见 spot_layout.py) ---
+        self.spot_layout = SpotLayout(self.num_spots, self.spot_columns, CUSTOMER_SPOT_ORIGIN, CUSTOMER_SPOT_STEP,
+                                      (CUSTOMER_SPOT_WIDTH, CUSTOMER_SPOT_HEIGHT), CUSTOMER_VIEWPORT_RECT,
+                                      scroll_step=CUSTOMER_SCROLL_STEP, padding=px(20))
+        self.customer_spot_rects = self.spot_layout.spot_rects
+        self.customers = []
+        for i in range(self.num_spots):
+            self.customers.append(Customer(
+                i,
+                self.customer_spot_rects[i],
+                self.preloaded_sushi_images_for_order,
+                self.preloaded_drink_images_for_order,
+                self.customer_order_timer_icon,
+                # 所有顾客共用一份动画帧 (重建时可以沿用旧顾客的)
+                shared=self.customers[0] if self.customers else shared_customer,
+            ))
+            self.customers[i].event_log = self.event_log
+        if self.customers:
+            spot = self.customer_spot_rects[0]
+            bounds = self.customers[0].draw_bounds().union(spot)
+            self.spot_layout.set_margin((spot.left - bounds.left, spot.top - bounds.top,
+                                         bounds.right - spot.right, bounds.bottom - spot.bottom))
+        self.last_customer_spawn_time = {i: 0 for i in range(self.num_spots)}  # 0 确保游戏开始时可以生成
+
+    def rebuild_objects(self, reuse_customer_assets=True):
+        """按 (热重载后的) config 重新加载图片和字体、重新创建游戏对象，本局状态原样保留
+
+        状态先存成快照，重建后再恢复 (与倒带用的是同一套快照)；
+        reuse_customer_assets 为 True 时新顾客沿用旧顾客的动画帧、气泡和字体，不再解码 GIF。
+        """
+        state = take_snapshot(self)
+        shared = self.customers[0] if self.customers and reuse_customer_assets else None
+        if self._spot_columns_arg is None:
+            self.spot_columns = CUSTOMER_SPOT_COLUMNS
+        self._load_images()
+        self._load_fonts()
+        self._create_game_objects(shared_customer=shared)
+        restore_snapshot(self, state)
+        self.scene_manager.reload_resources()
+
+    # --- 存档 ---
+    def open_save_store(self):
+        """打开存档 (关闭存档时不读盘)；写入都在后台线程中进行"""
+        if not self.progress_saving_enabled or self.save_store is not None:
+            return self.save_store
+        save_dir = resolve_save_dir(SAVE_DIR, BASE_DIR)
+        self.save_store = SaveStore(os.path.join(save_dir, SAVE_STORE_FILENAME),
+                                    legacy_paths=[os.path.join(BASE_DIR, SAVE_FILE_NAME), SAVE_FILE_NAME])
+        if self.profile:
+            self.save_store.select_profile(self.profile)
+        print(f"存档: {self.save_store.path} (档案: {self.save_store.active_profile})")
+        return self.save_store
+
+    def save_level(self, level):
+        """保存当前档案的关卡数 (不阻塞，由后台线程写盘)"""
+        if self.progress_saving_enabled and self.save_store is not None:
+            self.save_store.set_level(level)
+
+    def load_level(self):
+        """当前档案的关卡数；没有存档时从第一关开始"""
+        if self.save_store is None:
+            return 1
+        return self.save_store.level
+
+    def record_round(self, level, tips):
+        """记录一局的小费，刷新该关最高小费时打印提示"""
+        if self.progress_saving_enabled and self.save_store is not None:
+            if self.save_store.record_round(level, tips):
+                print(f"第 {level} 关新纪录: {tips} 小费")
+
+    # --- 订单事件日志 ---
+    def open_event_log(self):
+        if self.event_log is not None:
+            return self.event_log
+        directory = self.analytics_dir
+        if directory is None and self.progress_saving_enabled and ANALYTICS_ENABLED:
+            directory = os.path.join(resolve_save_dir(SAVE_DIR, BASE_DIR), "analytics")
+        if directory is not None:
+            self.event_log = EventLog(directory, ANALYTICS_MAX_FILE_BYTES, ANALYTICS_MAX_FILES)
+        return self.event_log
+
+    def log_round_end(self):
+        """一局结束时记录整局小费并把缓冲的事件写盘"""
+        if self.event_log is not None:
+            self.event_log.round_end(runtime.logic_tick, self.total_tips,
+                                     self.total_tips >= self.current_target_tips)
+
+    # --- 卡顿记录器 ---
+    def open_flight_recorder(self, directory=None):
+        """开始记录每帧的数据；directory 为 None 时写在存档目录的 hitches 子目录 (关闭存档时不记录)"""
+        if self.flight_recorder is not None:
+            return self.flight_recorder
+        if directory is None and self.progress_saving_enabled and FLIGHT_RECORDER_ENABLED:
+            directory = os.path.join(resolve_save_dir(SAVE_DIR, BASE_DIR), "hitches")
+        if directory is not None:
+            self.flight_recorder = FlightRecorder(self, directory, FLIGHT_RECORDER_SECONDS, FPS, HITCH_THRESHOLD_MS,
+                                                  HITCH_POST_FRAMES, HITCH_COOLDOWN_SECONDS, HITCH_MAX_FILES)
+            self.flight_recorder.start()
+        return self.flight_recorder
+
+    def get_customer_at_spot(self, spot_index):
+        if 0 <= spot_index < len(self.customers):
+            return self.customers[spot_index]
+        return None
+
+    # --- BGM ---
+    def play_bgm(self, bgm_filename, loops=-1):
+        """播放指定的背景音乐 (已在播放时不操作)，与当前音乐交叉淡入淡出"""
+        self.audio.play_music(bgm_filename, loops)
+
+    def stop_bgm(self):
+        """淡出并停止当前播放的背景音乐"""
+        self.audio.stop_music(BGM_STOP_FADE_MS)
+        print("背景音乐已停止。")
+
+    # --- 一局的生命周期 ---
+    def reset_game_state(self):
+        """重置游戏到当前关卡的初始状态"""
+        # 根据当前关卡计算目标金额
+        self.current_target_tips = INITIAL_TARGET_TIPS + (self.current_level - 1) * TARGET_TIPS_INCREMENT
+        self.game_start_time = runtime.get_ticks()
+        self.remaining_time = GAME_DURATION_SECONDS
+        self.total_tips = 0
+        self.game_over_phase = ""
+        self.game_over_transition_timer = 0
+        self.result_sound_played = False
+        self.player_h.drop_item()
+        self.cutting_b.clear()
+        current_ticks = runtime.get_ticks()
+        for i, customer in enumerate(self.customers):
+            customer.state = "empty"
+            customer.order = None
+            customer.order_fulfilled = False
+            customer.sushi_received_key = None
+            customer.drink_received_key = None
+            customer.departure_timer_start = None
+            customer.order_timer_start_ticks = None
+            customer.order_remaining_seconds = ORDER_DURATION_SECONDS
+            customer.current_animation_frame_index = 0
+            customer.current_image = None
+            self.last_customer_spawn_time[i] = current_ticks - \
+                runtime.rng.randint(0, NEW_CUSTOMER_SPAWN_DELAY_MAX_MS // 2)
+        if self.event_log is not None:
+            self.event_log.begin_round(self.current_level)
+        self.gc_controller.begin_round()  # 本局内推迟完整回收，并开始统计回收暂停
+
+    def finish_round_gc(self):
+        """一局结束 ("时间到" 画面) 时：恢复回收阈值、打印本局统计，并趁过渡画面显式回收"""
+        round_stats = self.gc_controller.end_round()
+        collect_ms = self.gc_controller.collect_in_transition()
+        if self.gc_controller.enabled:
+            print(f"{round_stats.format_text()}; 过渡画面回收耗时 {collect_ms:.2f}ms")
+
+    def begin_session(self, seed, level=None):
+        """开始一段可复现的会话：设置随机种子、把逻辑时钟拨回第 0 帧并回到开始界面"""
+        runtime.seed(seed)
+        if self.event_log is not None:
+            self.event_log.begin_session(seed)
+        if level is not None:
+            self.current_level = level
+        self.current_game_state = STATE_START_SCREEN
+        self.total_tips = 0
+        self.game_over_phase = ""
+        self.game_over_transition_timer = 0
+        self.result_sound_played = False
+        self.spot_layout.scroll_to_offset(0, 0)
+
+    # --- 每帧调用 ---
+    def handle_event(self, event):
+        """处理一个输入事件；返回 False 表示玩家要求退出。
+
+        点击位置取自 event.pos，因此录像回放和自动化工具可以直接送入合成事件。
+        """
+        if event.type == pygame.QUIT:
+            return False
+
+        # 按 F2 随时打印 Surface 内存报告
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F2:
+            self.print_memory_report()
+
+        # 鼠标滚轮滚动顾客区 (会影响点击命中哪个顾客位，录像中也会记录)
+        if event.type == pygame.MOUSEWHEEL:
+            self.spot_layout.scroll_wheel(event.x, event.y)
+
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self.input_pipeline.trace_click()
+            self.audio.play("click")
+            self.scene_manager.handle_click(event.pos)
+            self.input_pipeline.click_handled()
+        return True
+
+    def input_effect_signature(self):
+        """点击可能改变的、画面上看得到的状态 (输入管线比较点击处理前后的差别，判断点击有没有效果)"""
+        return {
+            "菜板": (self.cutting_b.has_rice, self.cutting_b.topping_key),
+            "手持": (self.player_h.held_item_category, self.player_h.held_item_key),
+            "小费": self.total_tips,
+            "顾客": tuple((c.sushi_received_key, c.drink_received_key) for c in self.customers),
+            "界面": self.current_game_state,
+        }
+
+    def update_game(self):
+        """游戏逻辑更新 (每个逻辑帧调用一次)"""
+        self.scene_manager.update(runtime.get_ticks())
+
+    def draw_frame(self, surface, mouse_pos):
+        """根据当前游戏状态把完整的一帧绘制到 surface 上 (不翻转显示)"""
+        self.scene_manager.draw(surface, mouse_pos)
+
+    def record_frame_time(self, frame_ms, phase_ms=None, logic_steps=0):
+        """主循环每帧调用：把这一帧的耗时交给画质调节器和卡顿记录器
+        (phase_ms 是事件处理、游戏逻辑、绘制、显示翻转各阶段的耗时)"""
+        if self.flight_recorder is not None:
+            self.flight_recorder.record_frame(frame_ms, phase_ms, logic_steps)
+        level = self.quality_governor.record_frame(frame_ms)
+        if level is not None:
+            print(f"画质调整为 {level} 级 ({self.quality_governor.level_name}), "
+                  f"最近平均帧耗时 {self.quality_governor.average_ms:.1f}ms")
+        return level
+
+    def rewind(self, seconds):
+        """倒带到若干秒之前的状态 (订单事件日志中倒带点之后的记录一并丢弃)；返回恢复到的逻辑帧号"""
+        tick = self.snapshot_ring.rewind(self, seconds * FPS)
+        if tick is not None:
+            if self.event_log is not None:
+                self.event_log.rewind_to(tick)
+            print(f"已倒带到第 {tick} 帧")
+        return tick
+
+    # --- Surface 内存报告 ---
+    def print_memory_report(self):
+        """遍历当前所有存活的 Surface，打印按所有者和类别统计的内存报告"""
+        report = build_surface_report({"engine": self})
+        print(report.format_text())
+        return report
+
+    def shutdown(self):
+        if self.scene_manager is not None:
+            self.scene_manager.shutdown()
+        animation.shutdown()
+        if self.audio is not None:
+            self.audio.shutdown()
+        if self.save_store is not None:
+            self.save_store.close()
+        if self.event_log is not None:
+            self.event_log.close()
+        self.gc_controller.shutdown()
+        if self.flight_recorder is not None:
+            self.flight_recorder.stop()
+            if self.flight_recorder.hitches:
+                print(self.flight_recorder.format_text())
+        if self.quality_governor.downgrades:
+            print(self.quality_governor.format_text())
+        if self.input_pipeline.clicks:
+            print(self.input_pipeline.format_text())
@@ -0,0 +1,297 @@
+# game_logic/flight_recorder.py
+"""卡顿记录器：环形缓冲区始终保存最近几秒每帧的数据，出现卡顿时连同推断的原因写到磁盘
+
+每帧 (主循环调用 GameEngine.record_frame_time) 记录一条：
+    两帧之间的间隔、本帧工作耗时和各阶段 (事件处理、游戏逻辑、绘制、显示翻转) 的耗时、执行的逻辑帧数，
+    本帧内发生的垃圾回收 (代、耗时)、资源加载 (load_scaled_image 从磁盘加载的图片、GIF、打开的字体，
+    以及它们是否在主线程)、背景音乐解码 (audio.music_load_ms 中新出现的条目)、
+    存档写盘 (save_store.write_count 的增量和 last_write_ms)、场景切换时等待预加载的次数、画质级别。
+两帧间隔超过阈值时，再记录 HITCH_POST_FRAMES 帧 (报告中能看到恢复过程)，
+然后把整个缓冲区写成一个 JSON 报告 (后台线程写盘，不再拖慢游戏)，并按本帧的数据推断最可能的原因。
+无人值守的机器上出现卡顿后，把存档目录下 hitches 子目录中的报告取回来，
+用 python -m tools.hitch_report 汇总。
+
+资源加载由加载函数调用 note_load() 报告给当前的记录器 (模块级变量，与 runtime 模块的做法相同)，
+没有记录器时 note_load 什么也不做。
+"""
+
+import gc
+import json
+import os
+import platform
+import threading
+import time
+from collections import deque
+
+import pygame
+
+from . import runtime
+from .save_store import write_atomic
+
+REPORT_VERSION = 1
+REPORT_PREFIX = "hitch-"
+REPORT_SUFFIX = ".json"
+
+# 每帧一条记录 (元组，字段顺序如下；写报告时原样写成列表，字段名单独写一次)
+FIELDS = ("frame", "tick", "interval_ms", "frame_ms", "stall_ms", "events_ms", "logic_ms", "draw_ms", "present_ms",
+          "logic_steps", "gc", "loads", "music", "save_writes", "save_write_ms", "preload_waits", "quality_level")
+PHASES = ("events", "logic", "draw", "present")
+PHASE_NAMES = {"events": "事件处理", "logic": "游戏逻辑", "draw": "绘制", "present": "显示翻转"}
+# 直接占用主线程时间的原因；后台线程的工作 (音乐解码、存档写盘、后台加载) 只在单核或 CPU 紧张时拖慢主线程
+DIRECT_CAUSES = ("gc", "load", "preload_wait")
+
+_recorder = None
+
+
+def note_load(kind, name, duration_ms):
+    """资源加载函数调用：把一次加载报告给当前的记录器 (kind: image / gif / font)"""
+    recorder = _recorder
+    if recorder is not None:
+        recorder.add_load(kind, name, duration_ms)
+
+
+def diagnose(record, fps):
+    """根据一帧的记录推断卡顿原因：返回按耗时从大到小排列的候选 [{"kind", "cause", "ms"}]
+    和最可能的原因 (文字)"""
+    frame = dict(zip(FIELDS, record))
+    candidates = []
+
+    def add(kind, cause, ms):
+        candidates.append({"kind": kind, "cause": cause, "ms": round(ms, 2)})
+
+    if frame["gc"]:
+        generation = max(gen for gen, _, _ in frame["gc"])
+        add("gc", f"垃圾回收 (最高第{generation}代, {len(frame['gc'])} 次)", sum(ms for _, ms, _ in frame["gc"]))
+    main_loads = [load for load in frame["loads"] if load[3]]
+    if main_loads:
+        names = ", ".join(name for _, name, _, _ in main_loads[:3])
+        add("load", f"主线程加载资源 {len(main_loads)} 个 ({names})", sum(load[2] for load in main_loads))
+    if frame["preload_waits"]:
+        add("preload_wait", "场景切换时资源尚未预加载完，主线程等待", frame["logic_ms"])
+    background_loads = [load for load in frame["loads"] if not load[3]]
+    if background_loads:
+        names = ", ".join(name for _, name, _, _ in background_loads[:3])
+        add("background_load", f"后台线程加载资源 ({names})", sum(load[2] for load in background_loads))
+    for name, ms in frame["music"]:
+        add("music", f"后台线程解码背景音乐 {name}", ms)
+    if frame["save_writes"]:
+        add("save", f"存档写盘 {frame['save_writes']} 次", frame["save_write_ms"])
+    if frame["logic_steps"] > 1:
+        add("catch_up", f"逻辑帧追赶 (一帧内执行 {frame['logic_steps']} 个逻辑帧)", frame["logic_ms"])
+    if frame["stall_ms"] > 1:
+        add("stall", "帧与帧之间的停顿 (进程未被调度、窗口被拖动或系统休眠)", frame["stall_ms"])
+    phase = max(PHASES, key=lambda name: frame[f"{name}_ms"])
+    add(f"phase:{phase}", f"{PHASE_NAMES[phase]}耗时", frame[f"{phase}_ms"])
+    candidates.sort(key=lambda candidate: -candidate["ms"])
+
+    # 具体原因 (GC、加载、后台工作) 能解释超出部分的三成以上时优先报告它，否则报告最慢的阶段或停顿
+    excess_ms = max(1.0, frame["interval_ms"] - 1000 / fps)
+    specific = [c for c in candidates if not c["kind"].startswith("phase:") and c["kind"] != "stall"]
+    direct = [c for c in specific if c["kind"] in DIRECT_CAUSES]
+    for group in (direct, specific):
+        if group and group[0]["ms"] >= excess_ms * 0.3:
+            return group[0]["cause"], candidates
+    return candidates[0]["cause"], candidates
+
+
+class FlightRecorder:
+    def __init__(self, game, directory, seconds, fps, threshold_ms, post_frames=30, cooldown_seconds=10,
+                 max_files=20, warmup_frames=None):
+        self.game = game
+        self.directory = directory
+        self.fps = fps
+        self.threshold_ms = threshold_ms
+        self.post_frames = post_frames
+        self.cooldown_seconds = cooldown_seconds
+        self.max_files = max_files
+        # 启动后的第一秒 (第一次绘制、场景进入) 不检测
+        self.warmup_frames = fps if warmup_frames is None else warmup_frames
+        self.frames = deque(maxlen=int(seconds * fps) + post_frames)
+        self.frame_count = 0
+        self.hitches = 0
+        self.reports = []           # 已写出的报告路径
+        self._last_end = None
+        self._last_frame_ms = 0.0
+        self._pending = None        # 等待写盘的卡顿 (卡顿帧的记录和推断的原因)
+        self._pending_frames = 0
+        self._cooldown_until = 0.0
+        self._gc_start = None
+        self._gc_events = []        # 本帧的 (代, 耗时, 回收的对象数)
+        self._loads = []            # 本帧的 (类型, 名字, 耗时, 是否主线程)
+        self._loads_lock = threading.Lock()
+        self._music_seen = {}
+        self._save_writes = 0
+        self._preload_waits = 0
+        self._writers = []
+
+    # --- 开始、停止 ---
+    def start(self):
+        global _recorder
+        self._music_seen = dict(self._music_load_ms())
+        self._save_writes = self._save_write_count()
+        self._preload_waits = self._preload_wait_count()
+        gc.callbacks.append(self._on_gc)
+        _recorder = self
+
+    def stop(self):
+        """停止记录，等待还在写的报告写完"""
+        global _recorder
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        if _recorder is self:
+            _recorder = None
+        for writer in self._writers:
+            writer.join()
+        self._writers.clear()
+
+    # --- 数据来源 ---
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_start = time.perf_counter()
+        elif phase == "stop" and self._gc_start is not None:
+            self._gc_events.append((info.get("generation", 0),
+                                    round((time.perf_counter() - self._gc_start) * 1000, 3),
+                                    info.get("collected", 0)))
+            self._gc_start = None
+
+    def add_load(self, kind, name, duration_ms):
+        on_main_thread = threading.current_thread() is threading.main_thread()
+        with self._loads_lock:
+            self._loads.append((kind, name, round(duration_ms, 3), on_main_thread))
+
+    def _music_load_ms(self):
+        audio = self.game.audio
+        return list(audio.music_load_ms.items()) if audio is not None else []
+
+    def _save_write_count(self):
+        store = self.game.save_store
+        return store.write_count if store is not None else 0
+
+    def _preload_wait_count(self):
+        manager = self.game.scene_manager
+        return manager.preload_waits if manager is not None else 0
+
+    # --- 每帧 ---
+    def record_frame(self, frame_ms, phase_ms=None, logic_steps=0):
+        """主循环每帧调用一次：frame_ms 是本帧工作耗时，phase_ms 是 (事件, 逻辑, 绘制, 显示翻转) 各阶段耗时"""
+        now = time.perf_counter()
+        interval_ms = (now - self._last_end) * 1000 if self._last_end is not None else frame_ms
+        self._last_end = now
+        # 间隔 = 上一帧之后的等待 + 本帧工作；等待中超出 clock.tick 正常等待时间的部分是进程没有被调度
+        stall_ms = max(0.0, interval_ms - frame_ms - max(0.0, 1000 / self.fps - self._last_frame_ms))
+        self._last_frame_ms = frame_ms
+        self.frame_count += 1
+
+        gc_events, self._gc_events = self._gc_events, []
+        with self._loads_lock:
+            loads, self._loads = self._loads, []
+        music = []
+        for name, ms in self._music_load_ms():
+            if self._music_seen.get(name) != ms:
+                self._music_seen[name] = ms
+                music.append((name, round(ms, 3)))
+        save_count = self._save_write_count()
+        save_writes, self._save_writes = save_count - self._save_writes, save_count
+        preload_count = self._preload_wait_count()
+        preload_waits, self._preload_waits = preload_count - self._preload_waits, preload_count
+        store = self.game.save_store
+        phases = [round(ms, 3) for ms in phase_ms] if phase_ms is not None else [0.0] * len(PHASES)
+        record = (self.frame_count, runtime.logic_tick, round(interval_ms, 3), round(frame_ms, 3), round(stall_ms, 3), *phases,
+                  logic_steps, gc_events, loads, music, save_writes,
+                  round(store.last_write_ms, 3) if save_writes and store is not None else 0.0,
+                  preload_waits, self.game.quality_governor.level)
+        self.frames.append(record)
+
+        if self._pending is not None:
+            if interval_ms > self.threshold_ms:
+                self.hitches += 1
+                self._pending.append(self._describe(record))  # 同一份报告中的后续卡顿
+            self._pending_frames -= 1
+            if self._pending_frames <= 0:
+                self._dump(now)
+        elif interval_ms > self.threshold_ms and self.frame_count > self.warmup_frames:
+            self.hitches += 1
+            if now >= self._cooldown_until:
+                self._pending = [self._describe(record)]
+                self._pending_frames = self.post_frames
+                if self._pending_frames <= 0:
+                    self._dump(now)
+
+    def _describe(self, record):
+        cause, candidates = diagnose(record, self.fps)
+        frame = dict(zip(FIELDS, record))
+        return {"frame": frame["frame"], "tick": frame["tick"], "interval_ms": frame["interval_ms"],
+                "frame_ms": frame["frame_ms"], "likely_cause": cause, "candidates": candidates}
+
+    # --- 写报告 ---
+    def _context(self):
+        game = self.game
+        return {
+            "level": game.current_level,
+            "state": game.current_game_state,
+            "num_spots": game.num_spots,
+            "quality": game.quality_governor.telemetry(),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+        }
+
+    def _dump(self, now):
+        hitches, self._pending = self._pending, None
+        self._cooldown_until = now + self.cooldown_seconds
+        report = {
+            "version": REPORT_VERSION,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "fps": self.fps,
+            "threshold_ms": self.threshold_ms,
+            "hitches": hitches,
+            "context": self._context(),
+            "fields": FIELDS,
+            "frames": list(self.frames),
+        }
+        first = hitches[0]
+        name = f"{REPORT_PREFIX}{time.strftime('%Y%m%d-%H%M%S')}-{first['frame']}{REPORT_SUFFIX}"
+        path = os.path.join(self.directory, name)
+        print(f"卡顿: 两帧间隔 {first['interval_ms']:.0f}ms (第 {first['frame']} 帧), "
+              f"可能原因: {first['likely_cause']}; 报告写入 {path}")
+        self._writers = [writer for writer in self._writers if writer.is_alive()]
+        writer = threading.Thread(target=self._write, args=(path, report), name="hitch-writer", daemon=True)
+        writer.start()
+        self._writers.append(writer)
+        self.reports.append(path)
+
+    def _write(self, path, report):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            write_atomic(path, json.dumps(report, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        except OSError as e:
+            print(f"无法写入卡顿报告 {path}: {e}")
+            return
+        for old in list_reports(self.directory)[:-self.max_files]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    def format_text(self):
+        return (f"卡顿记录器: {self.frame_count} 帧, {self.hitches} 次卡顿 (两帧间隔超过 {self.threshold_ms:.0f}ms), "
+                f"写出 {len(self.reports)} 份报告")
+
+
+def list_reports(directory):
+    """目录中的卡顿报告路径，按时间从旧到新"""
+    try:
+        names = [name for name in os.listdir(directory)
+                 if name.startswith(REPORT_PREFIX) and name.endswith(REPORT_SUFFIX)]
+    except OSError:
+        return []
+    paths = [os.path.join(directory, name) for name in names]
+    return sorted(paths, key=os.path.getmtime)
+
+
+def load_report(path):
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    if report.get("version") != REPORT_VERSION:
+        raise ValueError(f"不支持的卡顿报告版本: {report.get('version')}")
+    return report
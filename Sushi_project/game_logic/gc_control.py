@@ -0,0 +1,122 @@
+# game_logic/gc_control.py
+
+import gc
+import time
+
+
+class GCRoundStats:
+    """一局游戏内的垃圾回收暂停统计 (按代统计次数和耗时)"""
+
+    def __init__(self):
+        self.counts = [0, 0, 0]
+        self.total_ms = [0.0, 0.0, 0.0]
+        self.max_ms = [0.0, 0.0, 0.0]
+        self.collected = 0
+
+    def record(self, generation, duration_ms, collected):
+        self.counts[generation] += 1
+        self.total_ms[generation] += duration_ms
+        self.max_ms[generation] = max(self.max_ms[generation], duration_ms)
+        self.collected += collected
+
+    @property
+    def pause_count(self):
+        return sum(self.counts)
+
+    @property
+    def pause_total_ms(self):
+        return sum(self.total_ms)
+
+    def to_dict(self):
+        return {
+            "counts": list(self.counts),
+            "total_ms": [round(ms, 3) for ms in self.total_ms],
+            "max_ms": [round(ms, 3) for ms in self.max_ms],
+            "collected": self.collected,
+        }
+
+    def format_text(self):
+        parts = [f"第{gen}代 {self.counts[gen]} 次/{self.total_ms[gen]:.2f}ms (最长 {self.max_ms[gen]:.2f}ms)"
+                 for gen in range(3)]
+        return f"GC 暂停 {self.pause_count} 次, 共 {self.pause_total_ms:.2f}ms: " + ", ".join(parts)
+
+
+class GCController:
+    """把垃圾回收纳入游戏生命周期管理：
+
+    - 资源和长期对象加载完成后 gc.freeze()，让它们不再参与之后的扫描
+    - 游戏进行中推迟第2代 (完整) 回收，只保留廉价的年轻代回收
+    - 在 "时间到" 等过渡画面中显式执行一次完整回收
+    - 通过 gc.callbacks 统计每局的回收暂停次数和耗时 (回调只在一局进行中注册：
+      gc.callbacks 是进程级的，工具在一个进程里创建多个引擎时不会留下一串无用的回调)
+    """
+
+    def __init__(self, round_gen2_threshold=None, enabled=True):
+        self.enabled = enabled
+        # 游戏进行中使用的第2代阈值；None 表示完全推迟完整回收
+        self.round_gen2_threshold = round_gen2_threshold
+        self._saved_thresholds = None
+        self._pause_start = None
+        self.in_round = False
+        self.current_round = GCRoundStats()
+        self.last_round = None
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._pause_start = time.perf_counter()
+        elif phase == "stop" and self._pause_start is not None:
+            duration_ms = (time.perf_counter() - self._pause_start) * 1000
+            self._pause_start = None
+            generation = info.get("generation", 0)
+            self.current_round.record(generation, duration_ms, info.get("collected", 0))
+
+    def freeze_long_lived(self):
+        """在所有资源和长期对象加载完成后调用：先完整回收一次，再冻结现存对象"""
+        if not self.enabled:
+            return
+        gc.collect()
+        gc.freeze()
+
+    def begin_round(self):
+        """开始新的一局：重置统计，并推迟完整回收"""
+        self.current_round = GCRoundStats()
+        if not self.enabled or self.in_round:
+            return
+        self.in_round = True
+        gc.callbacks.append(self._on_gc)
+        self._saved_thresholds = gc.get_threshold()
+        gen0, gen1, _ = self._saved_thresholds
+        if self.round_gen2_threshold is None:
+            # 第2代阈值设为极大值，相当于这一局内不会自动触发完整回收
+            gc.set_threshold(gen0, gen1, 2 ** 30)
+        else:
+            gc.set_threshold(gen0, gen1, self.round_gen2_threshold)
+
+    def end_round(self):
+        """结束一局：恢复原有阈值，取消回调，返回本局的统计"""
+        if self.in_round and self._saved_thresholds is not None:
+            gc.set_threshold(*self._saved_thresholds)
+        self._remove_callback()
+        self.in_round = False
+        self._saved_thresholds = None
+        self.last_round = self.current_round
+        self.current_round = GCRoundStats()  # 局外的回收 (如过渡画面中的显式回收) 不计入上一局
+        return self.last_round
+
+    def collect_in_transition(self):
+        """在过渡画面中显式执行一次完整回收 (此时的停顿玩家感知不到)，返回耗时毫秒"""
+        if not self.enabled:
+            return 0.0
+        start = time.perf_counter()
+        gc.collect()
+        return (time.perf_counter() - start) * 1000
+
+    def _remove_callback(self):
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        self._pause_start = None
+
+    def shutdown(self):
+        if self.in_round:
+            self.end_round()
+        self._remove_callback()
@@ -0,0 +1,298 @@
+# game_logic/glyph_atlas.py
+"""字形图集：把游戏可能显示的每个字符按用到的字号预先栅格化，运行时用字形拼出文字
+
+构建 (python -m tools.build_atlas，与纹理图集一起) 时收集游戏可能显示的全部字符：
+    - 绘制文字的模块 (config.GLYPH_SOURCE_FILES：场景、菜板和手持物品、顾客) 中所有字符串字面量，
+      包括 f-string 的固定部分；
+    - config.py 中寿司、配料、饮品等的显示名称 (字典中的 "name")；
+    - 数字和 ASCII 可打印字符 (计时器、小费、关卡数)。
+每个字符在每个字号下各栅格化一份抗锯齿版本和一份不抗锯齿版本 (白色，带 alpha)，
+用 skyline 算法打包成一张图集 glyphs.png，清单 glyphs.json 记录字形位置和前进宽度，
+以及构建时所用字体文件的名字、修改时间、大小和内容摘要 (字体内容变了时整个字形图集作废)。
+
+运行时 load_font() 返回 GlyphFont，用法与 pygame.font.Font 相同 (render / size / get_height ...)：
+文字的全部字符都在图集中时，把字形依次拼到一个 Surface 上再按颜色染色，不栅格化任何字形；
+有不认识的字符时整句改用真正的字体渲染。真正的字体只在第一次需要时才打开，
+全部文字都在图集中时完全不加载 (中文字体文件很大，加载慢、占内存)。
+拼出的文字按字形的前进宽度排列，不做字距调整，个别字符可能与整句渲染差一个像素。
+当前加载的字形图集放在模块级变量中 (与 atlas 模块的做法相同)。
+"""
+
+import ast
+import json
+import os
+import string
+import time
+
+import pygame
+
+from . import flight_recorder
+from .atlas import SkylinePacker, file_signature, source_unchanged
+
+MANIFEST_FILENAME = "glyphs.json"
+SHEET_FILENAME = "glyphs.png"
+MANIFEST_VERSION = 2  # 版本 2 记录字体文件的大小和内容摘要 (font_signature)
+TEXT_CACHE_SIZE = 256  # 每个字体缓存的拼好的文字数 (界面上的文字大多每帧都一样)
+
+_glyph_atlas = None
+
+
+# --- 构建 ---
+def collect_characters(source_files, config_module):
+    """返回游戏可能显示的全部字符 (排好序的字符串)"""
+    texts = [string.digits + string.ascii_letters + string.punctuation + " "]
+    for path in source_files:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+        texts.extend(node.value for node in ast.walk(tree)
+                     if isinstance(node, ast.Constant) and isinstance(node.value, str))
+
+    def names(value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key == "name" and isinstance(item, str):
+                    texts.append(item)
+                else:
+                    names(item)
+
+    for name, value in vars(config_module).items():
+        if name.isupper():
+            names(value)
+    return "".join(sorted({ch for text in texts for ch in text if ch.isprintable()}))
+
+
+def render_glyph(font, ch, antialias):
+    """把一个字符渲染成白色、带 alpha 的 Surface (不抗锯齿的渲染结果是带 colorkey 的 8 位图，转成 0/255 的 alpha)"""
+    image = font.render(ch, antialias, (255, 255, 255))
+    if antialias:
+        return image
+    glyph = pygame.Surface(image.get_size(), pygame.SRCALPHA, 32)
+    glyph.blit(image, (0, 0))
+    return glyph
+
+
+def build_glyph_atlas(characters, font_path, sizes, output_dir, padding=1, sheet_width=1024):
+    """把 characters 在每个字号 (sizes) 下的字形打包成图集，写出图集 PNG 和清单，返回清单"""
+    glyphs = []  # (字号, 是否抗锯齿, 字符, Surface, 前进宽度)
+    metrics = {}
+    for size in sorted(set(sizes)):
+        font = pygame.font.Font(font_path, size)
+        metrics[str(size)] = {"height": font.get_height(), "linesize": font.get_linesize(),
+                              "ascent": font.get_ascent(), "descent": font.get_descent()}
+        for ch, glyph_metrics in zip(characters, font.metrics(characters)):
+            if glyph_metrics is None:  # 字体中没有这个字符：运行时整句用字体渲染
+                continue
+            for antialias in (True, False):
+                glyphs.append((size, antialias, ch, render_glyph(font, ch, antialias), glyph_metrics[4]))
+
+    glyphs.sort(key=lambda item: (-item[3].get_height(), -item[3].get_width()))
+    packer = SkylinePacker(sheet_width, 1 << 15)
+    sheet_entries = []
+    placed = []
+    for size, antialias, ch, image, advance in glyphs:
+        w, h = image.get_size()
+        pos = packer.insert(w + padding, h + padding)
+        if pos is None:
+            continue
+        placed.append((image, pos))
+        sheet_entries.append([size, int(antialias), ch, pos[0], pos[1], w, h, advance])
+    sheet = pygame.Surface((sheet_width, max(1, packer.used_height)), pygame.SRCALPHA, 32)
+    for image, pos in placed:
+        sheet.blit(image, pos, special_flags=pygame.BLEND_RGBA_MAX)
+
+    os.makedirs(output_dir, exist_ok=True)
+    pygame.image.save(sheet, os.path.join(output_dir, SHEET_FILENAME))
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "font": os.path.basename(font_path) if font_path else None,
+        "font_signature": file_signature(font_path) if font_path else None,
+        "sheet": SHEET_FILENAME,
+        "sheet_size": [sheet_width, sheet.get_height()],
+        "characters": len(characters),
+        "metrics": metrics,
+        "glyphs": sheet_entries,
+    }
+    with open(os.path.join(output_dir, MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+    return manifest
+
+
+def build_default_glyph_atlas(output_dir):
+    """按 config 中的字体、字号和源文件构建字形图集 (tools.build_atlas 和首次以新的布局缩放启动时调用)"""
+    import config
+    characters = collect_characters(config.GLYPH_SOURCE_FILES, config)
+    sizes = (config.DEFAULT_FONT_SIZE, config.LARGE_FONT_SIZE, config.SMALL_FONT_SIZE)
+    return build_glyph_atlas(characters, custom_font_path(), sizes, output_dir)
+
+
+# --- 运行时 ---
+def custom_font_path():
+    """config 中的自定义字体文件；不存在时返回 None (使用 pygame 的默认字体)"""
+    from config import FONTS_DIR, CUSTOM_FONT_FILENAME
+    path = os.path.join(FONTS_DIR, CUSTOM_FONT_FILENAME)
+    return path if os.path.exists(path) else None
+
+
+class GlyphFont:
+    """用字形图集拼出文字的字体，接口与 pygame.font.Font 相同；不在图集中的字符用真正的字体渲染"""
+
+    def __init__(self, font_path, size, glyphs, line_metrics):
+        self.font_path = font_path
+        self.font_size = size
+        self.glyphs = glyphs    # (字符, 是否抗锯齿) -> (字形 Surface, 前进宽度)
+        self.line_metrics = line_metrics  # 行高、基线等 (构建时从字体取得)
+        self._font = None
+        self._cache = {}
+        self.composed = 0       # 由字形拼出的次数 (不含缓存命中)
+        self.fallbacks = 0      # 改用字体渲染的次数
+
+    @property
+    def font(self):
+        """真正的字体：第一次需要时才打开"""
+        if self._font is None:
+            start = time.perf_counter()
+            self._font = pygame.font.Font(self.font_path, self.font_size)
+            flight_recorder.note_load("font", f"{self.font_path or '默认字体'} {self.font_size}",
+                                      (time.perf_counter() - start) * 1000)
+        return self._font
+
+    def _layout(self, text, antialias):
+        glyphs = self.glyphs
+        placements = []
+        x = width = 0
+        for ch in text:
+            glyph = glyphs.get((ch, antialias))
+            if glyph is None:
+                return None, 0
+            image, advance = glyph
+            placements.append((image, (x, 0), None, pygame.BLEND_RGBA_MAX))
+            width = max(width, x + image.get_width())
+            x += advance
+        return placements, max(width, x)
+
+    def render(self, text, antialias, color, background=None):
+        antialias = bool(antialias)
+        if background is not None:
+            return self.font.render(text, antialias, color, background)
+        color = tuple(pygame.Color(color))
+        key = (text, antialias, color)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        placements, width = self._layout(text, antialias)
+        if placements is None:
+            self.fallbacks += 1
+            surface = self.font.render(text, antialias, color)
+        else:
+            self.composed += 1
+            surface = pygame.Surface((width, self.line_metrics["height"]), pygame.SRCALPHA, 32)
+            surface.blits(placements, doreturn=False)
+            # 白色字形乘以颜色即为该颜色，alpha 保持不变
+            surface.fill((color[0], color[1], color[2], 255), special_flags=pygame.BLEND_RGBA_MULT)
+        if len(self._cache) >= TEXT_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[key] = surface
+        return surface
+
+    def size(self, text):
+        placements, width = self._layout(text, True)
+        if placements is None:
+            return self.font.size(text)
+        return (width, self.line_metrics["height"])
+
+    def get_height(self):
+        return self.line_metrics["height"]
+
+    def get_linesize(self):
+        return self.line_metrics["linesize"]
+
+    def get_ascent(self):
+        return self.line_metrics["ascent"]
+
+    def get_descent(self):
+        return self.line_metrics["descent"]
+
+    def __getattr__(self, name):
+        # 其余方法 (metrics、set_bold 等) 交给真正的字体
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.font, name)
+
+
+class GlyphAtlas:
+    def __init__(self, directory, manifest):
+        from .sushi_elements import convert_for_display
+        self.directory = directory
+        self.font_name = manifest["font"]
+        self.font_signature = manifest["font_signature"]
+        self._matches = {}  # 字体路径 -> 是否与构建时的字体相同 (字体文件很大，每个路径只检查一次)
+        self.sheet = convert_for_display(pygame.image.load(os.path.join(directory, manifest["sheet"])))
+        self.metrics = {int(size): values for size, values in manifest["metrics"].items()}
+        self.glyphs = {size: {} for size in self.metrics}
+        for size, antialias, ch, x, y, w, h, advance in manifest["glyphs"]:
+            self.glyphs[size][(ch, bool(antialias))] = (self.sheet.subsurface((x, y, w, h)), advance)
+        self.fonts = []
+
+    def matches(self, font_path):
+        """图集是否用同一个字体文件构建 (没有自定义字体时两边都是默认字体)"""
+        if font_path is None or self.font_name is None:
+            return font_path is None and self.font_name is None
+        if font_path not in self._matches:
+            try:
+                self._matches[font_path] = (os.path.basename(font_path) == self.font_name
+                                            and source_unchanged(font_path, self.font_signature))
+            except OSError:
+                self._matches[font_path] = False
+        return self._matches[font_path]
+
+    def font(self, font_path, size):
+        if size not in self.glyphs or not self.matches(font_path):
+            return None
+        font = GlyphFont(font_path, size, self.glyphs[size], self.metrics[size])
+        self.fonts.append(font)
+        return font
+
+    def format_text(self):
+        glyphs = sum(len(glyphs) for glyphs in self.glyphs.values())
+        composed = sum(font.composed for font in self.fonts)
+        fallbacks = sum(font.fallbacks for font in self.fonts)
+        loaded = sum(font._font is not None for font in self.fonts)
+        return (f"字形图集: {glyphs} 个字形 ({len(self.glyphs)} 种字号), 拼出 {composed} 次文字, "
+                f"{fallbacks} 次含未收录字符改用字体渲染, 打开了 {loaded} 个字体")
+
+
+def load_glyph_atlas(directory):
+    """读入字形图集；没有构建过或版本不符时返回 None (文字全部用字体渲染)"""
+    global _glyph_atlas
+    path = os.path.join(directory, MANIFEST_FILENAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"无法读取字形图集清单 {path}: {e}")
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        print(f"字形图集清单版本不符，忽略字形图集: {path}")
+        return None
+    try:
+        _glyph_atlas = GlyphAtlas(directory, manifest)
+    except (pygame.error, FileNotFoundError, ValueError) as e:
+        print(f"无法加载字形图集，文字改用字体渲染: {e}")
+        return None
+    return _glyph_atlas
+
+
+def unload_glyph_atlas():
+    global _glyph_atlas
+    _glyph_atlas = None
+
+
+def load_font(font_path, size):
+    """按字号取字体：字形图集中有这个字体和字号时返回 GlyphFont (不打开字体文件)，否则打开真正的字体"""
+    if _glyph_atlas is not None:
+        font = _glyph_atlas.font(font_path, size)
+        if font is not None:
+            return font
+    return pygame.font.Font(font_path, size)
@@ -0,0 +1,206 @@
+# game_logic/hot_reload.py
+"""开发用的热重载：轮询资源目录和 config.py 的修改时间，只重新加载改动过的部分
+
+- 图片：启用后 load_scaled_image / load_gif_frames 把加载出的 Surface 记在这里 (弱引用)。
+  某个文件被修改时，按原来的尺寸重新从磁盘加载，把新像素原样复制进已有的 Surface
+  (包括图集的子 Surface，即直接更新图集)，所有引用它的对象立刻看到新图片，不需要重建任何对象。
+  图集中该文件的其余条目作废，之后改为从磁盘加载。按需解码的顾客动画 (animation.AnimationClip)
+  丢掉已解码的帧重新解码第一帧，其余帧照常按需或在后台解码。
+- 声音：音效重新解码并注册；背景音乐丢掉解码结果，在后台重新解码。
+- config.py：importlib.reload 后，把各模块用 from config import 导入的名字换成新值，
+  再由引擎按新的位置和尺寸重建游戏对象 (容器、菜板、顾客位布局等)，本局状态用快照保存和恢复。
+  窗口大小、顾客位数量等少数设置要重启才能生效，会打印提示。
+
+当前记录的图片放在模块级变量中 (与 atlas 模块的做法相同)；未启用时 track_* 直接返回。
+"""
+
+import importlib
+import os
+import sys
+import threading
+import time
+import weakref
+
+import pygame
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif")
+SOUND_EXTENSIONS = (".wav", ".mp3", ".ogg")
+# 修改后要重启才能生效的设置 (窗口、逻辑帧率、顾客位数量、快照缓冲区和 GIF 解码方式都在启动时确定)
+RESTART_REQUIRED = {"SCREEN_WIDTH", "SCREEN_HEIGHT", "LAYOUT_SCALE", "FPS", "NUM_CUSTOMER_SPOTS",
+                    "SNAPSHOT_HISTORY_SECONDS", "ATLAS_DIR", "ASSETS_DIR", "IMAGES_DIR", "SAVE_DIR",
+                    "CUSTOMER_ANIMATION_PALETTIZED"}
+# 这些设置变了时顾客要重新解码动画帧、加载气泡图片和字体
+CUSTOMER_ASSET_SETTINGS = {"CUSTOMER_IMAGE_SIZE", "ORDER_BUBBLE_SIZE", "SMALL_FONT_SIZE",
+                           "CUSTOMER_WAITING_IMG_FILENAME", "CUSTOMER_HAPPY_IMG_FILENAME",
+                           "CUSTOMER_ANGRY_IMG_FILENAME", "ORDER_BUBBLE_IMG_FILENAME", "CUSTOM_FONT_FILENAME"}
+
+_images = None   # (目录, 文件名, 尺寸, 是否不透明) -> WeakSet[Surface]
+_gifs = None     # (目录, 文件名, 尺寸) -> 帧列表
+_lock = threading.Lock()  # 场景资源在后台线程加载
+
+
+def enable_tracking():
+    """开始记录加载的图片 (在加载资源之前调用)"""
+    global _images, _gifs
+    _images = {}
+    _gifs = {}
+
+
+def track_image(directory, filename, size, opaque, image):
+    if _images is None or image is None:
+        return
+    key = (os.path.normpath(directory), filename, tuple(size) if size else None, opaque)
+    with _lock:
+        _images.setdefault(key, weakref.WeakSet()).add(image)
+
+
+def track_gif(directory, filename, size, frames):
+    if _gifs is None or not frames:
+        return
+    with _lock:
+        _gifs[(os.path.normpath(directory), filename, tuple(size) if size else None)] = frames
+
+
+def copy_pixels(target, source):
+    """把 source 的像素原样复制进同样大小的 target (带 alpha 的连同 alpha 一起复制)"""
+    alpha = target.get_flags() & pygame.SRCALPHA
+    target.fill((0, 0, 0, 0) if alpha else (0, 0, 0))
+    target.blit(source, (0, 0), special_flags=pygame.BLEND_RGBA_MAX if alpha else pygame.BLEND_RGB_MAX)
+
+
+class HotReloader:
+    def __init__(self, game, config_path, watch_dirs, ignore_dirs=(), interval=0.5):
+        self.game = game
+        self.config_path = config_path
+        self.watch_dirs = watch_dirs
+        self.ignore_dirs = {os.path.normpath(directory) for directory in ignore_dirs}
+        self.interval = interval
+        self.layout_callbacks = []  # 布局重建后调用 (例如 GameActions.refresh_layout)
+        self._last_poll = time.monotonic()
+        self._mtimes = self._scan()
+        self.reloads = 0
+
+    def _scan(self):
+        mtimes = {}
+        for root in self.watch_dirs:
+            for directory, subdirs, files in os.walk(root):
+                subdirs[:] = [d for d in subdirs if os.path.normpath(os.path.join(directory, d)) not in self.ignore_dirs]
+                for name in files:
+                    if name.lower().endswith(IMAGE_EXTENSIONS + SOUND_EXTENSIONS):
+                        path = os.path.join(directory, name)
+                        mtimes[path] = os.stat(path).st_mtime_ns
+        mtimes[self.config_path] = os.stat(self.config_path).st_mtime_ns
+        return mtimes
+
+    def poll(self):
+        """主循环每帧调用；每隔 interval 秒检查一次修改时间，返回重新加载的文件列表"""
+        now = time.monotonic()
+        if now - self._last_poll < self.interval:
+            return []
+        self._last_poll = now
+        try:
+            mtimes = self._scan()
+        except OSError:
+            return []  # 编辑器保存文件的瞬间文件可能不存在，下次再看
+        changed = [path for path, mtime in mtimes.items() if self._mtimes.get(path) != mtime]
+        self._mtimes = mtimes
+        for path in changed:
+            start = time.perf_counter()
+            if path == self.config_path:
+                message = self.reload_config()
+            elif path.lower().endswith(SOUND_EXTENSIONS):
+                message = self.reload_sound(path)
+            else:
+                message = self.reload_image(path)
+            self.reloads += 1
+            print(f"{message} ({(time.perf_counter() - start) * 1000:.0f}ms)")
+        return changed
+
+    # --- 图片 ---
+    def reload_image(self, path):
+        from .animation import AnimationClip
+        from .sushi_elements import load_gif_frames, load_image_file
+        directory, filename = os.path.split(os.path.normpath(path))
+        if self.game.texture_atlas is not None:
+            self.game.texture_atlas.invalidate(directory, filename)
+        with _lock:
+            images = [(key, list(surfaces)) for key, surfaces in _images.items()
+                      if key[0] == directory and key[1] == filename]
+            gifs = [(key, frames) for key, frames in _gifs.items() if key[0] == directory and key[1] == filename]
+        updated = 0
+        for (_, _, size, opaque), surfaces in images:
+            try:
+                image = load_image_file(path, size, opaque)
+            except (pygame.error, FileNotFoundError) as e:
+                return f"无法重新加载图片 {path}: {e}"
+            for surface in surfaces:
+                if surface.get_size() != image.get_size():
+                    print(f"{filename} 的原始尺寸变了，使用原始尺寸的地方要重启后才会更新")
+                    continue
+                copy_pixels(surface, image)
+                updated += 1
+        for (_, _, size), frames in gifs:
+            if isinstance(frames, AnimationClip):
+                frames.reload()  # 按需解码的动画：重新解码第一帧，其余帧照常按需或在后台解码
+                updated += 1
+                continue
+            new_frames = load_gif_frames(filename, size, directory=directory)
+            if not new_frames:
+                continue
+            if len(new_frames) == len(frames) and all(a.get_size() == b.get_size() for a, b in zip(frames, new_frames)):
+                for frame, new_frame in zip(frames, new_frames):
+                    copy_pixels(frame, new_frame)
+            else:
+                frames[:] = new_frames  # 帧数变了：原地替换列表内容，共用这份列表的顾客都会用上新帧
+            updated += len(frames)
+        return f"已重新加载图片 {filename}: 更新了 {updated} 个 Surface"
+
+    # --- 声音 ---
+    def reload_sound(self, path):
+        from config import SOUND_EFFECTS
+        audio = self.game.audio
+        filename = os.path.basename(path)
+        for name, (sound_file, priority, max_voices) in SOUND_EFFECTS.items():
+            if sound_file == filename:
+                audio.load_sound(name, sound_file, priority, max_voices)
+        if filename in audio.music_tracks:
+            audio.reload_music(filename)
+        return f"已重新加载声音 {filename}"
+
+    # --- config.py ---
+    def reload_config(self):
+        import config
+        old = dict(vars(config))
+        try:
+            importlib.reload(config)
+        except Exception as e:  # 编辑到一半的 config.py 可能有语法错误：保留原来的配置
+            vars(config).clear()
+            vars(config).update(old)
+            return f"config.py 有错误，保留原来的配置: {e}"
+        new = vars(config)
+        changed = {name for name, value in new.items()
+                   if not name.startswith("__") and not callable(value) and not isinstance(value, type(os))
+                   and (name not in old or old[name] != value)}
+        if not changed:
+            return "config.py 已保存，没有设置改变"
+        # 各模块用 from config import 导入的是当时的对象：把仍指向旧对象的名字换成新值
+        rebound = 0
+        for module in list(sys.modules.values()):
+            module_name = getattr(module, "__name__", "")
+            if not (module_name.startswith(("game_logic.", "tools.")) or module_name in ("__main__", "main")):
+                continue
+            namespace = vars(module)
+            for name, old_value in old.items():
+                if name.startswith("__") or name not in new:
+                    continue
+                if name in namespace and namespace[name] is old_value and new[name] is not old_value:
+                    namespace[name] = new[name]
+                    rebound += 1
+        self.game.rebuild_objects(reuse_customer_assets=not changed & CUSTOMER_ASSET_SETTINGS)
+        for callback in self.layout_callbacks:
+            callback()
+        message = f"已重新加载 config.py: {', '.join(sorted(changed))} (更新 {rebound} 处导入, 重建布局)"
+        restart = changed & RESTART_REQUIRED
+        if restart:
+            message += f"; {', '.join(sorted(restart))} 要重启游戏才能生效"
+        return message
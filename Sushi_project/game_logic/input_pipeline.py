@@ -0,0 +1,130 @@
+# game_logic/input_pipeline.py
+"""输入管线：过滤 SDL 事件队列，每帧取一次鼠标位置，追踪每次点击到其效果显示出来的延迟
+
+- 过滤：install() 后 SDL 只把游戏处理的事件类型 (ALLOWED_EVENTS) 放进队列，
+  大量的 MOUSEMOTION、窗口事件等在 SDL 内部就被丢弃，pygame.event.get() 不再为它们创建 Python 对象。
+- 合并鼠标移动：SDL 即使不排队 MOUSEMOTION 也会更新光标状态，所以每帧只在 poll() 时
+  用 pygame.mouse.get_pos() 取一次最新位置，作为这一帧唯一的鼠标位置样本。
+- 点击延迟 ("输入到显示")：每次左键点击在 poll() 取出时记下时间，并在处理点击的前后各取一次游戏状态的
+  特征 (菜板、手持物品、小费、顾客、游戏状态，见 GameEngine.input_effect_signature)。
+  效果只按这两次特征的差别判断，所以时间到、顾客离开或新来等与点击无关的变化不会被算成点击的效果；
+  特征没有变化的点击 (点在空白处等) 立即记为无效果，有变化的点击在下一次 display.flip() 返回时记下延迟。
+  pygame 不提供 SDL 事件自带的时间戳，点击在上一次取事件之后的任意时刻都可能到达，
+  所以同时给出上界：从上一次取事件的时刻算起。
+"""
+
+import time
+from collections import deque
+
+import pygame
+
+# 游戏实际处理的事件类型 (录像中的 MOUSEBUTTONUP 不影响游戏，不再排队)
+ALLOWED_EVENTS = (pygame.QUIT, pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.MOUSEWHEEL)
+
+
+def percentile(values, p):
+    """最近秩法求百分位数 (values 已排序)"""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, -(-len(values) * p // 100) - 1))
+    return values[index]
+
+
+class ClickTrace:
+    __slots__ = ("polled_at", "previous_poll_at", "before", "changed")
+
+    def __init__(self, polled_at, previous_poll_at, before):
+        self.polled_at = polled_at
+        self.previous_poll_at = previous_poll_at
+        self.before = before
+        self.changed = ()
+
+
+class InputPipeline:
+    def __init__(self, signature, history=4096):
+        self.signature = signature          # 返回 {名字: 值} 的函数，描述点击可能改变的游戏状态
+        self.installed = False
+        self._polled_at = None
+        self._previous_poll_at = None
+        self._tracing = None                # 正在处理的点击 (trace_click 与 click_handled 之间)
+        self._pending = []                  # 已经改变了状态、等待下一次 flip() 的点击
+        # 统计
+        self.frames = 0
+        self.events = 0                     # 取出的事件总数
+        self.clicks = 0
+        self.no_effect_clicks = 0
+        self.latencies_ms = deque(maxlen=history)        # 从取出点击到效果显示
+        self.latency_bounds_ms = deque(maxlen=history)   # 从上一次取事件到效果显示 (上界)
+        self.effect_counts = {}             # 效果种类 -> 次数
+
+    def install(self):
+        """只允许 ALLOWED_EVENTS 进入 SDL 事件队列 (需在打开显示窗口之后调用)，并开始追踪点击"""
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(list(ALLOWED_EVENTS))
+        self.installed = True
+
+    def poll(self):
+        """每帧开始时调用：返回 (事件列表, 本帧的鼠标位置)"""
+        self._previous_poll_at = self._polled_at
+        self._polled_at = time.perf_counter()
+        events = pygame.event.get()
+        self.events += len(events)
+        return events, pygame.mouse.get_pos()
+
+    def trace_click(self):
+        """处理一次左键点击之前调用 (未 install 时不追踪，工具送入的合成事件不受影响)"""
+        if not self.installed or self._polled_at is None:
+            return
+        self.clicks += 1
+        previous = self._previous_poll_at if self._previous_poll_at is not None else self._polled_at
+        self._tracing = ClickTrace(self._polled_at, previous, self.signature())
+
+    def click_handled(self):
+        """处理完这次点击之后立即调用：只有点击本身造成的特征变化才算作它的效果"""
+        trace, self._tracing = self._tracing, None
+        if trace is None:
+            return
+        after = self.signature()
+        trace.changed = [name for name, value in after.items() if trace.before.get(name) != value]
+        if trace.changed:
+            self._pending.append(trace)
+        else:
+            self.no_effect_clicks += 1
+
+    def frame_presented(self):
+        """display.flip() 之后调用：点击的效果已经画在这一帧上，记下延迟"""
+        self.frames += 1
+        if not self._pending:
+            return
+        now = time.perf_counter()
+        for trace in self._pending:
+            self.latencies_ms.append((now - trace.polled_at) * 1000)
+            self.latency_bounds_ms.append((now - trace.previous_poll_at) * 1000)
+            for name in trace.changed:
+                self.effect_counts[name] = self.effect_counts.get(name, 0) + 1
+        self._pending = []
+
+    def report(self):
+        latencies = sorted(self.latencies_ms)
+        bounds = sorted(self.latency_bounds_ms)
+        return {
+            "frames": self.frames,
+            "events": self.events,
+            "clicks": self.clicks,
+            "clicks_with_effect": len(latencies),
+            "no_effect_clicks": self.no_effect_clicks,
+            "latency_ms": {f"p{p}": round(percentile(latencies, p), 2) for p in (50, 90, 99, 100)},
+            "latency_upper_bound_ms": {f"p{p}": round(percentile(bounds, p), 2) for p in (50, 90, 99, 100)},
+            "effects": dict(self.effect_counts),
+        }
+
+    def format_text(self):
+        report = self.report()
+        latency = report["latency_ms"]
+        bound = report["latency_upper_bound_ms"]
+        effects = ", ".join(f"{name} {count}" for name, count in sorted(report["effects"].items()))
+        return (f"输入延迟: {report['clicks']} 次点击, {report['clicks_with_effect']} 次有效果, "
+                f"{report['no_effect_clicks']} 次无效果; 点击到显示 p50 {latency['p50']:.1f}ms "
+                f"p90 {latency['p90']:.1f}ms p99 {latency['p99']:.1f}ms 最长 {latency['p100']:.1f}ms "
+                f"(含排队上界 p50 {bound['p50']:.1f}ms p99 {bound['p99']:.1f}ms); "
+                f"平均每帧 {report['events'] / max(1, report['frames']):.2f} 个事件; 效果: {effects or '无'}")
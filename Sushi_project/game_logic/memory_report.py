@@ -0,0 +1,166 @@
+# game_logic/memory_report.py
+
+import hashlib
+import types
+
+import pygame
+
+# 遍历时不深入的类型 (模块、函数、类等不持有游戏图片)
+_SKIPPED_TYPES = (types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                  types.MethodType, type, str, bytes, int, float, bool, type(None))
+
+
+def surface_nbytes(surface):
+    """返回 Surface 自身占用的像素字节数；子 Surface 与父 Surface 共享像素，记为 0"""
+    if surface.get_parent() is not None:
+        return 0
+    return surface.get_pitch() * surface.get_height()
+
+
+def surface_digest(surface):
+    """按像素内容计算哈希 (包含尺寸)，用于发现重复的图片"""
+    width, height = surface.get_size()
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(f"{width}x{height}".encode())
+    hasher.update(pygame.image.tobytes(surface, "RGBA"))
+    return hasher.hexdigest()
+
+
+class SurfaceEntry:
+    """报告中的一个 Surface：所有者、属性路径、类别和字节数"""
+
+    def __init__(self, surface, owner, path, category):
+        self.surface = surface
+        self.owner = owner
+        self.path = path
+        self.category = category
+        self.size = surface.get_size()
+        self.bitsize = surface.get_bitsize()
+        self.nbytes = surface_nbytes(surface)
+        self.digest = surface_digest(surface)
+        self.aliases = []  # 同一个 Surface 对象的其他引用路径
+
+    def to_dict(self):
+        return {
+            "owner": self.owner,
+            "path": self.path,
+            "category": self.category,
+            "size": list(self.size),
+            "bitsize": self.bitsize,
+            "bytes": self.nbytes,
+            "digest": self.digest,
+            "aliases": list(self.aliases),
+        }
+
+
+class SurfaceReport:
+    """遍历对象图中所有存活的 Surface，按所有者归属字节数并标记重复内容"""
+
+    def __init__(self, roots):
+        # roots: {名称: 对象}，例如 {"main": globals()}
+        self.entries = []
+        self._by_id = {}
+        self._visited = set()
+        for name, root in roots.items():
+            if isinstance(root, dict):  # 模块全局变量等命名空间：每个变量单独成类
+                self._visited.add(id(root))
+                for key, value in root.items():
+                    if not key.startswith("__"):
+                        self._walk(value, f"{name}.{key}", name, f"{name}.{key}")
+            else:
+                self._walk(root, name, name, name)
+
+    def _walk(self, obj, path, owner, category):
+        if isinstance(obj, pygame.Surface):
+            entry = self._by_id.get(id(obj))
+            if entry is None:
+                entry = SurfaceEntry(obj, owner, path, category)
+                self._by_id[id(obj)] = entry
+                self.entries.append(entry)
+            elif path != entry.path:
+                entry.aliases.append(path)
+            return
+        if isinstance(obj, _SKIPPED_TYPES) or id(obj) in self._visited:
+            return
+        self._visited.add(id(obj))
+
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                self._walk(value, f"{path}[{key!r}]", owner, category)
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            for index, value in enumerate(obj):
+                self._walk(value, f"{path}[{index}]", owner, category)
+        elif hasattr(obj, "__dict__"):
+            # 对象属性：所有者记为 "类名@路径"，类别按 "类名.属性名" 汇总
+            class_name = type(obj).__name__
+            owner_name = f"{class_name}@{path}"
+            for attr_name, value in vars(obj).items():
+                self._walk(value, f"{path}.{attr_name}", owner_name, f"{class_name}.{attr_name}")
+
+    @property
+    def total_bytes(self):
+        return sum(entry.nbytes for entry in self.entries)
+
+    def totals_by_category(self):
+        totals = {}
+        for entry in self.entries:
+            count, nbytes = totals.get(entry.category, (0, 0))
+            totals[entry.category] = (count + 1, nbytes + entry.nbytes)
+        return dict(sorted(totals.items(), key=lambda item: item[1][1], reverse=True))
+
+    def duplicate_groups(self):
+        """返回像素内容完全相同、但属于不同 Surface 对象的分组 (只含有实际像素的 Surface)"""
+        groups = {}
+        for entry in self.entries:
+            if entry.nbytes:
+                groups.setdefault(entry.digest, []).append(entry)
+        duplicates = [group for group in groups.values() if len(group) > 1]
+        duplicates.sort(key=lambda group: group[0].nbytes * (len(group) - 1), reverse=True)
+        return duplicates
+
+    @property
+    def wasted_bytes(self):
+        return sum(group[0].nbytes * (len(group) - 1) for group in self.duplicate_groups())
+
+    def to_dict(self):
+        return {
+            "total_bytes": self.total_bytes,
+            "wasted_bytes": self.wasted_bytes,
+            "categories": {name: {"count": count, "bytes": nbytes}
+                           for name, (count, nbytes) in self.totals_by_category().items()},
+            "duplicates": [[entry.path for entry in group] for group in self.duplicate_groups()],
+            "surfaces": [entry.to_dict() for entry in self.entries],
+        }
+
+    def format_text(self, max_duplicate_groups=20):
+        lines = [f"=== Surface 内存报告: {len(self.entries)} 个 Surface, "
+                 f"共 {_format_bytes(self.total_bytes)} ==="]
+        lines.append("--- 按类别统计 ---")
+        for name, (count, nbytes) in self.totals_by_category().items():
+            lines.append(f"{_format_bytes(nbytes):>10}  {count:4d} 个  {name}")
+
+        duplicates = self.duplicate_groups()
+        lines.append(f"--- 重复像素内容: {len(duplicates)} 组, "
+                     f"可节省 {_format_bytes(self.wasted_bytes)} ---")
+        for group in duplicates[:max_duplicate_groups]:
+            first = group[0]
+            lines.append(f"{first.size[0]}x{first.size[1]} x{len(group)} "
+                         f"(每份 {_format_bytes(first.nbytes)}):")
+            for entry in group:
+                lines.append(f"    {entry.path}")
+        if len(duplicates) > max_duplicate_groups:
+            lines.append(f"    ... 另有 {len(duplicates) - max_duplicate_groups} 组")
+        return "\n".join(lines)
+
+
+def _format_bytes(nbytes):
+    if nbytes >= 1024 * 1024:
+        return f"{nbytes / (1024 * 1024):.2f} MB"
+    if nbytes >= 1024:
+        return f"{nbytes / 1024:.1f} KB"
+    return f"{nbytes} B"
+
+
+def build_surface_report(roots):
+    """构建 Surface 内存报告的便捷函数"""
+    return SurfaceReport(roots)
@@ -0,0 +1,119 @@
+# game_logic/quality.py
+"""自适应画质：按帧耗时预算逐级关闭可选的绘制工作
+
+每帧结束时把这一帧的耗时 (不含等待下一帧的时间) 交给 QualityGovernor。
+最近一段时间的平均耗时超过预算时降一级，长时间有余量时升一级，顺序固定：
+    级别 4  全部开启
+    级别 3  顾客动画降速 (CUSTOMER_ANIMATION_FRAME_DURATION 乘以 slow_animation_factor)
+    级别 2  顾客位的半透明底色改为只画边框 (不再做 alpha 混合)
+    级别 1  不绘制鼠标上手持的物品图片 (底部文字仍显示手持什么)
+    级别 0  文字不抗锯齿
+降级后要等一段冷却时间才会再次调整，避免在两个级别之间来回跳。
+
+当前生效的开关放在模块级的 settings 中 (与 runtime 模块的做法相同)，绘制代码直接读取。
+"""
+
+from collections import deque
+
+LEVEL_NAMES = ["文字无抗锯齿", "不画手持物品", "顾客位无透明", "动画降速", "全部开启"]
+MAX_LEVEL = len(LEVEL_NAMES) - 1
+
+
+class QualitySettings:
+    """当前画质级别对应的各项开关"""
+
+    def __init__(self):
+        self.apply(MAX_LEVEL)
+
+    def apply(self, level, slow_animation_factor=3):
+        self.animation_slowdown = 1 if level >= 4 else slow_animation_factor
+        self.spot_alpha = level >= 3
+        self.draw_held_item = level >= 2
+        self.text_antialias = level >= 1
+
+
+settings = QualitySettings()
+
+
+class QualityGovernor:
+    def __init__(self, budget_ms, window=30, headroom=0.6, upgrade_frames=180, cooldown_frames=60,
+                 slow_animation_factor=3, enabled=True):
+        self.budget_ms = budget_ms
+        self.headroom = headroom              # 平均耗时低于 预算 × headroom 才算有余量
+        self.upgrade_frames = upgrade_frames  # 连续有余量多少帧后升一级
+        self.cooldown_frames = cooldown_frames
+        self.slow_animation_factor = slow_animation_factor
+        self.enabled = enabled
+        self.level = MAX_LEVEL
+        self._recent = deque(maxlen=window)
+        self._recent_total = 0.0
+        self._frames_since_change = 0
+        self._headroom_frames = 0
+        # 遥测：每个级别停留的帧数、升降级次数、超预算的帧数
+        self.frames_at_level = [0] * (MAX_LEVEL + 1)
+        self.downgrades = 0
+        self.upgrades = 0
+        self.over_budget_frames = 0
+        settings.apply(self.level, slow_animation_factor)
+
+    @property
+    def level_name(self):
+        return LEVEL_NAMES[self.level]
+
+    @property
+    def average_ms(self):
+        return self._recent_total / len(self._recent) if self._recent else 0.0
+
+    def set_level(self, level):
+        """直接设置级别 (基准测试等工具使用)"""
+        self.level = max(0, min(MAX_LEVEL, level))
+        settings.apply(self.level, self.slow_animation_factor)
+        self._frames_since_change = 0
+        self._headroom_frames = 0
+
+    def record_frame(self, frame_ms):
+        """记录一帧的耗时，必要时调整级别；级别变化时返回新级别，否则返回 None"""
+        self.frames_at_level[self.level] += 1
+        if frame_ms > self.budget_ms:
+            self.over_budget_frames += 1
+        if len(self._recent) == self._recent.maxlen:
+            self._recent_total -= self._recent[0]
+        self._recent.append(frame_ms)
+        self._recent_total += frame_ms
+        self._frames_since_change += 1
+        if not self.enabled or self._frames_since_change < self.cooldown_frames:
+            return None
+
+        average = self.average_ms
+        if average > self.budget_ms and self.level > 0:
+            self.set_level(self.level - 1)
+            self.downgrades += 1
+            return self.level
+        if average < self.budget_ms * self.headroom:
+            self._headroom_frames += 1
+            if self._headroom_frames >= self.upgrade_frames and self.level < MAX_LEVEL:
+                self.set_level(self.level + 1)
+                self.upgrades += 1
+                return self.level
+        else:
+            self._headroom_frames = 0
+        return None
+
+    def telemetry(self):
+        return {
+            "level": self.level,
+            "level_name": self.level_name,
+            "budget_ms": self.budget_ms,
+            "average_ms": round(self.average_ms, 3),
+            "frames_at_level": list(self.frames_at_level),
+            "downgrades": self.downgrades,
+            "upgrades": self.upgrades,
+            "over_budget_frames": self.over_budget_frames,
+        }
+
+    def format_text(self):
+        total = sum(self.frames_at_level) or 1
+        shares = ", ".join(f"{level}级 {count / total:.0%}"
+                           for level, count in enumerate(self.frames_at_level) if count)
+        return (f"画质: 当前 {self.level} 级 ({self.level_name}), 预算 {self.budget_ms:.1f}ms, "
+                f"超预算 {self.over_budget_frames} 帧, 降级 {self.downgrades} 次, 升级 {self.upgrades} 次; {shares}")
@@ -0,0 +1,89 @@
+# game_logic/recording.py
+"""录像文件格式与读取 (不导入 config 和 pygame：工具可以先读出录像的布局缩放，再据此导入 config)
+
+录像文件是紧凑的二进制格式 (小端序)：
+    文件头  HEADER: 魔数 b"SUSR", 版本, FPS, 随机种子, 起始关卡
+    布局    LAYOUT: 顾客位数量, 每行个数                   (版本 3 起；回放时按同样的布局重建游戏)
+    缩放    SCALE : 布局缩放                               (版本 4 起；事件坐标是缩放后的屏幕坐标)
+    事件    EVENT : 逻辑帧号, 事件类型, 鼠标按键, x, y        (每个 10 字节；滚轮事件的 x, y 为滚动格数)
+    结束    EVENT(类型 END, 帧号 = 结束帧) + OUTCOME: 总小费, 关卡, 订单数, 结果摘要
+录制和回放见 replay.py。
+"""
+
+import struct
+
+MAGIC = b"SUSR"
+FORMAT_VERSION = 4  # 版本 2 增加了鼠标滚轮事件 (滚动顾客区)；版本 3 记录顾客位布局；版本 4 记录布局缩放
+SUPPORTED_VERSIONS = (1, 2, 3, 4)
+
+HEADER = struct.Struct("<4sHHQI")   # 魔数, 版本, FPS, 种子, 起始关卡
+LAYOUT = struct.Struct("<HH")       # 顾客位数量, 每行个数 (0 表示排成一行)
+SCALE = struct.Struct("<f")         # 布局缩放
+EVENT = struct.Struct("<IBBhh")     # 帧号, 类型, 按键, x, y
+OUTCOME = struct.Struct("<iII16s")  # 总小费, 关卡, 订单数, 结果摘要
+
+EVENT_END = 0
+EVENT_MOUSE_DOWN = 1
+EVENT_MOUSE_UP = 2
+EVENT_QUIT = 3
+EVENT_MOUSE_WHEEL = 4
+
+
+class Recording:
+    """读入内存的录像文件"""
+
+    def __init__(self, seed, start_level, fps, events, end_tick, expected=None, num_spots=None, spot_columns=None,
+                 layout_scale=None):
+        self.seed = seed
+        self.start_level = start_level
+        self.fps = fps
+        # 顾客位布局，传给 GameEngine (每行个数 0 表示一行)；版本 3 之前的录像为 None，即默认布局
+        self.num_spots = num_spots
+        self.spot_columns = spot_columns
+        # 录制时的布局缩放 (事件中的坐标都是缩放后的屏幕坐标)；版本 4 之前的录像为 None
+        self.layout_scale = layout_scale
+        self.events = events  # [(帧号, 类型, 按键, x, y)]
+        self.end_tick = end_tick
+        self.expected = expected  # 录制时的结果 (总小费, 关卡, 订单数, 摘要)，文件不完整时为 None
+
+    def events_by_tick(self):
+        by_tick = {}
+        for record in self.events:
+            by_tick.setdefault(record[0], []).append(record)
+        return by_tick
+
+
+def read_recording(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, fps, seed, start_level = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"不是录像文件: {path}")
+    if version not in SUPPORTED_VERSIONS:
+        raise ValueError(f"不支持的录像版本 {version}: {path}")
+
+    offset = HEADER.size
+    num_spots = spot_columns = None
+    if version >= 3:
+        num_spots, spot_columns = LAYOUT.unpack_from(data, offset)
+        offset += LAYOUT.size
+    layout_scale = None
+    if version >= 4:
+        # float32 存储，还原成录制时 config 中的写法 (1.5 而不是 1.5000000xxx)
+        layout_scale = round(SCALE.unpack_from(data, offset)[0], 4)
+        offset += SCALE.size
+
+    events = []
+    expected = None
+    end_tick = 0
+    while offset + EVENT.size <= len(data):
+        record = EVENT.unpack_from(data, offset)
+        offset += EVENT.size
+        if record[1] == EVENT_END:
+            end_tick = record[0]
+            if offset + OUTCOME.size <= len(data):
+                expected = OUTCOME.unpack_from(data, offset)
+            break
+        events.append(record)
+        end_tick = max(end_tick, record[0])
+    return Recording(seed, start_level, fps, events, end_tick, expected, num_spots, spot_columns, layout_scale)
@@ -0,0 +1,189 @@
+# game_logic/replay.py
+"""输入录像与确定性回放 (录像文件格式见 recording.py)
+
+回放时把事件按帧号重新送入游戏的 handle_event()，并按帧调用 update_game()，
+不需要显示器、不限帧率，可以在几秒内回放上百局并比对结果。
+"""
+
+import hashlib
+import json
+
+import pygame
+
+from config import LAYOUT_SCALE
+from . import runtime
+from .recording import (
+    FORMAT_VERSION, HEADER, LAYOUT, MAGIC, EVENT, OUTCOME, SCALE, EVENT_END, EVENT_MOUSE_DOWN, EVENT_MOUSE_UP,
+    EVENT_QUIT, EVENT_MOUSE_WHEEL,
+)
+from .snapshot import take_snapshot, restore_snapshot
+
+_KIND_BY_PYGAME_TYPE = {
+    pygame.MOUSEBUTTONDOWN: EVENT_MOUSE_DOWN,
+    pygame.MOUSEBUTTONUP: EVENT_MOUSE_UP,
+    pygame.QUIT: EVENT_QUIT,
+    pygame.MOUSEWHEEL: EVENT_MOUSE_WHEEL,
+}
+
+
+class OutcomeTracker:
+    """在每个逻辑帧之后观察游戏状态，记录订单和每局结果，用于比对两次运行是否一致"""
+
+    def __init__(self):
+        self.orders = []  # [帧号, 顾客位, 寿司, 饮品]
+        self.rounds = []  # [关卡, 小费, 目标, 是否通过]
+        self._last_orders = {}
+        self._last_phase = ""
+
+    def observe(self, game):
+        for customer in game.customers:
+            order = customer.order
+            if order is not None and self._last_orders.get(customer.spot_index) is not order:
+                self.orders.append([runtime.logic_tick, customer.spot_index,
+                                    order["sushi"], order["drink"]])
+            self._last_orders[customer.spot_index] = order
+
+        phase = game.game_over_phase
+        if phase == "showing_result" and self._last_phase != "showing_result":
+            passed = game.total_tips >= game.current_target_tips
+            self.rounds.append([game.current_level, game.total_tips,
+                                game.current_target_tips, passed])
+        self._last_phase = phase
+
+    def summary(self, game):
+        return {
+            "total_tips": game.total_tips,
+            "level": game.current_level,
+            "rounds": self.rounds,
+            "orders": self.orders,
+        }
+
+
+def outcome_digest(outcome):
+    """结果的 16 字节摘要，用于快速比对"""
+    canonical = json.dumps(outcome, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode(), digest_size=16).digest()
+
+
+class SessionRecorder:
+    """把随机种子和每个输入事件 (连同逻辑帧号) 写入录像文件"""
+
+    def __init__(self, path, seed, start_level, fps, num_spots, spot_columns=None):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, FORMAT_VERSION, fps, seed, start_level))
+        self.file.write(LAYOUT.pack(num_spots, spot_columns or 0))
+        self.file.write(SCALE.pack(LAYOUT_SCALE))
+        self.tracker = OutcomeTracker()
+        self.event_count = 0
+
+    def record_event(self, tick, event):
+        kind = _KIND_BY_PYGAME_TYPE.get(event.type)
+        if kind is None:
+            return
+        if kind == EVENT_MOUSE_WHEEL:
+            x, y = event.x, event.y
+        else:
+            x, y = getattr(event, "pos", (0, 0))
+        self.file.write(EVENT.pack(tick, kind, getattr(event, "button", 0), x, y))
+        self.event_count += 1
+
+    def observe(self, game):
+        self.tracker.observe(game)
+
+    def close(self, game):
+        """写入结束标记和本次的结果摘要"""
+        outcome = self.tracker.summary(game)
+        self.file.write(EVENT.pack(runtime.logic_tick, EVENT_END, 0, 0, 0))
+        self.file.write(OUTCOME.pack(outcome["total_tips"], outcome["level"],
+                                     len(outcome["orders"]), outcome_digest(outcome)))
+        self.file.close()
+        print(f"录像已保存: {self.path} ({self.event_count} 个事件, {runtime.logic_tick} 帧)")
+
+
+def _to_pygame_event(record):
+    _, kind, button, x, y = record
+    if kind == EVENT_MOUSE_DOWN:
+        return pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=button, pos=(x, y))
+    if kind == EVENT_MOUSE_UP:
+        return pygame.event.Event(pygame.MOUSEBUTTONUP, button=button, pos=(x, y))
+    if kind == EVENT_MOUSE_WHEEL:
+        return pygame.event.Event(pygame.MOUSEWHEEL, x=x, y=y)
+    return pygame.event.Event(pygame.QUIT)
+
+
+def replay_session(game, recording, render=False, capture=None):
+    """在 game (已加载的游戏引擎) 上不限速地回放一段录像，返回结果字典。
+    capture (capture.FrameCapture) 不为 None 时绘制每一帧并交给它录制"""
+    render = render or capture is not None
+    game.begin_session(recording.seed, recording.start_level)
+    tracker = OutcomeTracker()
+    events_by_tick = recording.events_by_tick()
+    mouse_pos = (0, 0)
+    for tick in range(recording.end_tick):
+        for record in events_by_tick.get(tick, ()):
+            event = _to_pygame_event(record)
+            if hasattr(event, "pos"):
+                mouse_pos = event.pos
+            game.handle_event(event)
+        game.update_game()
+        tracker.observe(game)
+        runtime.advance_tick()
+        if render:
+            surface = game.render_surface()
+            game.draw_frame(surface, mouse_pos)
+            if capture is not None:
+                capture.submit(surface)
+    # 录制结束帧上的事件 (通常是退出) 在最后处理
+    for record in events_by_tick.get(recording.end_tick, ()):
+        game.handle_event(_to_pygame_event(record))
+    return tracker.summary(game)
+
+
+class ReplayCursor:
+    """可在录像中任意定位的回放游标
+
+    向前回放时每隔 checkpoint_interval 帧保存一个状态快照；
+    定位到某一帧时，从不晚于该帧的最近快照恢复，只需回放剩余的几帧。
+    任意时刻都可以 take_snapshot() 并从该状态分叉出新的模拟。
+    """
+
+    def __init__(self, game, recording, checkpoint_interval=300):
+        self.game = game
+        self.recording = recording
+        self.checkpoint_interval = checkpoint_interval
+        self.events_by_tick = recording.events_by_tick()
+        self.checkpoints = {}  # 帧号 -> 快照
+        game.begin_session(recording.seed, recording.start_level)
+        self.checkpoints[0] = take_snapshot(game)
+
+    @property
+    def tick(self):
+        return runtime.logic_tick
+
+    def step(self):
+        """回放一帧：处理该帧的输入事件并更新游戏逻辑"""
+        for record in self.events_by_tick.get(runtime.logic_tick, ()):
+            self.game.handle_event(_to_pygame_event(record))
+        self.game.update_game()
+        runtime.advance_tick()
+        if runtime.logic_tick % self.checkpoint_interval == 0:
+            self.checkpoints.setdefault(runtime.logic_tick, take_snapshot(self.game))
+
+    def seek(self, tick):
+        """定位到指定帧 (该帧的输入尚未处理)"""
+        tick = max(0, min(tick, self.recording.end_tick))
+        if tick < runtime.logic_tick or tick - runtime.logic_tick > self.checkpoint_interval:
+            nearest = max(t for t in self.checkpoints if t <= tick)
+            if nearest > runtime.logic_tick or tick < runtime.logic_tick:
+                restore_snapshot(self.game, self.checkpoints[nearest])
+        while runtime.logic_tick < tick:
+            self.step()
+        return runtime.logic_tick
+
+
+def check_outcome(recording, outcome):
+    """比对回放结果与录制时的结果摘要；录像没有结果时返回 None"""
+    if recording.expected is None:
+        return None
+    return recording.expected[3] == outcome_digest(outcome)
@@ -0,0 +1,80 @@
+# game_logic/runtime.py
+"""游戏运行时的共享状态：逻辑时钟和随机数生成器。
+
+游戏逻辑统一从这里取时间和随机数，而不是直接调用 pygame.time.get_ticks()
+和全局 random，这样同一个种子加同一串输入就能得到完全相同的一局游戏
+(录像回放、快照、机器人对局都依赖这一点)。
+
+- 逻辑时钟按固定步长前进：每个逻辑帧 (tick) 对应 1000 / FPS 毫秒。
+- 每个逻辑帧开始时，随机数生成器由 (种子, 帧号) 重新派生，
+  因此任意一帧的随机数状态只由种子和帧号决定。
+"""
+
+import random
+
+from config import FPS
+
+rng = random.Random()
+seed_value = 0
+logic_tick = 0
+
+
+def ticks_to_ms(tick):
+    """逻辑帧号转换为游戏毫秒数"""
+    return tick * 1000 // FPS
+
+
+def get_ticks():
+    """当前游戏时间 (毫秒)，取代 pygame.time.get_ticks()"""
+    return ticks_to_ms(logic_tick)
+
+
+def _reseed():
+    rng.seed(seed_value * 1_000_003 + logic_tick)
+
+
+def seed(value, tick=0):
+    """设置种子并把逻辑时钟拨到指定帧"""
+    global seed_value, logic_tick
+    seed_value = value
+    logic_tick = tick
+    _reseed()
+
+
+def set_tick(tick):
+    """把逻辑时钟拨到指定帧 (用于恢复快照)"""
+    global logic_tick
+    logic_tick = tick
+    _reseed()
+
+
+def advance_tick():
+    """逻辑时钟前进一帧"""
+    global logic_tick
+    logic_tick += 1
+    _reseed()
+
+
+def new_seed():
+    """为新的一局生成一个随机种子 (来自系统随机源)"""
+    return random.SystemRandom().getrandbits(32)
+
+
+class FixedStepClock:
+    """把真实经过的毫秒数累积为固定步长的逻辑帧数"""
+
+    def __init__(self, fps=FPS, max_steps_per_frame=5):
+        self.step_ms = 1000 / fps
+        self.max_steps_per_frame = max_steps_per_frame  # 防止卡顿后一次追赶太多帧
+        self.accumulator_ms = 0.0
+
+    def add_frame_time(self, elapsed_ms):
+        """累积一帧的真实耗时，返回这一帧需要执行的逻辑步数"""
+        self.accumulator_ms += elapsed_ms
+        steps = int(self.accumulator_ms // self.step_ms)
+        if steps > self.max_steps_per_frame:
+            steps = self.max_steps_per_frame
+            self.accumulator_ms = 0.0
+        else:
+            self.accumulator_ms -= steps * self.step_ms
+        return steps
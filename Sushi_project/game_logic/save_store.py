@@ -0,0 +1,222 @@
+# game_logic/save_store.py
+"""存档：多个玩家档案，每个档案保存当前关卡和每关的最高小费
+
+- 原子写入：先写临时文件并 fsync，再用 os.replace 替换，写到一半崩溃也不会损坏旧存档。
+- 延迟写入：修改只更新内存并唤醒后台写线程，游戏主循环从不等待磁盘；
+  连续的多次修改会合并成一次写入。写盘失败时保留未写入的修改，按指数退避重试。
+- 存档位置：config.SAVE_DIR，未设置时使用系统的用户数据目录，不依赖当前工作目录。
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+SAVE_FORMAT_VERSION = 1
+DEFAULT_PROFILE = "玩家1"
+RETRY_INITIAL_SECONDS = 0.5  # 写盘失败后第一次重试的等待时间，之后每次加倍
+RETRY_MAX_SECONDS = 30.0
+CLOSE_ATTEMPTS = 3           # 关闭时最多再尝试写入的次数，每次等待不超过 RETRY_INITIAL_SECONDS (不长时间阻塞退出)
+
+
+def user_data_dir(app_name):
+    """各平台的用户数据目录"""
+    if sys.platform.startswith("win"):
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(base, app_name)
+
+
+def resolve_save_dir(save_dir, fallback_dir, app_name="sushi_project"):
+    """确定存档目录：优先 save_dir，否则用户数据目录；都不可写时退回 fallback_dir"""
+    for candidate in (save_dir, user_data_dir(app_name)):
+        if not candidate:
+            continue
+        try:
+            os.makedirs(candidate, exist_ok=True)
+        except OSError as e:
+            print(f"无法创建存档目录 {candidate}: {e}")
+            continue
+        if os.access(candidate, os.W_OK):
+            return candidate
+    return fallback_dir
+
+
+def write_atomic(path, data):
+    """把 data (bytes) 原子地写入 path"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SaveStore:
+    def __init__(self, path, legacy_paths=()):
+        self.path = path
+        self.profiles = {}   # 档案名 -> {"level": int, "best_tips": {关卡(str): 小费}}
+        self.active_profile = DEFAULT_PROFILE
+        self.write_count = 0
+        self.last_write_ms = 0.0
+        self.failed_writes = 0     # 写盘失败的累计次数
+        self.last_error = None     # 最近一次写盘失败的异常，写入成功后清除
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._version = 0         # 每次修改 +1
+        self._written_version = 0  # 已写入磁盘的版本
+        self._closing = False
+        self._retry_now = False    # flush() 要求跳过当前的退避等待，马上重试一次
+        self._load(legacy_paths)
+        self._thread = threading.Thread(target=self._writer, name="save-writer", daemon=True)
+        self._thread.start()
+
+    # --- 读取 ---
+    def _load(self, legacy_paths):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.profiles = data.get("profiles", {})
+                self.active_profile = data.get("active_profile", DEFAULT_PROFILE)
+            except (ValueError, OSError) as e:
+                # 原子写入下不应出现；保留损坏的文件以便排查，从空存档开始
+                print(f"存档 {self.path} 无法读取，已另存为 .corrupt 并重新开始: {e}")
+                try:
+                    os.replace(self.path, f"{self.path}.corrupt")
+                except OSError:
+                    pass
+        else:
+            self._import_legacy(legacy_paths)
+        self._profile(self.active_profile)
+
+    def _import_legacy(self, legacy_paths):
+        """旧版 save.dat 只保存一个关卡数：导入到默认档案"""
+        for legacy_path in legacy_paths:
+            try:
+                with open(legacy_path, "r") as f:
+                    level = int(f.read().strip())
+            except (OSError, ValueError):
+                continue
+            if level > 0:
+                self._profile(DEFAULT_PROFILE)["level"] = level
+                self._version += 1
+                print(f"已从旧存档 {legacy_path} 导入关卡 {level}")
+            return
+
+    def _profile(self, name):
+        return self.profiles.setdefault(name, {"level": 1, "best_tips": {}})
+
+    # --- 档案 ---
+    def select_profile(self, name):
+        """切换到指定档案 (不存在时新建)，返回该档案的当前关卡"""
+        with self._lock:
+            self.active_profile = name
+            profile = self._profile(name)
+            self._mark_dirty()
+            return profile["level"]
+
+    def profile_names(self):
+        with self._lock:
+            return list(self.profiles)
+
+    @property
+    def level(self):
+        with self._lock:
+            return self._profile(self.active_profile)["level"]
+
+    def best_tips(self, level, profile=None):
+        with self._lock:
+            return self._profile(profile or self.active_profile)["best_tips"].get(str(level))
+
+    # --- 修改 (只改内存，由后台线程写盘) ---
+    def set_level(self, level):
+        with self._lock:
+            self._profile(self.active_profile)["level"] = level
+            self._mark_dirty()
+
+    def record_round(self, level, tips):
+        """记录一局的结果；刷新最高小费时返回 True"""
+        with self._lock:
+            best = self._profile(self.active_profile)["best_tips"]
+            if tips <= best.get(str(level), -1):
+                return False
+            best[str(level)] = tips
+            self._mark_dirty()
+            return True
+
+    def _mark_dirty(self):
+        self._version += 1
+        self._wake.notify_all()
+
+    # --- 后台写线程 ---
+    def _serialize(self):
+        data = {"version": SAVE_FORMAT_VERSION, "active_profile": self.active_profile, "profiles": self.profiles}
+        return json.dumps(data, ensure_ascii=False, indent=1, sort_keys=True).encode("utf-8")
+
+    def _writer(self):
+        failures = 0        # 连续失败次数
+        close_attempts = 0  # 开始关闭后失败的次数
+        while True:
+            with self._lock:
+                while self._written_version == self._version and not self._closing:
+                    self._wake.wait()
+                if self._written_version == self._version and self._closing:
+                    return
+                version = self._version
+                data = self._serialize()
+                self._retry_now = False
+            start = time.perf_counter()
+            error = None
+            try:
+                write_atomic(self.path, data)
+            except OSError as e:
+                error = e
+            self.last_write_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.write_count += 1
+                if error is None:
+                    # 只有写入成功才推进已写入的版本，失败的修改留到下次重试
+                    if failures:
+                        print(f"存档已在重试 {failures} 次后写入 {self.path}")
+                    failures = 0
+                    self.last_error = None
+                    self._written_version = version
+                    self._wake.notify_all()
+                    continue
+                failures += 1
+                self.failed_writes += 1
+                self.last_error = error
+                self._wake.notify_all()  # 让 flush() 知道这次写入失败了
+                delay = min(RETRY_MAX_SECONDS, RETRY_INITIAL_SECONDS * 2 ** (failures - 1))
+                if self._closing:
+                    close_attempts += 1
+                    if close_attempts >= CLOSE_ATTEMPTS:
+                        print(f"无法保存存档到 {self.path}: {error}；放弃，最近的修改没有保存")
+                        return
+                    delay = min(delay, RETRY_INITIAL_SECONDS)
+                print(f"无法保存存档到 {self.path}: {error}；{delay:g}s 后重试")
+                closing = self._closing
+                self._wake.wait_for(lambda: self._retry_now or self._closing != closing, delay)
+
+    def flush(self, timeout=None):
+        """立即写入所有修改并等待完成：写入成功返回 True，写盘失败或超时返回 False"""
+        with self._lock:
+            failures = self.failed_writes
+            self._retry_now = True   # 正在退避等待的写线程马上重试
+            self._wake.notify_all()
+            self._wake.wait_for(lambda: self._written_version == self._version
+                                or self.failed_writes != failures, timeout)
+            return self._written_version == self._version
+
+    def close(self):
+        """写完剩余修改并停止写线程；全部写入成功返回 True"""
+        with self._lock:
+            self._closing = True
+            self._wake.notify_all()
+        self._thread.join()
+        return self._written_version == self._version
@@ -0,0 +1,467 @@
+# game_logic/scenes.py
+"""场景栈：开始界面、游戏中、时间到、结果界面各是一个场景对象
+
+游戏状态 (current_game_state / game_over_phase 等) 仍保存在游戏主模块上，
+这样快照恢复、录像回放和各种工具直接修改状态后，场景管理器会在下一次
+handle_click/update/draw 之前根据状态自动切换到对应的场景 (sync)。
+
+场景把逻辑上的状态转换 (重置一局、关卡 +1、存档) 放在 handle_click/update 中，
+enter() 只做表现层的事情 (切换音乐、播放提示音)，因此倒带到某个状态时不会重复执行逻辑。
+
+每个场景用 resource_loaders() 声明自己的资源，当前场景活跃时，管理器在后台线程
+预加载 next_scenes() 中列出的场景的资源，切换时资源已经在内存中，切换能在一帧内完成。
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from config import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, WHITE, BLACK, GOLD,
+    STATE_START_SCREEN, STATE_GAME_RUNNING, STATE_GAME_OVER,
+    START_SCREEN_BGM, GAME_RUNNING_BGM, UI_IMAGES_DIR,
+    TIMES_UP_IMG_FILENAME, TIMES_UP_IMAGE_SIZE, WIN_IMG_FILENAME, LOSE_IMG_FILENAME, WIN_LOSE_IMAGE_SIZE,
+    TIMES_UP_DISPLAY_DURATION_MS, GAME_DURATION_SECONDS,
+    NEW_CUSTOMER_SPAWN_DELAY_MIN_MS, NEW_CUSTOMER_SPAWN_DELAY_MAX_MS,
+    TIMER_ICON_POS, TIMER_ICON_SIZE, TIMER_TEXT_OFFSET_X, TIP_ICON_POS, TIP_ICON_SIZE, TIP_TEXT_OFFSET_X,
+    CUSTOMER_SPOT_COLOR_DEFAULT, CUSTOMER_SPOT_COLOR_EMPTY, CUSTOMER_SPOT_COLOR_WAITING,
+    CUSTOMER_SPOT_COLOR_HAPPY, CUSTOMER_SPOT_COLOR_ANGRY, CUSTOMER_SCROLLBAR_COLOR, px,
+)
+from . import quality, runtime
+from .sushi_elements import load_scaled_image, RiceContainer, ToppingContainer, DrinkDispenser
+
+
+def _centered_rect(image, center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)):
+    return image.get_rect(center=center) if image else pygame.Rect(0, 0, 0, 0)
+
+
+class Scene:
+    """场景基类。子类覆盖需要的方法即可"""
+
+    name = ""
+    opaque = True  # 不透明的场景会完全覆盖栈中它下面的场景
+
+    def __init__(self, game):
+        self.game = game        # 游戏主模块 (或具有相同属性的对象)
+        self.manager = None
+        self.resources = {}     # 预加载完成的资源
+
+    def resource_loaders(self):
+        """资源名 -> 无参加载函数；在后台线程中执行，结果存入 self.resources"""
+        return {}
+
+    def next_scenes(self):
+        """本场景活跃时预加载哪些场景的资源"""
+        return ()
+
+    def enter(self):
+        """成为栈顶场景时调用 (只做表现层的事情)"""
+
+    def exit(self):
+        """离开栈顶时调用"""
+
+    def handle_click(self, pos):
+        pass
+
+    def update(self, now):
+        """每个逻辑帧调用一次，now 为逻辑时钟毫秒数"""
+
+    def draw(self, surface, mouse_pos):
+        pass
+
+
+class SceneManager:
+    """管理场景栈，并在后台线程预加载下一个场景的资源"""
+
+    def __init__(self, game, scene_for_state):
+        self.game = game
+        # scene_for_state(game) -> 当前游戏状态对应的场景名
+        self.scene_for_state = scene_for_state
+        self.scenes = {}
+        self.stack = []
+        self._futures = {}   # 场景名 -> 资源加载的 Future
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scene-preload")
+        self.last_transition_ms = 0.0
+        self.preload_waits = 0  # 切换时资源尚未加载完、不得不等待的次数
+
+    def register(self, scene):
+        scene.manager = self
+        self.scenes[scene.name] = scene
+        return scene
+
+    @property
+    def current(self):
+        return self.stack[-1] if self.stack else None
+
+    # --- 资源预加载 ---
+    @staticmethod
+    def _load(scene):
+        resources = {name: loader() for name, loader in scene.resource_loaders().items()}
+        scene.resources.update(resources)
+        return scene.name
+
+    def preload(self, name):
+        """在后台线程加载场景资源 (已加载或正在加载时不重复)"""
+        if name not in self._futures:
+            self._futures[name] = self._worker.submit(self._load, self.scenes[name])
+
+    def load_all(self):
+        """同步加载全部场景的资源 (构建图集等工具使用)"""
+        for name in self.scenes:
+            self._ensure_loaded(name)
+
+    def _ensure_loaded(self, name):
+        if name not in self._futures:
+            self._load(self.scenes[name])  # 从未预加载：当场同步加载
+            self._futures[name] = None
+            return
+        future = self._futures[name]
+        if future is not None and not future.done():
+            self.preload_waits += 1
+            print(f"场景 {name} 的资源尚未预加载完成，等待中...")
+            future.result()
+
+    def reload_resources(self):
+        """重新加载已经加载过的场景资源 (热重载 config 后尺寸可能变了)，在后台线程中进行"""
+        loaded = list(self._futures)
+        for future in self._futures.values():
+            if future is not None:
+                future.result()
+        self._futures.clear()
+        for name in loaded:
+            self.preload(name)
+
+    def submit(self, func, *args):
+        """把磁盘写入等不影响游戏逻辑的慢操作交给后台线程，按提交顺序执行"""
+        return self._worker.submit(func, *args)
+
+    # --- 场景栈操作 ---
+    def _activate(self, scene):
+        for name in scene.next_scenes():
+            self.preload(name)
+        scene.enter()
+
+    def replace(self, name):
+        """用指定场景替换栈顶场景"""
+        start = time.perf_counter()
+        self._ensure_loaded(name)
+        if self.stack:
+            self.stack.pop().exit()
+        scene = self.scenes[name]
+        self.stack.append(scene)
+        self._activate(scene)
+        self.last_transition_ms = (time.perf_counter() - start) * 1000
+
+    def push(self, name):
+        """把场景压在当前场景之上 (例如暂停菜单)"""
+        self._ensure_loaded(name)
+        if self.stack:
+            self.stack[-1].exit()
+        scene = self.scenes[name]
+        self.stack.append(scene)
+        self._activate(scene)
+
+    def pop(self):
+        """弹出栈顶场景，回到下面的场景"""
+        scene = self.stack.pop()
+        scene.exit()
+        if self.stack:
+            self._activate(self.stack[-1])
+        return scene
+
+    def sync(self):
+        """栈底场景与游戏状态不一致时切换过去 (状态被场景、快照恢复或工具修改之后)"""
+        target = self.scene_for_state(self.game)
+        base = self.stack[0] if self.stack else None
+        if base is None or base.name != target:
+            while len(self.stack) > 1:
+                self.stack.pop().exit()
+            self.replace(target)
+
+    # --- 每帧调用 ---
+    def handle_click(self, pos):
+        self.sync()
+        self.current.handle_click(pos)
+        self.sync()
+
+    def update(self, now):
+        self.sync()
+        self.current.update(now)
+        self.sync()
+
+    def draw(self, surface, mouse_pos):
+        self.sync()
+        first = len(self.stack) - 1
+        while first > 0 and not self.stack[first].opaque:
+            first -= 1
+        for scene in self.stack[first:]:
+            scene.draw(surface, mouse_pos)
+
+    def shutdown(self):
+        self._worker.shutdown(wait=True, cancel_futures=True)
+
+
+# --- 游戏的四个场景 ---
+
+def scene_for_state(game):
+    if game.current_game_state == STATE_START_SCREEN:
+        return StartScene.name
+    if game.current_game_state == STATE_GAME_RUNNING:
+        return RunningScene.name
+    if game.game_over_phase == "showing_times_up":
+        return TimesUpScene.name
+    return ResultScene.name
+
+
+def draw_round_hud(game, surface):
+    """餐厅背景上的计时器、小费和关卡数 (游戏中和时间到画面共用)"""
+    if game.global_timer_icon_image:
+        surface.blit(game.global_timer_icon_image, TIMER_ICON_POS)
+    minutes = max(0, game.remaining_time // 60)
+    seconds = max(0, game.remaining_time % 60)
+    timer_surf = game.small_font.render(f"{minutes:02}:{seconds:02}", quality.settings.text_antialias, BLACK)
+    timer_text_rect = timer_surf.get_rect(midleft=(
+        TIMER_ICON_POS[0] + TIMER_ICON_SIZE[0] + TIMER_TEXT_OFFSET_X, TIMER_ICON_POS[1] + TIMER_ICON_SIZE[1] // 2))
+    surface.blit(timer_surf, timer_text_rect)
+
+    if game.tip_icon_image:
+        surface.blit(game.tip_icon_image, TIP_ICON_POS)
+    tip_surf = game.small_font.render(f"{game.total_tips} / {game.current_target_tips}", quality.settings.text_antialias, GOLD)
+    tip_text_rect = tip_surf.get_rect(midleft=(
+        TIP_ICON_POS[0] + TIP_ICON_SIZE[0] + TIP_TEXT_OFFSET_X, TIP_ICON_POS[1] + TIP_ICON_SIZE[1] // 2))
+    surface.blit(tip_surf, tip_text_rect)
+
+    level_text_surf = game.custom_font.render(f"关卡: {game.current_level}", quality.settings.text_antialias, BLACK)
+    surface.blit(level_text_surf, level_text_surf.get_rect(center=(SCREEN_WIDTH // 2, px(40))))
+
+
+class StartScene(Scene):
+    name = "start"
+
+    def resource_loaders(self):
+        return {"bgm": lambda: self.game.audio.load_music(START_SCREEN_BGM)}
+
+    def next_scenes(self):
+        return (RunningScene.name,)
+
+    def enter(self):
+        self.game.play_bgm(START_SCREEN_BGM)
+
+    def handle_click(self, pos):
+        game = self.game
+        if game.start_button_rect.collidepoint(pos):
+            game.reset_game_state()
+            game.current_game_state = STATE_GAME_RUNNING
+        elif game.reset_button_rect and game.reset_button_rect.collidepoint(pos):
+            # 点击 "重置" 按钮：回到第一关
+            game.current_level = 1
+            game.save_level(game.current_level)
+            game.reset_game_state()
+            game.current_game_state = STATE_GAME_RUNNING
+
+    def draw(self, surface, mouse_pos):
+        game = self.game
+        surface.fill(WHITE)
+        surface.blit(game.start_background_image, (0, 0))
+        surface.blit(game.start_button_image, game.start_button_rect)
+        if game.reset_button_image:
+            surface.blit(game.reset_button_image, game.reset_button_rect)
+        # 在开始界面也显示当前关卡
+        level_text_start = game.custom_font.render(f"当前挑战: 第 {game.current_level} 关", quality.settings.text_antialias, BLACK)
+        surface.blit(level_text_start, level_text_start.get_rect(
+            center=(SCREEN_WIDTH // 2, game.start_button_rect.top + px(130))))
+
+
+class RunningScene(Scene):
+    name = "running"
+
+    def resource_loaders(self):
+        return {"bgm": lambda: self.game.audio.load_music(GAME_RUNNING_BGM)}
+
+    def next_scenes(self):
+        return (TimesUpScene.name, ResultScene.name)
+
+    def enter(self):
+        self.game.play_bgm(GAME_RUNNING_BGM)
+
+    def handle_click(self, pos):
+        game = self.game
+        player_h, cutting_b = game.player_h, game.cutting_b
+        if player_h.is_holding:
+            # 由布局直接算出点中的顾客位 (只有视口内的顾客位能被点中)
+            spot_index = game.spot_layout.spot_at(pos)
+            if spot_index is not None:
+                customer_at_spot = game.get_customer_at_spot(spot_index)
+                if customer_at_spot and customer_at_spot.state == "waiting" and not customer_at_spot.order_fulfilled:
+                    category, key = player_h.drop_item()
+                    if category and key:
+                        game.total_tips += customer_at_spot.receive_item(item_category=category, item_key=key)
+            return
+
+        for element in game.interactive_elements:
+            if element.is_clicked(pos):
+                if isinstance(element, RiceContainer):
+                    cutting_b.add_rice()
+                elif isinstance(element, ToppingContainer):
+                    cutting_b.add_topping(element.topping_key)
+                elif isinstance(element, DrinkDispenser):
+                    player_h.pickup_drink(element.drink_key)
+                return
+        if cutting_b.rect.collidepoint(pos) and cutting_b.is_complete():
+            sushi_to_pickup = cutting_b.get_sushi_name()
+            if sushi_to_pickup and player_h.pickup_sushi(sushi_to_pickup):
+                cutting_b.clear()
+
+    def update(self, now):
+        game = self.game
+        elapsed_seconds = (now - game.game_start_time) // 1000
+        game.remaining_time = max(0, GAME_DURATION_SECONDS - elapsed_seconds)
+        times_up = game.remaining_time <= 0
+        if times_up:
+            game.current_game_state = STATE_GAME_OVER
+            game.game_over_phase = "showing_times_up"
+            game.game_over_transition_timer = now
+            game.finish_round_gc()
+
+        for i, customer in enumerate(game.customers):
+            if customer.state != "empty":
+                if customer.update() and not times_up:
+                    game.last_customer_spawn_time[i] = now
+
+        if not times_up:
+            for i, customer in enumerate(game.customers):
+                if customer.state == "empty":
+                    spawn_delay = runtime.rng.randint(
+                        NEW_CUSTOMER_SPAWN_DELAY_MIN_MS, NEW_CUSTOMER_SPAWN_DELAY_MAX_MS)
+                    if now - game.last_customer_spawn_time[i] > spawn_delay:
+                        if customer.generate_order():
+                            game.last_customer_spawn_time[i] = now
+
+        if times_up:
+            game.log_round_end()
+
+    def draw(self, surface, mouse_pos):
+        game = self.game
+        surface.fill(WHITE)
+        surface.blit(game.restaurant_background_image, (0, 0))
+        for element in game.interactive_elements:
+            element.draw(surface, game.custom_font)
+        game.cutting_b.draw(surface, game.custom_font)
+        spot_colors = {"empty": CUSTOMER_SPOT_COLOR_EMPTY, "waiting": CUSTOMER_SPOT_COLOR_WAITING,
+                       "happy": CUSTOMER_SPOT_COLOR_HAPPY, "angry": CUSTOMER_SPOT_COLOR_ANGRY}
+        # 顾客区：只绘制与视口相交的顾客位，并裁剪到视口内
+        layout = game.spot_layout
+        visible = layout.visible_indices()
+        previous_clip = surface.get_clip()
+        surface.set_clip(layout.viewport.clip(previous_clip))
+        for i in visible:
+            spot_rect = layout.screen_rect(i)
+            customer = game.get_customer_at_spot(i)
+            color_to_fill = CUSTOMER_SPOT_COLOR_DEFAULT
+            if customer:
+                color_to_fill = spot_colors.get(customer.state, CUSTOMER_SPOT_COLOR_DEFAULT)
+            if quality.settings.spot_alpha:
+                temp_surface = pygame.Surface(spot_rect.size, pygame.SRCALPHA)
+                temp_surface.fill(color_to_fill)
+                surface.blit(temp_surface, spot_rect.topleft)
+            else:  # 画质降级：只画不透明的边框，省去 alpha 混合
+                pygame.draw.rect(surface, color_to_fill[:3], spot_rect, px(2))
+        for i in visible:
+            game.customers[i].draw(surface, layout.offset)
+        layout.draw_scrollbar(surface, CUSTOMER_SCROLLBAR_COLOR, px(6))
+        surface.set_clip(previous_clip)
+        game.player_h.draw(surface, mouse_pos, font_for_hud=game.small_font, hud_position=(px(20), SCREEN_HEIGHT - px(50)))
+        draw_round_hud(game, surface)
+
+
+class TimesUpScene(Scene):
+    name = "times_up"
+
+    def resource_loaders(self):
+        return {"image": lambda: load_scaled_image(TIMES_UP_IMG_FILENAME, TIMES_UP_IMAGE_SIZE,
+                                                   directory=UI_IMAGES_DIR)}
+
+    def next_scenes(self):
+        return (ResultScene.name, StartScene.name)
+
+    def enter(self):
+        self.game.stop_bgm()
+        self.game.audio.play("time_over")
+
+    def update(self, now):
+        game = self.game
+        if now - game.game_over_transition_timer <= TIMES_UP_DISPLAY_DURATION_MS:
+            return
+        game.game_over_phase = "showing_result"
+        if not game.result_sound_played:
+            # 检查胜利条件：胜利则关卡 +1 并存档；失败关卡不变
+            game.record_round(game.current_level, game.total_tips)
+            if game.total_tips >= game.current_target_tips:
+                game.current_level += 1
+                game.save_level(game.current_level)
+            game.result_sound_played = True
+
+    def draw(self, surface, mouse_pos):
+        game = self.game
+        surface.fill(WHITE)
+        surface.blit(game.restaurant_background_image, (0, 0))
+        draw_round_hud(game, surface)
+        image = self.resources.get("image")
+        times_up_rect = _centered_rect(image)
+        if image:
+            surface.blit(image, times_up_rect)
+        wait_text = game.small_font.render("计算结果中...", quality.settings.text_antialias, BLACK)
+        surface.blit(wait_text, wait_text.get_rect(center=(
+            SCREEN_WIDTH // 2, times_up_rect.bottom + px(30) if times_up_rect.height > 0 else SCREEN_HEIGHT // 2 + px(50))))
+
+
+class ResultScene(Scene):
+    name = "result"
+
+    def resource_loaders(self):
+        return {
+            "win": lambda: load_scaled_image(WIN_IMG_FILENAME, WIN_LOSE_IMAGE_SIZE, directory=UI_IMAGES_DIR),
+            "lose": lambda: load_scaled_image(LOSE_IMG_FILENAME, WIN_LOSE_IMAGE_SIZE, directory=UI_IMAGES_DIR),
+        }
+
+    def next_scenes(self):
+        return (StartScene.name, RunningScene.name)
+
+    def _won(self):
+        return self.game.total_tips >= self.game.current_target_tips
+
+    def enter(self):
+        self.game.audio.play("win" if self._won() else "lose")
+
+    def handle_click(self, pos):
+        self.game.current_game_state = STATE_START_SCREEN
+        self.game.result_sound_played = False
+
+    def draw(self, surface, mouse_pos):
+        game = self.game
+        surface.fill(WHITE)
+        surface.blit(game.restaurant_background_image, (0, 0))
+        if self._won():
+            image = self.resources.get("win")
+            message = f"胜利! 进入第 {game.current_level} 关! 点击继续."
+        else:
+            image = self.resources.get("lose")
+            message = f"失败! 再挑战一次第 {game.current_level} 关. 点击重试."
+
+        msg_surf = game.custom_font.render(message, quality.settings.text_antialias, BLACK)
+        if image:
+            result_rect = _centered_rect(image)
+            surface.blit(image, result_rect)
+            msg_rect = msg_surf.get_rect(center=(SCREEN_WIDTH // 2, result_rect.bottom + px(40)))
+        else:
+            msg_rect = msg_surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + px(100)))
+        surface.blit(msg_surf, msg_rect)
+
+
+def create_scene_manager(game):
+    """创建并注册游戏的四个场景"""
+    manager = SceneManager(game, scene_for_state)
+    for scene_class in (StartScene, RunningScene, TimesUpScene, ResultScene):
+        manager.register(scene_class(game))
+    return manager
@@ -0,0 +1,208 @@
+# game_logic/snapshot.py
+"""紧凑的游戏状态快照
+
+把分散在 main.py 全局变量和 Customer / CuttingBoard / PlayerHand 对象里的
+全部可变状态打包成一个定长的二进制结构 (标准 3 个顾客位约 140 字节)，
+可以每个逻辑帧都存入环形缓冲区，并随时原样恢复：
+用于倒带调试、在长录像中快速定位，以及从一局中途分叉出新的模拟。
+
+随机数生成器的状态不需要保存：它在每个逻辑帧由 (种子, 帧号) 重新派生 (见 runtime.py)。
+快照不包含纯表现层的状态 (正在播放的音乐等)。
+"""
+
+import struct
+
+from config import (
+    SUSHI_TYPES, DRINK_TYPES, TOPPINGS,
+    STATE_START_SCREEN, STATE_GAME_RUNNING, STATE_GAME_OVER,
+)
+from . import runtime
+
+MAGIC = b"SNP2"
+
+GAME_STATES = (STATE_START_SCREEN, STATE_GAME_RUNNING, STATE_GAME_OVER)
+GAME_OVER_PHASES = ("", "showing_times_up", "showing_result")
+CUSTOMER_STATES = ("empty", "waiting", "happy", "angry")
+HAND_CATEGORIES = (None, "sushi", "drink")
+SUSHI_KEYS = (None,) + tuple(SUSHI_TYPES)
+DRINK_KEYS = (None,) + tuple(DRINK_TYPES)
+TOPPING_KEYS = (None,) + tuple(TOPPINGS)
+
+NO_TICKS = -(2 ** 31)  # 表示 None 的计时值
+
+# 魔数, 帧号, 种子, 关卡, 目标小费, 开局时刻, 剩余秒数, 总小费, 游戏状态, 结束阶段,
+# 结束过渡计时, 结果音效已播放, 菜板有米饭, 菜板配料, 手持类别, 手持物品, 顾客数,
+# 顾客区横向 / 纵向滚动偏移 (影响点击命中哪个顾客位，所以也是状态的一部分)
+GAME_STRUCT = struct.Struct("<4sIQIiihiBBi??BBBHii")
+# 下次生成计时, 状态, 订单寿司, 订单饮品, 订单已结束, 已收寿司, 已收饮品,
+# 离开计时, 离开延迟, 订单计时, 订单剩余秒数, 动画帧, 动画计时
+CUSTOMER_STRUCT = struct.Struct("<iBBB?BBiHihBi")
+
+
+def _ticks_or_none(value):
+    return None if value == NO_TICKS else value
+
+
+def _none_to_ticks(value):
+    return NO_TICKS if value is None else int(value)
+
+
+def snapshot_size(num_customers):
+    return GAME_STRUCT.size + CUSTOMER_STRUCT.size * num_customers
+
+
+def _board_message(board):
+    if board.topping_key:
+        return f"米饭 + {TOPPINGS[board.topping_key]['name']}"
+    if board.has_rice:
+        return "米饭已放上"
+    return "菜板 (空)"
+
+
+def pack_snapshot_into(buffer, offset, game):
+    """把 game (游戏主模块或具有相同属性的对象) 的当前状态写入 buffer[offset:]"""
+    hand = game.player_h
+    hand_keys = SUSHI_KEYS if hand.held_item_category == "sushi" else DRINK_KEYS
+    GAME_STRUCT.pack_into(
+        buffer, offset, MAGIC,
+        runtime.logic_tick, runtime.seed_value,
+        game.current_level, game.current_target_tips, game.game_start_time,
+        game.remaining_time, game.total_tips,
+        GAME_STATES.index(game.current_game_state),
+        GAME_OVER_PHASES.index(game.game_over_phase),
+        game.game_over_transition_timer, game.result_sound_played,
+        game.cutting_b.has_rice, TOPPING_KEYS.index(game.cutting_b.topping_key),
+        HAND_CATEGORIES.index(hand.held_item_category),
+        hand_keys.index(hand.held_item_key) if hand.is_holding else 0,
+        len(game.customers), game.spot_layout.scroll_x, game.spot_layout.scroll_y)
+    offset += GAME_STRUCT.size
+    for i, customer in enumerate(game.customers):
+        order = customer.order or {}
+        CUSTOMER_STRUCT.pack_into(
+            buffer, offset,
+            game.last_customer_spawn_time[i],
+            CUSTOMER_STATES.index(customer.state),
+            SUSHI_KEYS.index(order.get("sushi")), DRINK_KEYS.index(order.get("drink")),
+            customer.order_fulfilled,
+            SUSHI_KEYS.index(customer.sushi_received_key),
+            DRINK_KEYS.index(customer.drink_received_key),
+            _none_to_ticks(customer.departure_timer_start), customer.leave_delay,
+            _none_to_ticks(customer.order_timer_start_ticks), customer.order_remaining_seconds,
+            customer.current_animation_frame_index, customer.last_animation_update_time)
+        offset += CUSTOMER_STRUCT.size
+
+
+def take_snapshot(game):
+    """返回当前状态的快照 (bytes)"""
+    buffer = bytearray(snapshot_size(len(game.customers)))
+    pack_snapshot_into(buffer, 0, game)
+    return bytes(buffer)
+
+
+def snapshot_tick(data, offset=0):
+    """不完整解包，只读出快照的帧号"""
+    return GAME_STRUCT.unpack_from(data, offset)[1]
+
+
+def restore_snapshot(game, data, offset=0):
+    """把快照恢复到 game 上 (包括逻辑时钟和随机数状态)"""
+    (magic, tick, seed, level, target, start_time, remaining, tips, state, phase,
+     transition_timer, result_played, has_rice, topping, hand_category, hand_key,
+     num_customers, scroll_x, scroll_y) = GAME_STRUCT.unpack_from(data, offset)
+    if magic != MAGIC:
+        raise ValueError("不是有效的游戏状态快照")
+    if num_customers != len(game.customers):
+        raise ValueError(f"快照中有 {num_customers} 个顾客位，当前游戏有 {len(game.customers)} 个")
+
+    runtime.seed(seed, tick)
+    game.current_level = level
+    game.current_target_tips = target
+    game.game_start_time = start_time
+    game.remaining_time = remaining
+    game.total_tips = tips
+    game.current_game_state = GAME_STATES[state]
+    game.game_over_phase = GAME_OVER_PHASES[phase]
+    game.game_over_transition_timer = transition_timer
+    game.result_sound_played = result_played
+    game.spot_layout.scroll_to_offset(scroll_x, scroll_y)
+
+    board = game.cutting_b
+    board.has_rice = has_rice
+    board.topping_key = TOPPING_KEYS[topping]
+    board.message = _board_message(board)
+
+    hand = game.player_h
+    hand.drop_item()
+    category = HAND_CATEGORIES[hand_category]
+    if category == "sushi":
+        hand.pickup_sushi(SUSHI_KEYS[hand_key])
+    elif category == "drink":
+        hand.pickup_drink(DRINK_KEYS[hand_key])
+
+    offset += GAME_STRUCT.size
+    for i, customer in enumerate(game.customers):
+        (spawn_time, c_state, order_sushi, order_drink, fulfilled, sushi_recv, drink_recv,
+         departure, leave_delay, order_start, order_remaining, frame_index,
+         frame_time) = CUSTOMER_STRUCT.unpack_from(data, offset)
+        offset += CUSTOMER_STRUCT.size
+
+        game.last_customer_spawn_time[i] = spawn_time
+        customer.state = CUSTOMER_STATES[c_state]
+        if order_sushi or order_drink:
+            customer.order = {"sushi": SUSHI_KEYS[order_sushi], "drink": DRINK_KEYS[order_drink]}
+        else:
+            customer.order = None
+        customer.order_fulfilled = fulfilled
+        customer.sushi_received_key = SUSHI_KEYS[sushi_recv]
+        customer.drink_received_key = DRINK_KEYS[drink_recv]
+        customer.departure_timer_start = _ticks_or_none(departure)
+        customer.leave_delay = leave_delay
+        customer.order_timer_start_ticks = _ticks_or_none(order_start)
+        customer.order_remaining_seconds = order_remaining
+        customer.current_animation_frame_index = frame_index
+        customer.last_animation_update_time = frame_time
+        frames = customer.animation_frames.get(customer.state)
+        customer.current_image = frames[frame_index % len(frames)] if frames else None
+
+
+class SnapshotRing:
+    """定长快照的环形缓冲区：预先分配一整块内存，每帧写入一个快照，不产生新的分配"""
+
+    def __init__(self, capacity, num_customers):
+        self.capacity = capacity
+        self.slot_size = snapshot_size(num_customers)
+        self.buffer = bytearray(self.capacity * self.slot_size)
+        self.count = 0  # 当前保存的快照数
+        self.head = 0   # 下一个写入位置
+
+    def push(self, game):
+        pack_snapshot_into(self.buffer, self.head * self.slot_size, game)
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def _slot_offset(self, steps_back):
+        """steps_back=0 表示最新的快照"""
+        index = (self.head - 1 - steps_back) % self.capacity
+        return index * self.slot_size
+
+    def rewind(self, game, steps_back):
+        """恢复到 steps_back 个快照之前的状态，并丢弃比它新的快照；返回恢复到的帧号"""
+        if self.count == 0:
+            return None
+        steps_back = min(steps_back, self.count - 1)
+        offset = self._slot_offset(steps_back)
+        restore_snapshot(game, self.buffer, offset)
+        self.head = (self.head - steps_back) % self.capacity
+        self.count -= steps_back
+        return runtime.logic_tick
+
+    def get(self, steps_back=0):
+        """取出一个快照的副本 (bytes)，可保存到文件或用于分叉模拟"""
+        if not 0 <= steps_back < self.count:
+            return None
+        offset = self._slot_offset(steps_back)
+        return bytes(self.buffer[offset:offset + self.slot_size])
+
+    def clear(self):
+        self.count = 0
+        self.head = 0
@@ -0,0 +1,146 @@
+# game_logic/spot_layout.py
+"""顾客位布局：按网格生成任意数量的顾客位，顾客区是一个可滚动的视口
+
+顾客位的矩形 (game.customer_spot_rects、Customer.rect) 都是"世界坐标"，
+画到屏幕上时减去滚动偏移。布局是规则网格 (columns 为 None 时所有顾客位排成一行，
+即可横向滚动的长柜台)，所以可见范围和点击命中都能直接算出行列号，
+不需要遍历全部顾客位：几百个座位的宴会关卡，绘制和点击检测的开销只与可见的座位数有关。
+
+顾客在顾客位上方还会画出顾客图片、订单气泡和计时器，它们超出顾客位矩形的部分
+用 margin (左, 上, 右, 下) 描述，判断一个顾客位是否可见时按扩展后的范围计算。
+"""
+
+import pygame
+
+
+class SpotLayout:
+    def __init__(self, count, columns, origin, step, spot_size, viewport, margin=(0, 0, 0, 0),
+                 scroll_step=60, padding=20):
+        self.count = count
+        self.columns = max(1, min(columns or count, count)) if count else 1
+        self.rows = -(-count // self.columns) if count else 0
+        self.origin = origin            # 第一个顾客位的左上角 (世界坐标)
+        self.step = step                # 相邻两列、两行顾客位之间的距离
+        self.spot_size = spot_size
+        self.viewport = pygame.Rect(viewport)  # 顾客区在屏幕上的范围
+        self.margin = margin
+        self.scroll_step = scroll_step  # 鼠标滚轮每格滚动的像素
+        self.padding = padding          # 滚动到最远处时内容与视口边缘的间距
+        self.scroll_x = 0
+        self.scroll_y = 0
+        self.spot_rects = [pygame.Rect(self.spot_position(i), spot_size) for i in range(count)]
+        self._update_limits()
+
+    def spot_position(self, index):
+        row, col = divmod(index, self.columns)
+        return (self.origin[0] + col * self.step[0], self.origin[1] + row * self.step[1])
+
+    def set_margin(self, margin):
+        """设置顾客位矩形之外的绘制范围 (加载顾客图片后由引擎调用)"""
+        self.margin = margin
+        self._update_limits()
+
+    # --- 滚动 ---
+    def _update_limits(self):
+        left, top, right, bottom = self.margin
+        content_right = self.origin[0] + (self.columns - 1) * self.step[0] + self.spot_size[0] + right
+        content_bottom = self.origin[1] + (self.rows - 1) * self.step[1] + self.spot_size[1] + bottom
+        self.max_scroll_x = max(0, content_right + self.padding - self.viewport.right)
+        self.max_scroll_y = max(0, content_bottom + self.padding - self.viewport.bottom)
+        self.scroll_to_offset(self.scroll_x, self.scroll_y)
+
+    @property
+    def scrollable(self):
+        return self.max_scroll_x > 0 or self.max_scroll_y > 0
+
+    def scroll_to_offset(self, x, y):
+        self.scroll_x = max(0, min(self.max_scroll_x, int(x)))
+        self.scroll_y = max(0, min(self.max_scroll_y, int(y)))
+
+    def scroll_by(self, dx, dy):
+        self.scroll_to_offset(self.scroll_x + dx, self.scroll_y + dy)
+
+    def scroll_wheel(self, wheel_x, wheel_y):
+        """处理鼠标滚轮：只能横向滚动时 (单行柜台) 竖直滚轮也用来横向滚动"""
+        if self.max_scroll_y == 0:
+            self.scroll_by(-(wheel_x + wheel_y) * self.scroll_step, 0)
+        else:
+            self.scroll_by(-wheel_x * self.scroll_step, -wheel_y * self.scroll_step)
+
+    def scroll_to(self, index):
+        """滚动到刚好能完整看到该顾客位 (及其上方的顾客和气泡) 的位置"""
+        bounds = self.cell_bounds(index)
+        x, y = self.scroll_x, self.scroll_y
+        if bounds.left - x < self.viewport.left:
+            x = bounds.left - self.viewport.left
+        elif bounds.right - x > self.viewport.right:
+            x = bounds.right - self.viewport.right
+        if bounds.top - y < self.viewport.top:
+            y = bounds.top - self.viewport.top
+        elif bounds.bottom - y > self.viewport.bottom:
+            y = bounds.bottom - self.viewport.bottom
+        self.scroll_to_offset(x, y)
+
+    # --- 坐标换算 ---
+    @property
+    def offset(self):
+        return (self.scroll_x, self.scroll_y)
+
+    def cell_bounds(self, index):
+        """顾客位连同其上方顾客、气泡的世界坐标范围"""
+        left, top, right, bottom = self.margin
+        rect = self.spot_rects[index]
+        return pygame.Rect(rect.left - left, rect.top - top,
+                           rect.width + left + right, rect.height + top + bottom)
+
+    def screen_rect(self, index):
+        return self.spot_rects[index].move(-self.scroll_x, -self.scroll_y)
+
+    def _visible_range(self, view_start, view_end, origin, step, size, margin_before, margin_after, count):
+        # 第 n 个格子占据 [origin + n*step - margin_before, origin + n*step + size + margin_after)
+        first = (view_start - origin - size - margin_after) // step + 1
+        last = (view_end - 1 - origin + margin_before) // step
+        return range(max(0, first), min(count - 1, last) + 1)
+
+    def visible_indices(self):
+        """与视口相交的顾客位序号 (按行优先顺序)，只计算可见的行和列"""
+        if not self.count:
+            return []
+        left, top, right, bottom = self.margin
+        view = self.viewport
+        cols = self._visible_range(view.left + self.scroll_x, view.right + self.scroll_x, self.origin[0],
+                                   self.step[0], self.spot_size[0], left, right, self.columns)
+        rows = self._visible_range(view.top + self.scroll_y, view.bottom + self.scroll_y, self.origin[1],
+                                   self.step[1], self.spot_size[1], top, bottom, self.rows)
+        return [index for row in rows for index in range(row * self.columns + cols.start,
+                                                         min(row * self.columns + cols.stop, self.count))]
+
+    def spot_at(self, pos):
+        """屏幕坐标 pos 落在哪个顾客位上；视口外或不在任何顾客位上时返回 None"""
+        if not self.count or not self.viewport.collidepoint(pos):
+            return None
+        x = pos[0] + self.scroll_x - self.origin[0]
+        y = pos[1] + self.scroll_y - self.origin[1]
+        col, in_x = divmod(x, self.step[0])
+        row, in_y = divmod(y, self.step[1])
+        if not (0 <= col < self.columns and 0 <= row < self.rows):
+            return None
+        if in_x >= self.spot_size[0] or in_y >= self.spot_size[1]:
+            return None
+        index = row * self.columns + col
+        return index if index < self.count else None
+
+    # --- 绘制 ---
+    def draw_scrollbar(self, surface, color, thickness=6):
+        """可以滚动时在视口底边 / 右边画出滚动条"""
+        view = self.viewport
+        if self.max_scroll_x:
+            content = view.width + self.max_scroll_x
+            thumb = pygame.Rect(view.left + view.width * self.scroll_x // content, view.bottom - thickness,
+                                max(thickness, view.width * view.width // content), thickness)
+            pygame.draw.rect(surface, color, thumb)
+        if self.max_scroll_y:
+            content = view.height + self.max_scroll_y
+            thumb = pygame.Rect(view.right - thickness, view.top + view.height * self.scroll_y // content,
+                                thickness, max(thickness, view.height * view.height // content))
+            pygame.draw.rect(surface, color, thumb)
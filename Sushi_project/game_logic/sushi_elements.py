@@ -2,58 +2,157 @@
 
 import pygame
 import os
-from PIL import Image  # +++ 导入 Pillow 库的 Image 模块 +++
+import time
 from config import (
     RICE, TOPPINGS, BLACK, SUSHI_TYPES, DRINK_TYPES,
     UI_IMAGES_DIR, SUSHI_IMAGES_DIR, DRINK_IMAGES_DIR, # 添加 DRINK_IMAGES_DIR
     RICE_BALL_ON_BOARD_SIZE, TOPPING_ON_BOARD_SIZE,
-    HELD_ITEM_IMAGE_SIZE # 导入手持物品大小
+    HELD_ITEM_IMAGE_SIZE, # 导入手持物品大小
+    px,
 )
+from . import atlas, flight_recorder, hot_reload, quality  # 纹理图集；卡顿记录器和热重载 (记录加载的图片)；画质开关 (文字抗锯齿、是否绘制手持物品)
+
+def convert_for_display(image, opaque=False):
+    """已打开显示窗口时转换为显示格式 (blit 更快)；无显示运行时保持原始格式
+
+    opaque=True 时即使图片带 alpha 通道也转换为不透明格式 (全屏背景图，blit 时不做 alpha 混合)
+    """
+    if pygame.display.get_surface() is None:
+        return image
+    if opaque or image.get_alpha() is None:
+        return image.convert()
+    return image.convert_alpha()
+
 
 # --- 辅助函数：加载并缩放图片 (保持不变) ---
-def load_scaled_image(image_filename, size=None, directory=UI_IMAGES_DIR):
-    """加载图片，如果提供了size则进行缩放，可以指定目录"""
+def load_scaled_image(image_filename, size=None, directory=UI_IMAGES_DIR, opaque=False):
+    """加载图片，如果提供了size则进行缩放，可以指定目录；opaque 见 convert_for_display"""
     if not image_filename:
         print(f"警告: load_scaled_image 收到空文件名。")
         return None
-    path = os.path.join(directory, image_filename)
-    try:
-        image = pygame.image.load(path)
-        if image.get_alpha() is None:
-            image = image.convert()
-        else:
-            image = image.convert_alpha()
-
-        if size:
-            image = pygame.transform.scale(image, size)
-        return image
-    except pygame.error as e:
-        print(f"无法加载或缩放图片 {path}: {e}")
-        return None
+    image = atlas.lookup(directory, image_filename, size, opaque)  # 已构建图集时直接取子 Surface
+    if image is None:
+        start = time.perf_counter()
+        try:
+            image = load_image_file(os.path.join(directory, image_filename), size, opaque)
+        except pygame.error as e:
+            print(f"无法加载或缩放图片 {os.path.join(directory, image_filename)}: {e}")
+            return None
+        flight_recorder.note_load("image", image_filename, (time.perf_counter() - start) * 1000)
+    hot_reload.track_image(directory, image_filename, size, opaque, image)
+    return image
+
+
+def load_image_file(path, size=None, opaque=False):
+    """从磁盘加载一张图片 (不查图集)，转换为显示格式并缩放"""
+    image = convert_for_display(pygame.image.load(path), opaque)
+    if size:
+        image = pygame.transform.scale(image, size)
+    return image
+
+def open_gif(path):
+    """用 Pillow 打开 GIF (只在真正解码 GIF 时才导入 Pillow)"""
+    from PIL import Image
+    return Image.open(path)
+
+
+def enable_palette_gif_decoding():
+    """让 Pillow 在调色板不变的帧上保持调色板模式解码，8 位帧可以直接沿用 GIF 的调色板 (见 indexed_frame)
+
+    Pillow 默认把第一帧之后的帧都展开成 RGBA。这是 Pillow 的进程级设置，在 seek 到每一帧时读取，
+    所以只在启动时、解码任何 GIF 之前按 config.CUSTOMER_ANIMATION_PALETTIZED 设置一次 (见 GameEngine.load)；
+    两种方式转换为 RGBA 的结果相同，之后以 RGBA 解码的 GIF 不受影响。
+    """
+    from PIL import GifImagePlugin
+    GifImagePlugin.LOADING_STRATEGY = GifImagePlugin.LoadingStrategy.RGB_AFTER_DIFFERENT_PALETTE_ONLY
+
+
+def _unused_color(used):
+    """取一个不在 used 中的颜色作 colorkey"""
+    return next(color for color in [(255, 0, 255)] + [(i, 0, 255) for i in range(255)] if color not in used)
+
+
+def palettize_image(rgba):
+    """把 RGBA 的 Pillow 图片转换为 8 位调色板图片，透明像素 (alpha < 128) 用调色板中单独的一项作 colorkey
+
+    返回 (P 模式图片, 256 项调色板, colorkey 颜色, 是否无损)。前 255 项由中位切分得到 (不抖动)：
+    不透明像素的颜色不超过 255 种时 (GIF 的每一帧都是这样) 每种颜色各占一项，转换无损；超过时有损。
+    """
+    from PIL import Image
+    transparent = rgba.getchannel("A").point(lambda a: 255 if a < 128 else 0, "L")
+    opaque = {color[:3] for _, color in rgba.getcolors(rgba.width * rgba.height) if color[3] >= 128}
+    rgb = rgba.convert("RGB")
+    if opaque:
+        rgb.paste(next(iter(opaque)), mask=transparent)  # 透明像素不占调色板
+    indexed = rgb.quantize(255, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    flat = indexed.getpalette()[:255 * 3]
+    palette = [tuple(flat[i:i + 3]) for i in range(0, len(flat), 3)]
+    palette += [(0, 0, 0)] * (255 - len(palette))
+    colorkey = _unused_color(set(palette))  # colorkey 颜色不能与任何不透明像素的颜色相同
+    indexed.paste(255, mask=transparent)
+    return indexed, palette + [colorkey], colorkey, len(opaque) <= 255
+
+
+def indexed_frame(img):
+    """当前 GIF 帧的 8 位表示：返回 (P 模式图片, 256 项调色板, colorkey 颜色或 None)
+
+    Pillow 以调色板模式给出的帧直接使用 GIF 自己的调色板 (透明色那一项换成不与其他项重复的颜色)，
+    无损且几乎不花时间 (需要 enable_palette_gif_decoding)；已展开成 RGBA 的帧用 palettize_image 转换。
+    """
+    if img.mode == "P" and isinstance(img.info.get("transparency", 0), int):
+        flat = img.getpalette()[:256 * 3]
+        palette = [tuple(flat[i:i + 3]) for i in range(0, len(flat), 3)]
+        palette += [(0, 0, 0)] * (256 - len(palette))
+        transparency = img.info.get("transparency")
+        if transparency is None:
+            return img, palette, None
+        palette[transparency] = _unused_color(set(palette[:transparency] + palette[transparency + 1:]))
+        return img, palette, palette[transparency]
+    indexed, palette, colorkey, _ = palettize_image(img.convert("RGBA"))
+    return indexed, palette, colorkey
+
+
+def gif_frame_surface(img, target_size, palettized=False):
+    """把 Pillow 中当前 seek 到的 GIF 帧转换为 Pygame Surface，并缩放到 target_size
+
+    palettized=True 时返回 8 位调色板 Surface，透明用 colorkey (RLE 加速)，像素内存是 RGBA 的四分之一；
+    缩放是最近邻采样，两种格式缩放后的像素一一对应。
+    """
+    if palettized:
+        indexed, palette, colorkey = indexed_frame(img)
+        pygame_surface = pygame.image.fromstring(indexed.tobytes(), indexed.size, "P")
+        pygame_surface.set_palette(palette)
+    else:
+        # 将Pillow帧转换为RGBA（如果不是）以确保与Pygame兼容性好
+        pil_frame = img.convert('RGBA')
+        pygame_surface = pygame.image.fromstring(
+            pil_frame.tobytes(), pil_frame.size, pil_frame.mode
+        )
+    if target_size:
+        pygame_surface = pygame.transform.scale(
+            pygame_surface, target_size)
+    if palettized and colorkey is not None:
+        pygame_surface.set_colorkey(colorkey, pygame.RLEACCEL)
+    return pygame_surface
 
 # +++ 新增辅助函数：加载 GIF 动画帧 +++
-def load_gif_frames(gif_filename, target_size, directory=UI_IMAGES_DIR):
-    """加载GIF文件并返回一个包含所有帧的Pygame Surface列表。"""
+def load_gif_frames(gif_filename, target_size, directory=UI_IMAGES_DIR, palettized=False):
+    """加载GIF文件并返回一个包含所有帧的Pygame Surface列表。palettized 见 gif_frame_surface"""
     if not gif_filename:
         print("警告: load_gif_frames 收到空文件名。")
         return []
     path = os.path.join(directory, gif_filename)
     frames = []
+    start = time.perf_counter()
     try:
-        with Image.open(path) as img:
+        with open_gif(path) as img:
             for frame_num in range(img.n_frames):
                 img.seek(frame_num)
-                # 将Pillow帧转换为RGBA（如果不是）以确保与Pygame兼容性好
-                pil_frame = img.convert('RGBA')
-                pygame_surface = pygame.image.fromstring(
-                    pil_frame.tobytes(), pil_frame.size, pil_frame.mode
-                )
-                if target_size:
-                    pygame_surface = pygame.transform.scale(
-                        pygame_surface, target_size)
-                frames.append(pygame_surface)
+                frames.append(gif_frame_surface(img, target_size, palettized))
         if not frames:
             print(f"警告: 未能从 {path} 加载任何帧。")
+        hot_reload.track_gif(directory, gif_filename, target_size, frames)
+        flight_recorder.note_load("gif", gif_filename, (time.perf_counter() - start) * 1000)
         return frames
     except FileNotFoundError:
         print(f"GIF 文件未找到: {path}")
@@ -79,7 +178,7 @@ class ClickableElement:
         else:
             pygame.draw.rect(surface, self.color_placeholder, self.rect)
             if font:
-                text_surf = font.render(self.name, True, BLACK)
+                text_surf = font.render(self.name, quality.settings.text_antialias, BLACK)
                 text_rect = text_surf.get_rect(center=self.rect.center)
                 surface.blit(text_surf, text_rect)
 
@@ -173,7 +272,7 @@ class CuttingBoard:
 
         rice_pos_x = self.rect.centerx - RICE_BALL_ON_BOARD_SIZE[0] // 2
         rice_pos_y = self.rect.centery - \
-            RICE_BALL_ON_BOARD_SIZE[1] // 2 - 10
+            RICE_BALL_ON_BOARD_SIZE[1] // 2 - px(10)
 
         if self.has_rice and self.rice_ball_image:
             surface.blit(self.rice_ball_image, (rice_pos_x, rice_pos_y))
@@ -183,12 +282,12 @@ class CuttingBoard:
                 topping_pos_x = self.rect.centerx - \
                     TOPPING_ON_BOARD_SIZE[0] // 2
                 topping_pos_y = rice_pos_y - \
-                    TOPPING_ON_BOARD_SIZE[1] // 2 + 25
+                    TOPPING_ON_BOARD_SIZE[1] // 2 + px(25)
                 surface.blit(topping_image, (topping_pos_x, topping_pos_y))
 
-        text_surf = font.render(self.message, True, BLACK)
+        text_surf = font.render(self.message, quality.settings.text_antialias, BLACK)
         text_rect = text_surf.get_rect(
-            center=(self.rect.centerx, self.rect.bottom + 20))
+            center=(self.rect.centerx, self.rect.bottom + px(20)))
         surface.blit(text_surf, text_rect)
 
 
@@ -277,7 +376,7 @@ class PlayerHand:
         return None, None, None
 
     def draw(self, surface, mouse_pos, font_for_hud=None, hud_position=None):
-        if self.is_holding and self.held_item_image:
+        if self.is_holding and self.held_item_image and quality.settings.draw_held_item:
             img_rect = self.held_item_image.get_rect(center=mouse_pos)
             surface.blit(self.held_item_image, img_rect)
 
@@ -290,6 +389,6 @@ class PlayerHand:
                 elif self.held_item_category == "drink":
                     item_name = DRINK_TYPES.get(self.held_item_key, {}).get('name', self.held_item_key)
                 message = f"手持: {item_name}"
-            text_surf = font_for_hud.render(message, True, BLACK)
+            text_surf = font_for_hud.render(message, quality.settings.text_antialias, BLACK)
             text_rect = text_surf.get_rect(topleft=hud_position)
             surface.blit(text_surf, text_rect)
\ No newline at end of file
@@ -0,0 +1,330 @@
+# tools/analytics_query.py
+"""查询订单事件日志：等待时间百分位、超时率、每关小费分布
+
+用法 (在 Sushi_project 目录下):
+    python -m tools.analytics_query [日志目录] [--by level|item|combo]
+    python -m tools.analytics_query --bench 2000000   # 生成合成日志并计时查询
+
+日志目录默认是存档目录下的 analytics 子目录 (见 game_logic/analytics.py)。
+每个文件用 mmap 映射后按字段切片 (memoryview 的步长切片)，按事件类型筛选用
+bytes.translate + itertools.compress，计数用 bytes.count / Counter，百分位由计数的累计和得出，
+循环都在 C 中完成，几百万条记录的查询在一秒内完成，不需要 numpy。
+"""
+
+import argparse
+import mmap
+import os
+import random
+import sys
+import tempfile
+import time
+from bisect import bisect_right
+from collections import Counter
+from itertools import accumulate, compress
+
+from tools.headless import setup_headless_environment
+
+setup_headless_environment()
+
+import config  # noqa: E402
+from game_logic.analytics import (  # noqa: E402
+    HEADER, RECORD, LOG_MAGIC, EventLog, log_files, SUSHI_KEYS, DRINK_KEYS, NO_ITEM,
+    EV_SPAWN, EV_SERVE, EV_FULFILL, EV_TIMEOUT, EV_ROUND_END, EVENT_NAMES,
+    FLAG_SUSHI_OK, FLAG_DRINK_OK, FLAG_WON,
+)
+from game_logic.runtime import ticks_to_ms  # noqa: E402
+from game_logic.save_store import resolve_save_dir  # noqa: E402
+
+# 列名 -> (memoryview.cast 的格式, 该格式下的字段序号)，与 game_logic/analytics.py 的记录布局一致
+COLUMN_LAYOUT = {
+    "kind": ("B", 0), "flags": ("B", 1), "sushi": ("B", 6), "drink": ("B", 7),
+    "level": ("H", 2), "wait_ms": ("I", 4), "tip": ("h", 10),
+}
+
+
+class EventColumns:
+    """按列存放的记录 (只读取查询需要的列)：字节列是 bytearray，其余是 list"""
+
+    def __init__(self, names):
+        self.files = 0
+        self.names = ("kind",) + tuple(name for name in names if name != "kind")
+        for name in self.names:
+            setattr(self, name, bytearray() if COLUMN_LAYOUT[name][0] == "B" else [])
+        self._selected = {}
+
+    def __len__(self):
+        return len(self.kind)
+
+    def add_file(self, path):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                magic, record_size, _version = HEADER.unpack_from(mapped, 0)
+                if magic != LOG_MAGIC or record_size != RECORD.size:
+                    print(f"跳过不是订单事件日志的文件: {path}")
+                    return
+                # 写到一半的最后一条记录 (进程崩溃时) 直接忽略
+                count = (len(mapped) - HEADER.size) // RECORD.size
+                with memoryview(mapped) as view, view[HEADER.size:HEADER.size + count * RECORD.size] as body:
+                    self._add_body(body)
+        self.files += 1
+
+    def _add_body(self, body):
+        views = {}
+        try:
+            for name in self.names:
+                fmt, index = COLUMN_LAYOUT[name]
+                if fmt not in views:
+                    views[fmt] = body.cast(fmt)
+                view = views[fmt]
+                stride = RECORD.size // view.itemsize
+                if fmt == "B":
+                    getattr(self, name).extend(view[index::stride].tobytes())
+                else:
+                    getattr(self, name).extend(view[index::stride].tolist())
+        finally:
+            for view in views.values():
+                view.release()
+
+    def select(self, kinds, name):
+        """事件类型属于 kinds 的记录的一列 (字节列返回 bytes，其余返回 list)。
+        按事件类型生成字节掩码 (bytes.translate)，再用 itertools.compress 取出，全部在 C 中完成；
+        同一次查询里重复用到的列只取一次"""
+        key = (kinds, name)
+        if key not in self._selected:
+            table = bytearray(256)
+            for kind in kinds:
+                table[kind] = 1
+            column = getattr(self, name)
+            selected = compress(column, self.kind.translate(table))
+            self._selected[key] = bytes(selected) if isinstance(column, bytearray) else list(selected)
+        return self._selected[key]
+
+
+def load_events(directory, names):
+    columns = EventColumns(names)
+    for path in log_files(directory):
+        columns.add_file(path)
+    return columns
+
+
+def counts(keys):
+    """Counter(键)；键是字节时逐个值用 bytes.count 计数"""
+    if isinstance(keys, bytes):
+        return Counter({value: keys.count(value) for value in range(256) if value in keys})
+    return Counter(keys)
+
+
+def grouped(keys, values):
+    """{分组键: Counter(值)}。键是字节时按每个出现的键生成掩码再 compress，
+    否则用 Counter(zip(...)) 一次遍历完成分组和计数"""
+    if isinstance(keys, bytes):
+        groups = {}
+        for key in counts(keys):
+            table = bytearray(256)
+            table[key] = 1
+            groups[key] = Counter(compress(values, keys.translate(table)))
+        return groups
+    groups = {}
+    for (key, value), times in Counter(zip(keys, values)).items():
+        groups.setdefault(key, Counter())[value] = times
+    return groups
+
+
+def distribution(counts):
+    """Counter(值) -> 按值排序的 (值, 累计次数)。等待时间是逻辑帧的整数倍、小费是整数，
+    不同的值很少，先计数再排序比直接排序全部记录快得多"""
+    keys = sorted(counts)
+    return keys, list(accumulate(counts[key] for key in keys))
+
+
+def percentile(dist, p):
+    keys, cumulative = dist
+    if not keys:
+        return None
+    rank = min(cumulative[-1] - 1, int(cumulative[-1] * p / 100))
+    return keys[bisect_right(cumulative, rank)]
+
+
+def total(dist):
+    return dist[1][-1] if dist[1] else 0
+
+
+def _fmt_ms(value):
+    return "-" if value is None else f"{value / 1000:.1f}s"
+
+
+def _fmt(value):
+    return "-" if value is None else str(value)
+
+
+def _rate(part, whole):
+    return f"{part / whole:.1%}" if whole else "-"
+
+
+def item_name(keys, types, index):
+    if index == NO_ITEM or index >= len(keys):
+        return "?"
+    return types[keys[index]]["name"]
+
+
+# --- 查询 ---
+FULFILL = (EV_FULFILL,)
+SPAWN = (EV_SPAWN,)
+TIMEOUT = (EV_TIMEOUT,)
+ROUND_END = (EV_ROUND_END,)
+
+
+def summarize(columns):
+    kind_counts = counts(bytes(columns.kind))
+    lines = [f"{columns.files} 个文件, {len(columns):,} 条记录"]
+    lines.append("  " + "  ".join(f"{EVENT_NAMES[kind]} {kind_counts[kind]:,}" for kind in sorted(EVENT_NAMES)))
+    dist = distribution(Counter(columns.select(FULFILL, "wait_ms")))
+    lines.append(f"完成订单等待时间: p50 {_fmt_ms(percentile(dist, 50))}  p90 {_fmt_ms(percentile(dist, 90))}  "
+                 f"p99 {_fmt_ms(percentile(dist, 99))}  最长 {_fmt_ms(percentile(dist, 100))}")
+    lines.append(f"超时率: {_rate(kind_counts[EV_TIMEOUT], kind_counts[EV_SPAWN])}")
+    return lines
+
+
+def breakdown_by_level(columns):
+    spawn = counts(columns.select(SPAWN, "level"))
+    timeout = counts(columns.select(TIMEOUT, "level"))
+    waits = grouped(columns.select(FULFILL, "level"), columns.select(FULFILL, "wait_ms"))
+    round_levels = columns.select(ROUND_END, "level")
+    tips = grouped(round_levels, columns.select(ROUND_END, "tip"))
+    wins = Counter(level for level, flags in zip(round_levels, columns.select(ROUND_END, "flags"))
+                   if flags & FLAG_WON)
+
+    lines = [f"{'关卡':<6}{'订单':>9}{'超时率':>9}{'等待p50':>9}{'等待p90':>9}"
+             f"{'局数':>7}{'小费p10':>9}{'p50':>6}{'p90':>6}{'通关率':>8}"]
+    for level in sorted(set(spawn) | set(tips)):
+        wait_dist = distribution(waits.get(level, {}))
+        tip_dist = distribution(tips.get(level, {}))
+        rounds = total(tip_dist)
+        lines.append(f"{level:<8}{spawn[level]:>9,}{_rate(timeout[level], spawn[level]):>10}"
+                     f"{_fmt_ms(percentile(wait_dist, 50)):>10}{_fmt_ms(percentile(wait_dist, 90)):>10}{rounds:>8}"
+                     f"{_fmt(percentile(tip_dist, 10)):>9}{_fmt(percentile(tip_dist, 50)):>6}"
+                     f"{_fmt(percentile(tip_dist, 90)):>6}{_rate(wins[level], rounds):>10}")
+    return lines
+
+
+def breakdown_by_item(columns):
+    lines = []
+    for title, name, keys, types, ok_flag in (("寿司", "sushi", SUSHI_KEYS, config.SUSHI_TYPES, FLAG_SUSHI_OK),
+                                              ("饮品", "drink", DRINK_KEYS, config.DRINK_TYPES, FLAG_DRINK_OK)):
+        spawn = counts(columns.select(SPAWN, name))
+        timeout = counts(columns.select(TIMEOUT, name))
+        items = columns.select(FULFILL, name)
+        waits = grouped(items, columns.select(FULFILL, "wait_ms"))
+        flags = grouped(items, columns.select(FULFILL, "flags"))
+        lines.append(f"{title:<10}{'订单':>9}{'超时率':>9}{'等待p50':>9}{'等待p90':>9}{'上对率':>8}")
+        for index in sorted(spawn):
+            wait_dist = distribution(waits.get(index, {}))
+            correct = sum(times for value, times in flags.get(index, {}).items() if value & ok_flag)
+            lines.append(f"{item_name(keys, types, index):<12}{spawn[index]:>9,}"
+                         f"{_rate(timeout[index], spawn[index]):>10}{_fmt_ms(percentile(wait_dist, 50)):>10}"
+                         f"{_fmt_ms(percentile(wait_dist, 90)):>10}{_rate(correct, total(wait_dist)):>10}")
+        lines.append("")
+    return lines
+
+
+def breakdown_by_combo(columns):
+    spawn = Counter(zip(columns.select(SPAWN, "sushi"), columns.select(SPAWN, "drink")))
+    timeout = Counter(zip(columns.select(TIMEOUT, "sushi"), columns.select(TIMEOUT, "drink")))
+    lines = [f"{'组合 (按超时率排序)':<22}{'订单':>9}{'超时':>8}{'超时率':>9}"]
+    ranked = sorted(spawn, key=lambda combo: timeout[combo] / spawn[combo], reverse=True)
+    for sushi, drink in ranked:
+        name = (f"{item_name(SUSHI_KEYS, config.SUSHI_TYPES, sushi)} + "
+                f"{item_name(DRINK_KEYS, config.DRINK_TYPES, drink)}")
+        combo = (sushi, drink)
+        lines.append(f"{name:<22}{spawn[combo]:>9,}{timeout[combo]:>8,}{_rate(timeout[combo], spawn[combo]):>10}")
+    return lines
+
+
+# 分组方式 -> (查询函数, 需要的列)
+BREAKDOWNS = {
+    "level": (breakdown_by_level, ("level", "wait_ms", "tip", "flags")),
+    "item": (breakdown_by_item, ("sushi", "drink", "wait_ms", "flags")),
+    "combo": (breakdown_by_combo, ("sushi", "drink")),
+}
+SUMMARY_COLUMNS = ("kind", "wait_ms")
+
+
+def run_query(directory, by):
+    query, names = BREAKDOWNS[by]
+    start = time.perf_counter()
+    columns = load_events(directory, SUMMARY_COLUMNS + names)
+    load_ms = (time.perf_counter() - start) * 1000
+    if not len(columns):
+        return [f"{directory} 中没有订单事件记录"], load_ms, 0.0
+    start = time.perf_counter()
+    lines = summarize(columns) + [""] + query(columns)
+    query_ms = (time.perf_counter() - start) * 1000
+    return lines, load_ms, query_ms
+
+
+# --- 合成日志 (用于性能测试) ---
+def write_synthetic_log(directory, num_records, seed=0):
+    """按大致真实的事件比例生成 num_records 条合成记录 (等待时间是逻辑帧的整数倍)：先生成一块，再重复写入"""
+    rng = random.Random(seed)
+    log = EventLog(directory, max_file_bytes=64 * 1024 * 1024, max_files=1000, buffer_records=65536)
+    block = min(num_records, 100_000)
+    tick = 0
+    for i in range(block):
+        if i % 150 == 0:
+            log.begin_session(rng.getrandbits(32))
+            log.begin_round(rng.randint(1, 8))
+        tick += rng.randint(0, 30)
+        order = {"sushi": rng.choice(SUSHI_KEYS), "drink": rng.choice(DRINK_KEYS)}
+        roll = rng.random()
+        if i % 150 == 149:
+            log.append(EV_ROUND_END, 0, None, tick, flags=FLAG_WON if rng.random() < 0.5 else 0,
+                       tip=rng.randint(0, 400))
+        elif roll < 0.3:
+            log.append(EV_SPAWN, rng.randrange(4), order, tick)
+        elif roll < 0.75:
+            log.append(EV_SERVE, rng.randrange(4), order, tick, ticks_to_ms(rng.randint(30, 1800)), rng.randrange(8))
+        elif roll < 0.95:
+            log.append(EV_FULFILL, rng.randrange(4), order, tick, ticks_to_ms(rng.randint(60, 1800)),
+                       rng.randrange(4), rng.choice((0, 10, 20)))
+        else:
+            log.append(EV_TIMEOUT, rng.randrange(4), order, tick, 30000, rng.randrange(4))
+    log.close()
+    # 第一块已经写入；其余记录重复这一块的字节
+    path = log_files(directory)[-1]
+    with open(path, "rb") as f:
+        data = f.read()[HEADER.size:]
+    remaining = num_records - block
+    with open(path, "ab") as f:
+        while remaining > 0:
+            count = min(remaining, block)
+            f.write(data[:count * RECORD.size])
+            remaining -= count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="查询订单事件日志")
+    parser.add_argument("directory", nargs="?", help="日志目录 (默认是存档目录下的 analytics)")
+    parser.add_argument("--by", choices=list(BREAKDOWNS), default="level", help="分组方式")
+    parser.add_argument("--bench", type=int, metavar="N", help="生成 N 条合成记录并计时查询 (不读真实日志)")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        with tempfile.TemporaryDirectory() as directory:
+            write_synthetic_log(directory, args.bench)
+            for by in BREAKDOWNS:
+                _lines, load_ms, query_ms = run_query(directory, by)
+                print(f"--by {by:<6} {args.bench:,} 条记录: 读取 {load_ms:.0f}ms, 查询 {query_ms:.0f}ms, "
+                      f"合计 {load_ms + query_ms:.0f}ms")
+        return 0
+
+    directory = args.directory or os.path.join(resolve_save_dir(config.SAVE_DIR, config.BASE_DIR), "analytics")
+    lines, load_ms, query_ms = run_query(directory, args.by)
+    print("\n".join(lines))
+    print(f"\n读取 {load_ms:.0f}ms, 查询 {query_ms:.0f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+# tools/benchmark.py
+"""热点路径的无显示基准测试
+
+用法 (在 Sushi_project 目录下):
+    python -m tools.benchmark run [--output bench.json] [--frames 600] [--only customer_draw ...]
+    python -m tools.benchmark run --compare baseline.json [--threshold 0.10]
+    python -m tools.benchmark compare baseline.json current.json [--threshold 0.10]
+
+run 的结果写入 JSON 文件；compare 比较两次结果的中位数，
+超过阈值的变慢会被标记为回归，并以非零退出码退出。
+"""
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+
+from tools.headless import load_game, setup_headless_environment
+
+setup_headless_environment()
+
+import config  # noqa: E402
+from game_logic.quality import MAX_LEVEL  # noqa: E402
+
+BENCHMARK_FORMAT_VERSION = 1
+DEFAULT_THRESHOLD = 0.10  # 中位数变慢超过 10% 视为回归
+BANQUET_SPOTS = 300
+
+
+class BenchmarkCase:
+    """一个基准测试用例：setup(game) 返回被测函数，被测函数每次调用执行一次操作"""
+
+    def __init__(self, name, setup, number, repeat=7, kind="micro"):
+        self.name = name
+        self.setup = setup
+        self.number = number  # 每轮调用次数
+        self.repeat = repeat  # 轮数
+        self.kind = kind
+
+    def run(self, game):
+        """运行用例并返回统计结果；setup 返回 None (当前环境测不了，例如没有构建图集) 时返回 None"""
+        func = self.setup(game)
+        if func is None:
+            return None
+        func()  # 预热
+        timings = []
+        gc.collect()
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            for _ in range(self.number):
+                func()
+            timings.append((time.perf_counter() - start) / self.number)
+        return {
+            "kind": self.kind,
+            "number": self.number,
+            "repeat": self.repeat,
+            "min_us": min(timings) * 1e6,
+            "median_us": statistics.median(timings) * 1e6,
+            "mean_us": statistics.fmean(timings) * 1e6,
+        }
+
+
+# --- 用例准备函数 ---
+def _prepare_round(game):
+    """把游戏置于进行中状态：所有顾客都在等待且显示订单气泡，手上拿着寿司，菜板上有完整寿司"""
+    game.reset_game_state()
+    game.current_game_state = config.STATE_GAME_RUNNING
+    for customer in game.customers:
+        customer.state = "empty"
+        customer.generate_order()
+    game.cutting_b.clear()
+    game.cutting_b.add_rice()
+    game.cutting_b.add_topping("salmon")
+    game.player_h.drop_item()
+    game.player_h.pickup_sushi("tuna")
+
+
+def setup_customer_draw(game):
+    _prepare_round(game)
+    customer = game.customers[0]
+    return lambda: customer.draw(game.screen)
+
+
+def setup_customer_update(game):
+    _prepare_round(game)
+    customer = game.customers[0]
+    return customer.update
+
+
+def setup_cutting_board_draw(game):
+    _prepare_round(game)
+    return lambda: game.cutting_b.draw(game.screen, game.custom_font)
+
+
+def setup_player_hand_draw(game):
+    _prepare_round(game)
+    hud_pos = (20, config.SCREEN_HEIGHT - 50)
+    mouse_pos = (config.SCREEN_WIDTH // 2, config.SCREEN_HEIGHT // 2)
+    return lambda: game.player_h.draw(game.screen, mouse_pos,
+                                      font_for_hud=game.small_font, hud_position=hud_pos)
+
+
+def setup_load_gif_frames(game):
+    from game_logic.sushi_elements import load_gif_frames
+    return lambda: load_gif_frames(config.CUSTOMER_WAITING_IMG_FILENAME, config.CUSTOMER_IMAGE_SIZE,
+                                   directory=config.CUSTOMER_IMAGES_DIR)
+
+
+def setup_load_image_file(game):
+    """从磁盘读取、解码、转换为显示格式并缩放一张图片：图集没有命中时 load_scaled_image 走的路径"""
+    import os
+    from game_logic.sushi_elements import load_image_file
+    path = os.path.join(config.UI_IMAGES_DIR, config.ORDER_BUBBLE_IMG_FILENAME)
+    return lambda: load_image_file(path, config.ORDER_BUBBLE_SIZE)
+
+
+def setup_load_scaled_image_atlas(game):
+    """图集命中时的 load_scaled_image (查清单、取缓存的子 Surface)；没有构建图集时跳过"""
+    from game_logic.sushi_elements import load_scaled_image
+    if game.texture_atlas is None or game.texture_atlas.get(
+            config.UI_IMAGES_DIR, config.ORDER_BUBBLE_IMG_FILENAME, config.ORDER_BUBBLE_SIZE) is None:
+        return None
+    return lambda: load_scaled_image(config.ORDER_BUBBLE_IMG_FILENAME, config.ORDER_BUBBLE_SIZE,
+                                     directory=config.UI_IMAGES_DIR)
+
+
+def setup_game_running_frame(game):
+    _prepare_round(game)
+    mouse_pos = (config.SCREEN_WIDTH // 2, config.SCREEN_HEIGHT // 2)
+
+    def render_frame():
+        for customer in game.customers:
+            customer.update()
+        game.draw_frame(game.screen, mouse_pos)
+    return render_frame
+
+
+def setup_banquet_running_frame(game):
+    """BANQUET_SPOTS 个顾客位排成一行的长柜台：所有顾客都要更新，但只绘制视口内的几个"""
+    banquet = load_game(render=True, num_spots=BANQUET_SPOTS, spot_columns=0)
+    banquet.spot_layout.scroll_to(BANQUET_SPOTS // 2)
+    return setup_game_running_frame(banquet)
+
+
+def setup_game_running_frame_low_quality(game):
+    """最低画质下的整帧，与 game_running_frame 对比可看出画质调节器能省下多少"""
+    game.quality_governor.set_level(0)
+    return setup_game_running_frame(game)
+
+
+def build_cases(frames):
+    return [
+        BenchmarkCase("customer_draw_waiting", setup_customer_draw, number=2000),
+        BenchmarkCase("customer_update", setup_customer_update, number=20000),
+        BenchmarkCase("cutting_board_draw", setup_cutting_board_draw, number=2000),
+        BenchmarkCase("player_hand_draw", setup_player_hand_draw, number=2000),
+        BenchmarkCase("load_gif_frames", setup_load_gif_frames, number=3, repeat=5),
+        BenchmarkCase("load_image_file", setup_load_image_file, number=100),
+        BenchmarkCase("load_scaled_image_atlas", setup_load_scaled_image_atlas, number=2000),
+        BenchmarkCase("game_running_frame", setup_game_running_frame,
+                      number=frames, repeat=3, kind="macro"),
+        BenchmarkCase("banquet_running_frame", setup_banquet_running_frame,
+                      number=frames, repeat=3, kind="macro"),
+        BenchmarkCase("game_running_frame_q0", setup_game_running_frame_low_quality,
+                      number=frames, repeat=3, kind="macro"),
+    ]
+
+
+def run_benchmarks(only=None, frames=600):
+    import pygame
+
+    game = load_game(render=True)
+    results = {}
+    for case in build_cases(frames):
+        if only and case.name not in only:
+            continue
+        result = case.run(game)
+        game.quality_governor.set_level(MAX_LEVEL)
+        if result is None:
+            print(f"{case.name:<24} 跳过 (当前环境不适用)")
+            continue
+        results[case.name] = result
+        print(f"{case.name:<24} 中位数 {result['median_us']:10.1f} us   最小 {result['min_us']:10.1f} us")
+    game.gc_controller.end_round()
+    return {
+        "format_version": BENCHMARK_FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """按中位数比较两次结果，返回 (行列表, 回归用例名列表)"""
+    lines = []
+    regressions = []
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            lines.append(f"{name:<24} (基线中没有此用例)")
+            continue
+        ratio = cur["median_us"] / base["median_us"] if base["median_us"] else float("inf")
+        status = "OK"
+        if ratio > 1 + threshold:
+            status = "回归"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            status = "变快"
+        lines.append(f"{name:<24} {base['median_us']:10.1f} -> {cur['median_us']:10.1f} us "
+                     f"({(ratio - 1) * 100:+6.1f}%)  {status}")
+    return lines, regressions
+
+
+def _load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="寿司餐厅热点路径基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="运行基准测试并写入 JSON")
+    run_parser.add_argument("--output", default="bench_results.json")
+    run_parser.add_argument("--frames", type=int, default=600, help="宏基准每轮渲染的帧数")
+    run_parser.add_argument("--only", nargs="*", help="只运行指定的用例")
+    run_parser.add_argument("--compare", help="运行后与该基线文件比较")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    cmp_parser = sub.add_parser("compare", help="比较两个结果文件")
+    cmp_parser.add_argument("baseline")
+    cmp_parser.add_argument("current")
+    cmp_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        current = run_benchmarks(only=args.only, frames=args.frames)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2, ensure_ascii=False)
+        print(f"结果已写入 {args.output}")
+        if not args.compare:
+            return 0
+        baseline = _load_json(args.compare)
+    else:
+        baseline = _load_json(args.baseline)
+        current = _load_json(args.current)
+
+    lines, regressions = compare_results(baseline, current, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"发现 {len(regressions)} 个回归 (阈值 {args.threshold:.0%}): {', '.join(regressions)}")
+        return 1
+    print("没有发现回归。")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
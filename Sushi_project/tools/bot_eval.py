@@ -0,0 +1,186 @@
+# tools/bot_eval.py
+"""多进程并行评估服务策略机器人
+
+用法 (在 Sushi_project 目录下):
+    python -m tools.bot_eval [--strategies nearest_deadline drinks_first greedy_tip random]
+                             [--levels 1 2 3 4 5] [--runs 20] [--workers N] [--output report.json]
+
+每局的种子由 (基础种子, 策略, 关卡, 序号) 决定，与进程调度无关，结果可复现。
+每个工作进程以无显示模式加载一次游戏，然后连续跑分配到的局；默认使用全部 CPU 核心。
+"""
+
+import argparse
+import atexit
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from tools.headless import load_game, setup_headless_environment
+
+setup_headless_environment()
+
+import config  # noqa: E402
+
+_game = None
+_actions = None
+
+
+def _init_worker(analytics_dir=None):
+    """工作进程初始化：无显示加载游戏，丢弃游戏的控制台输出"""
+    global _game, _actions
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    _game = load_game(analytics_dir=analytics_dir)  # 每个进程写自己的日志文件
+    atexit.register(_game.shutdown)
+    _game.progress_saving_enabled = False
+    from game_logic.actions import GameActions
+    _actions = GameActions(_game)
+
+
+def session_seed(base_seed, strategy, level, run_index):
+    return zlib.crc32(f"{base_seed}:{strategy}:{level}:{run_index}".encode())
+
+
+def play_session(task):
+    """在当前工作进程中用一个策略打完一局，返回统计"""
+    strategy_name, level, run_index, base_seed, reaction_ticks = task
+    from game_logic import runtime
+    from game_logic.bots import STRATEGIES
+
+    game = _game
+    seed = session_seed(base_seed, strategy_name, level, run_index)
+    bot = STRATEGIES[strategy_name](reaction_ticks=reaction_ticks, seed=seed)
+    game.begin_session(seed, level)
+    _actions.perform(("start",))
+
+    timeouts = perfect = partial = wrong = 0
+    last_state = {c.spot_index: c.state for c in game.customers}
+    max_ticks = (config.GAME_DURATION_SECONDS + 10) * config.FPS
+    while game.current_game_state == config.STATE_GAME_RUNNING and runtime.logic_tick < max_ticks:
+        tips_before = game.total_tips
+        bot.act(game, _actions)
+        gained = game.total_tips - tips_before
+        if gained == config.TIP_PERFECT_ORDER:
+            perfect += 1
+        elif gained == config.TIP_PARTIAL_ORDER:
+            partial += 1
+
+        game.update_game()
+        runtime.advance_tick()
+        for customer in game.customers:
+            if last_state[customer.spot_index] == "waiting" and customer.state == "angry":
+                if customer.sushi_received_key is None or customer.drink_received_key is None:
+                    timeouts += 1
+                else:
+                    wrong += 1
+            last_state[customer.spot_index] = customer.state
+
+    return {
+        "strategy": strategy_name,
+        "level": level,
+        "seed": seed,
+        "tips": game.total_tips,
+        "target": game.current_target_tips,
+        "passed": game.total_tips >= game.current_target_tips,
+        "timeouts": timeouts,
+        "perfect": perfect,
+        "partial": partial,
+        "wrong": wrong,
+    }
+
+
+def aggregate(results):
+    """按 (策略, 关卡) 汇总：平均小费、通过率、平均超时数等"""
+    groups = {}
+    for result in results:
+        groups.setdefault(result["strategy"], {}).setdefault(result["level"], []).append(result)
+
+    report = {}
+    for strategy, by_level in groups.items():
+        levels = {}
+        for level, runs in sorted(by_level.items()):
+            tips = [r["tips"] for r in runs]
+            levels[level] = {
+                "runs": len(runs),
+                "target": runs[0]["target"],
+                "tips_mean": statistics.fmean(tips),
+                "tips_stdev": statistics.pstdev(tips),
+                "tips_min": min(tips),
+                "tips_max": max(tips),
+                "pass_rate": sum(r["passed"] for r in runs) / len(runs),
+                "timeouts_mean": statistics.fmean(r["timeouts"] for r in runs),
+                "perfect_mean": statistics.fmean(r["perfect"] for r in runs),
+                "partial_mean": statistics.fmean(r["partial"] for r in runs),
+                "wrong_mean": statistics.fmean(r["wrong"] for r in runs),
+            }
+        all_runs = [r for runs in by_level.values() for r in runs]
+        report[strategy] = {
+            "tips_mean": statistics.fmean(r["tips"] for r in all_runs),
+            "pass_rate": sum(r["passed"] for r in all_runs) / len(all_runs),
+            "timeouts_mean": statistics.fmean(r["timeouts"] for r in all_runs),
+            "levels": levels,
+        }
+    return report
+
+
+def format_report(report):
+    lines = []
+    ranking = sorted(report.items(), key=lambda item: item[1]["tips_mean"], reverse=True)
+    lines.append(f"{'策略':<18}{'平均小费':>10}{'通过率':>10}{'平均超时':>10}")
+    for strategy, summary in ranking:
+        lines.append(f"{strategy:<18}{summary['tips_mean']:>10.1f}{summary['pass_rate']:>10.0%}"
+                     f"{summary['timeouts_mean']:>10.2f}")
+    lines.append("")
+    lines.append("各关卡通过率:")
+    levels = sorted({level for summary in report.values() for level in summary["levels"]})
+    lines.append(f"{'策略':<18}" + "".join(f"{f'第{level}关':>10}" for level in levels))
+    for strategy, summary in ranking:
+        cells = []
+        for level in levels:
+            stats = summary["levels"].get(level)
+            cells.append(f"{stats['pass_rate']:>10.0%}" if stats else f"{'-':>10}")
+        lines.append(f"{strategy:<18}" + "".join(cells))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    from game_logic.bots import STRATEGIES
+
+    parser = argparse.ArgumentParser(description="并行评估服务策略")
+    parser.add_argument("--strategies", nargs="+", default=list(STRATEGIES), choices=list(STRATEGIES))
+    parser.add_argument("--levels", nargs="+", type=int, default=[1, 2, 3, 4, 5])
+    parser.add_argument("--runs", type=int, default=20, help="每个 (策略, 关卡) 的局数")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="工作进程数 (默认全部核心)")
+    parser.add_argument("--reaction-ticks", type=int, default=15, help="机器人两次点击之间的逻辑帧数")
+    parser.add_argument("--seed", type=int, default=0, help="基础种子")
+    parser.add_argument("--output", help="把汇总报告写入 JSON 文件")
+    parser.add_argument("--analytics-dir", help="把每局的订单事件记录到该目录 (供 tools.analytics_query 查询)")
+    args = parser.parse_args(argv)
+
+    tasks = [(strategy, level, run_index, args.seed, args.reaction_ticks)
+             for strategy in args.strategies for level in args.levels for run_index in range(args.runs)]
+    start = time.perf_counter()
+    # spawn：每个工作进程都重新初始化 SDL，不继承父进程状态
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context,
+                             initializer=_init_worker, initargs=(args.analytics_dir,)) as pool:
+        results = list(pool.map(play_session, tasks, chunksize=max(1, len(tasks) // (args.workers * 4))))
+    elapsed = time.perf_counter() - start
+
+    report = aggregate(results)
+    print(format_report(report))
+    print(f"\n{len(tasks)} 局, {args.workers} 个进程, 用时 {elapsed:.1f}s")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "report": report, "sessions": results},
+                      f, indent=1, ensure_ascii=False)
+        print(f"报告已写入 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# tools/build_atlas.py
+"""构建纹理图集
+
+用法 (在 Sushi_project 目录下):
+    python -m tools.build_atlas [--sheet-size 1024 1024] [--padding 1] [--layout-scale 1.5]
+
+无显示加载一遍游戏 (包括所有场景的资源)，记录 ui、sushi、drinks、background 目录下每张图片
+被以什么尺寸加载，按这些尺寸打包进 config.ATLAS_DIR 下的图集并写出清单。
+同时构建字形图集：收集游戏可能显示的全部字符，按用到的字号预先栅格化 (见 game_logic/glyph_atlas.py)。
+修改或新增图片、改变 config.py 中的尺寸后需要重新运行；源文件内容变了时游戏会自动改为单独加载它。
+--layout-scale 为指定的布局缩放构建 (每种缩放的图集在各自的目录中)。
+"""
+
+import argparse
+import sys
+import time
+
+from tools.headless import load_game, setup_headless_environment
+
+
+def collect_requests():
+    """加载游戏和全部场景资源，返回图集目录下的 (目录, 文件名, 尺寸, 是否不透明) 集合"""
+    setup_headless_environment()
+    import config
+    from game_logic import atlas
+
+    atlas.start_recording()
+    try:
+        game = load_game(render=False)
+        game.scene_manager.load_all()
+    finally:
+        requests = atlas.stop_recording()
+    game.shutdown()
+    return atlas.filter_requests(requests, config.ATLAS_SOURCE_DIRS)
+
+
+def main(argv=None):
+    # 布局缩放决定 config 中的所有尺寸和图集目录，必须在导入 config 之前设置
+    scale_parser = argparse.ArgumentParser(add_help=False)
+    scale_parser.add_argument("--layout-scale", type=float)
+    setup_headless_environment(scale_parser.parse_known_args(argv)[0].layout_scale)
+    import config
+
+    parser = argparse.ArgumentParser(description="把小图按实际使用的尺寸打包成纹理图集")
+    parser.add_argument("--layout-scale", type=float, help="为指定的布局缩放构建 (默认 1)")
+    parser.add_argument("--sheet-size", type=int, nargs=2, default=config.ATLAS_SHEET_SIZE,
+                        metavar=("W", "H"), help="每张图集的最大尺寸")
+    parser.add_argument("--padding", type=int, default=1, help="图片之间的间隔像素")
+    parser.add_argument("--output", default=config.ATLAS_DIR, help="输出目录")
+    parser.add_argument("--no-glyphs", action="store_true", help="不构建字形图集")
+    args = parser.parse_args(argv)
+
+    from game_logic.atlas import build_atlas
+    from game_logic.glyph_atlas import build_default_glyph_atlas
+
+    requests = collect_requests()
+    start = time.perf_counter()
+    manifest = build_atlas(requests, args.output, config.IMAGES_DIR, tuple(args.sheet_size), args.padding)
+    packed = sum(w * h for w, h in (entry["rect"][2:] for entry in manifest["entries"]))
+    total = sum(w * h for w, h in (sheet["size"] for sheet in manifest["sheets"]))
+    files = {(entry["dir"], entry["file"]) for entry in manifest["entries"]}
+    print(f"{len(manifest['entries'])} 个图片 (来自 {len(files)} 个文件) 打包进 {len(manifest['sheets'])} 张图集, "
+          f"利用率 {packed / max(1, total):.0%}, 用时 {time.perf_counter() - start:.2f}s -> {args.output}")
+    for sheet in manifest["sheets"]:
+        kind = "alpha" if sheet["alpha"] else "不透明"
+        print(f"  {sheet['file']}: {sheet['size'][0]}x{sheet['size'][1]} ({kind})")
+    if not args.no_glyphs:
+        start = time.perf_counter()
+        glyphs = build_default_glyph_atlas(args.output)
+        width, height = glyphs["sheet_size"]
+        print(f"{glyphs['characters']} 个字符, {len(glyphs['metrics'])} 种字号: {len(glyphs['glyphs'])} 个字形 "
+              f"打包进 {width}x{height} 的字形图集 (字体 {glyphs['font'] or '默认字体'}), "
+              f"用时 {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+# tools/control_bench.py
+"""外部控制接口的吞吐量测试：在子进程中启动 tools.control_server，用一个简单的代理以同步模式驱动游戏
+
+用法 (在 Sushi_project 目录下):
+    python -m tools.control_bench [--steps 36000] [--step-per-call 1 4] [--tcp] [--level 1] [--seed 1]
+
+代理只看观测 (订单、剩余时间、菜板、手) 做决定，把一件物品需要的全部点击放在一个请求里批量发送
+(例如 米饭 + 配料 + 拿起 + 送餐)。每个请求之后推进 --step-per-call 个逻辑帧，一局结束后 reset 开始下一局。
+报告每秒请求数、每秒推进的逻辑帧数和每局的平均小费。
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from tools.headless import PROJECT_DIR, setup_headless_environment
+
+setup_headless_environment()
+
+from game_logic.control import DEFAULT_PORT, ControlClient  # noqa: E402
+
+
+def decide(obs):
+    """根据观测返回这次要执行的一批动作：优先服务剩余时间最少的顾客"""
+    orders = obs["orders"]
+    if not orders:
+        return []
+    hand = obs["hand"]
+    if hand:
+        category, key = hand
+        received, ordered = (4, 1) if category == "sushi" else (5, 2)
+        takers = [order for order in orders if order[received] is None]
+        if not takers:
+            return []
+        exact = [order for order in takers if order[ordered] == key]
+        return [["serve", min(exact or takers, key=lambda order: order[3])[0]]]
+    spot, sushi, drink, _, sushi_received, drink_received = min(orders, key=lambda order: order[3])
+    if drink_received is None:
+        return [["drink", drink], ["serve", spot]]
+    has_rice, topping = obs["board"]
+    if has_rice and topping:
+        return [["pickup"], ["serve", spot]]
+    batch = [] if has_rice else [["rice"]]
+    return batch + [["topping", sushi], ["pickup"], ["serve", spot]]
+
+
+def run_agent(client, total_steps, step_per_call, level, seed):
+    obs = client.call(reset={"seed": seed, "level": level})["obs"]
+    calls = actions = steps = 0
+    round_tips = []
+    start = time.perf_counter()
+    while steps < total_steps:
+        batch = decide(obs)
+        obs = client.call(actions=batch, step=step_per_call)["obs"]
+        calls += 1
+        actions += len(batch)
+        steps += step_per_call
+        if obs["state"] != "running":
+            round_tips.append(obs["tips"])
+            seed += 1
+            obs = client.call(reset={"seed": seed, "level": level})["obs"]
+            calls += 1
+    elapsed = time.perf_counter() - start
+    return calls, actions, steps, elapsed, round_tips
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="外部控制接口吞吐量测试")
+    parser.add_argument("--steps", type=int, default=36000, help="每种设置推进的逻辑帧数")
+    parser.add_argument("--step-per-call", type=int, nargs="+", default=[1, 4], help="每个请求推进的逻辑帧数")
+    parser.add_argument("--tcp", action="store_true", help="使用回环 TCP (默认 Unix 域套接字)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    path = None if args.tcp else os.path.join(tempfile.mkdtemp(), "sushi_control.sock")
+    command = [sys.executable, "-m", "tools.control_server"]
+    command += ["--port", str(args.port)] if args.tcp else ["--socket", path]
+    server = subprocess.Popen(command, cwd=PROJECT_DIR, stdout=subprocess.PIPE, text=True)
+    try:
+        for line in server.stdout:  # 等服务器加载完资源开始监听
+            if line.startswith("控制接口已启动"):
+                break
+        else:
+            print("控制接口没有启动")
+            return 1
+        client = ControlClient(path=path, port=args.port)
+        transport = "回环 TCP" if args.tcp else "Unix 域套接字"
+        for step_per_call in args.step_per_call:
+            calls, actions, steps, elapsed, round_tips = run_agent(
+                client, args.steps, step_per_call, args.level, args.seed)
+            average_tips = sum(round_tips) / len(round_tips) if round_tips else 0
+            print(f"[{transport}, 每个请求推进 {step_per_call} 帧] {calls} 个请求, {actions} 个动作, "
+                  f"{steps} 个逻辑帧, 用时 {elapsed:.2f}s: {calls / elapsed:,.0f} 请求/秒, "
+                  f"{steps / elapsed:,.0f} 逻辑帧/秒 (实时的 {steps / elapsed / 60:.0f} 倍); "
+                  f"完成 {len(round_tips)} 局, 平均小费 {average_tips:.1f}")
+        client.close()
+    finally:
+        server.terminate()
+        server.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# tools/control_server.py
+"""运行外部控制接口 (无显示)，供自动化代理和测试台用语义动作操作游戏
+
+用法 (在 Sushi_project 目录下):
+    python -m tools.control_server [--socket /tmp/sushi.sock | --port 7790] [--realtime]
+                                   [--seed N] [--level 1] [--spots N] [--spot-columns N]
+
+默认是同步模式：游戏只在请求 step / wait 时前进。协议见 game_logic/control.py，
+Python 代理可以直接使用其中的 ControlClient。按 Ctrl+C 退出。
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from contextlib import redirect_stdout
+
+from tools.headless import load_game, setup_headless_environment
+
+setup_headless_environment()
+
+from game_logic.control import DEFAULT_PORT, ControlServer  # noqa: E402
+
+
+async def serve(server, path, port):
+    address = await server.start(path=path, port=port)
+    mode = "同步模式 (游戏只在请求 step 时前进)" if server.lockstep else "实时模式"
+    print(f"控制接口已启动: {address}, {mode}", flush=True)
+    try:
+        # 游戏在无效操作时会打印提示 (菜板：请先放米饭 等)，丢弃这些输出
+        with open(os.devnull, "w", encoding="utf-8") as devnull, redirect_stdout(devnull):
+            await server.run()
+    finally:
+        await server.stop()
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="外部控制接口 (NDJSON)")
+    parser.add_argument("--socket", metavar="PATH", help="在 Unix 域套接字上监听 (默认使用回环 TCP)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--realtime", action="store_true", help="游戏按逻辑帧率自己运行 (默认同步模式)")
+    parser.add_argument("--seed", type=int, help="开始的一局的随机种子 (代理可以用 reset 重新开始)")
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--spots", type=int, help="顾客位数量")
+    parser.add_argument("--spot-columns", type=int, help="每行顾客位数")
+    args = parser.parse_args(argv)
+
+    game = load_game(num_spots=args.spots, spot_columns=args.spot_columns)
+    server = ControlServer(game, lockstep=not args.realtime)
+    server.session.reset(args.seed, args.level)
+    try:
+        asyncio.run(serve(server, args.socket, args.port))
+    except KeyboardInterrupt:
+        pass
+    print(server.session.format_text())
+    game.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
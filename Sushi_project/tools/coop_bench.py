@@ -0,0 +1,133 @@
+# tools/coop_bench.py
+"""联机服务器扩展性测试：在本机回环上连接很多个机器人客户端，测量每帧耗时和带宽
+
+用法 (在 Sushi_project 目录下):
+    python -m tools.coop_bench [--clients 2 10 50 100] [--seconds 10] [--send-rate 20]
+                               [--actions-per-second 2] [--spots N] [--output report.json]
+
+对 --clients 中的每个客户端数：在本进程运行服务器 (开始一局)，在子进程中用一个 asyncio 事件循环
+连接全部客户端。客户端解码每一帧 (关键帧 / 增量) 并检查帧号，随机发送动作
+(容器、菜板、顾客位点击)。服务器统计每个逻辑帧的耗时 (逻辑、编码、发送) 和发给每个客户端的字节数。
+客户端进程和服务器在同一台机器上争用 CPU，单核机器上测出的帧耗时偏高。
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+from tools.headless import load_game, setup_headless_environment
+
+setup_headless_environment()
+
+import config  # noqa: E402
+
+BOT_ACTIONS = ([("rice",), ("pickup",)] + [("topping", key) for key in config.TOPPINGS]
+               + [("drink", key) for key in config.DRINK_TYPES])
+
+
+async def _bot(client_index, port, stop_at, actions_per_frame, num_spots, seed, stats):
+    """一个机器人客户端：解码每一帧，按概率随机发送动作，直到服务器关闭连接"""
+    from game_logic.coop import CoopClient
+    rng = random.Random(seed * 1000003 + client_index)
+    client = CoopClient()
+    await client.connect("127.0.0.1", port)
+    actions = BOT_ACTIONS + [("serve", spot) for spot in range(num_spots)]
+    try:
+        while time.monotonic() < stop_at:
+            await client.receive()
+            if rng.random() < actions_per_frame:
+                client.send(rng.choice(actions))
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass  # 服务器测量结束后关闭连接
+    stats["frames"] += client.frames
+    stats["bytes"] += client.bytes_received
+    await client.close()
+
+
+async def _run_bots(port, clients, timeout, actions_per_frame, num_spots, seed):
+    stats = {"frames": 0, "bytes": 0}
+    stop_at = time.monotonic() + timeout
+    await asyncio.gather(*(_bot(i, port, stop_at, actions_per_frame, num_spots, seed, stats)
+                           for i in range(clients)))
+    return stats
+
+
+def bot_process(port, clients, timeout, actions_per_frame, num_spots, seed, result_queue):
+    """子进程：连接 clients 个机器人客户端，服务器关闭连接 (或超过 timeout 秒) 后把客户端一侧的统计放进队列"""
+    setup_headless_environment()
+    result_queue.put(asyncio.run(_run_bots(port, clients, timeout, actions_per_frame, num_spots, seed)))
+
+
+async def _bench_once(game, clients, seconds, send_rate, actions_per_second, seed):
+    from game_logic.coop import CoopServer
+    game.begin_session(seed)
+    server = CoopServer(game, send_rate=send_rate)
+    server.actions.perform(("start",))
+    port = await server.start("127.0.0.1", 0)
+    actions_per_frame = actions_per_second / (config.FPS / server.send_every)
+    result_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=bot_process, args=(
+        port, clients, seconds + 60, actions_per_frame, game.num_spots, seed, result_queue))
+    process.start()
+    # 等全部客户端连上后再开始计时
+    deadline = time.monotonic() + 30
+    while len(server.clients) < clients and time.monotonic() < deadline:
+        server.step()
+        await asyncio.sleep(1 / config.FPS)
+    for samples in (server.tick_ms, server.logic_ms, server.encode_ms, server.send_ms,
+                    server.delta_bytes, server.broadcast_bytes):
+        samples.clear()
+    server.late_ticks = 0
+    await server.run(seconds)
+    report = server.report()
+    text = server.format_text()
+    # 服务器必须在等待子进程结果之前关闭连接，客户端才会结束
+    await server.stop()
+    client_stats = await asyncio.get_running_loop().run_in_executor(None, result_queue.get)
+    process.join()
+    report["client_side"] = client_stats
+    report["client_bytes_per_second"] = round(client_stats["bytes"] / max(1, clients) / seconds, 1)
+    return report, text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="联机服务器扩展性测试 (本机回环)")
+    parser.add_argument("--clients", type=int, nargs="+", default=[2, 10, 50, 100])
+    parser.add_argument("--seconds", type=float, default=10, help="每种客户端数测量多少秒")
+    parser.add_argument("--send-rate", type=float, default=20, help="每秒广播状态的次数")
+    parser.add_argument("--actions-per-second", type=float, default=2, help="每个客户端每秒发送的动作数")
+    parser.add_argument("--spots", type=int, help="顾客位数量")
+    parser.add_argument("--spot-columns", type=int, help="每行顾客位数")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="把报告写成 JSON")
+    args = parser.parse_args(argv)
+
+    game = load_game(num_spots=args.spots, spot_columns=args.spot_columns)
+    results = []
+    for clients in args.clients:
+        # 游戏在非法操作时会打印提示，测试中丢弃这些输出
+        with open(os.devnull, "w", encoding="utf-8") as devnull, redirect_stdout(devnull):
+            report, text = asyncio.run(_bench_once(game, clients, args.seconds, args.send_rate,
+                                                   args.actions_per_second, args.seed))
+        results.append(report)
+        client_side = report["client_side"]
+        print(f"[{clients} 个客户端] {text}")
+        print(f"    客户端一侧: 共收到 {client_side['frames']} 帧, 平均每个客户端 "
+              f"{report['client_bytes_per_second'] / 1024:.2f} KB/s")
+    game.shutdown()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"fps": config.FPS, "send_rate": args.send_rate, "num_spots": game.num_spots,
+                       "results": results}, f, ensure_ascii=False, indent=1)
+        print(f"报告已写入 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
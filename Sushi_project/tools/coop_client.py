@@ -0,0 +1,92 @@
+# tools/coop_client.py
+"""联机合作客户端：打开游戏窗口，连接 python -m tools.coop_server 启动的服务器
+
+用法 (在 Sushi_project 目录下):
+    python -m tools.coop_client [--host 127.0.0.1] [--port 7788] [--mute]
+
+客户端不运行游戏逻辑：本地的点击由 GameActions.action_at 翻译成动作发给服务器，
+画面按服务器广播的最新状态绘制 (共用的顾客和小费，加上自己工位的菜板和手)。
+顾客区的滚动只在本地生效。
+"""
+
+import argparse
+import asyncio
+import sys
+
+import pygame
+
+from config import FPS
+from game_logic.actions import GameActions
+from game_logic.coop import DEFAULT_PORT, CoopClient
+from game_logic.engine import GameEngine
+
+
+async def play(host, port, mute):
+    client = CoopClient()
+    info = await client.connect(host, port)
+    # 顾客位布局必须与服务器一致
+    game = GameEngine(audio_enabled=not mute, save_enabled=False,
+                      num_spots=info["num_spots"], spot_columns=info["spot_columns"])
+    screen = game.init_video()
+    game.input_pipeline.install()
+    game.load()
+    pygame.display.set_caption(f"我的寿司餐厅 - 联机 工位 {client.station + 1}/{info['stations']}")
+    actions = GameActions(game)
+    print(f"已连接到 {host}:{port}，分配到工位 {client.station + 1}")
+
+    async def receive():
+        try:
+            while True:
+                await client.receive()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            print("与服务器的连接已断开")
+
+    receiver = asyncio.create_task(receive())
+    loop = asyncio.get_running_loop()
+    applied_frames = 0
+    next_frame = loop.time()
+    running = True
+    while running and not receiver.done():
+        events, mouse_pos = game.input_pipeline.poll()
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.MOUSEWHEEL:
+                game.spot_layout.scroll_wheel(event.x, event.y)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                action = actions.action_at(event.pos)
+                if action is not None:
+                    game.audio.play("click")
+                    client.send(action)
+        if client.frames != applied_frames:
+            applied_frames = client.frames
+            client.apply_to(game)
+        game.draw_frame(screen, mouse_pos)
+        pygame.display.flip()
+        next_frame += 1 / FPS
+        await asyncio.sleep(max(0.0, next_frame - loop.time()))
+        if next_frame < loop.time() - 0.25:
+            next_frame = loop.time()
+    receiver.cancel()
+    await client.close()
+    print(f"共收到 {client.frames} 帧, {client.bytes_received / 1024:.1f} KB")
+    game.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="联机合作客户端")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--mute", action="store_true", help="不初始化音频")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(play(args.host, args.port, args.mute))
+    except ConnectionRefusedError:
+        print(f"无法连接到 {args.host}:{args.port}，请先运行 python -m tools.coop_server")
+        return 1
+    pygame.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
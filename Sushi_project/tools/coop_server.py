@@ -0,0 +1,73 @@
+# tools/coop_server.py
+"""运行联机合作服务器 (无显示)，两名玩家用 python -m tools.coop_client 连上来一起经营一局
+
+用法 (在 Sushi_project 目录下):
+    python -m tools.coop_server [--host 127.0.0.1] [--port 7788] [--stations 2] [--send-rate 20]
+                                [--level 1] [--seed N] [--spots N] [--spot-columns N] [--report-every 10]
+
+服务器运行全部游戏逻辑，按 --send-rate 次/秒广播增量压缩的状态 (见 game_logic/coop.py)；
+每隔 --report-every 秒打印每帧耗时和带宽，按 Ctrl+C 退出。
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from contextlib import redirect_stdout
+
+from tools.headless import load_game, setup_headless_environment
+
+setup_headless_environment()
+
+from game_logic import runtime  # noqa: E402
+from game_logic.coop import DEFAULT_PORT, CoopServer  # noqa: E402
+
+
+async def serve(server, host, port, report_every):
+    port = await server.start(host, port)
+    print(f"联机服务器已启动: {host}:{port}, {len(server.stations)} 个工位, "
+          f"每 {server.send_every} 个逻辑帧广播一次状态")
+    out = sys.stdout
+
+    async def report():
+        while server.running:
+            await asyncio.sleep(report_every)
+            print(server.format_text(), file=out, flush=True)
+
+    reporter = asyncio.create_task(report())
+    try:
+        # 游戏在非法操作时会打印提示 (菜板：请先放米饭 等)，服务器上丢弃这些输出
+        with open(os.devnull, "w", encoding="utf-8") as devnull, redirect_stdout(devnull):
+            await server.run()
+    finally:
+        reporter.cancel()
+        await server.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="联机合作服务器")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址 (局域网联机用 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--stations", type=int, default=2, help="工位数 (每个工位有自己的菜板和手)")
+    parser.add_argument("--send-rate", type=float, default=20, help="每秒广播状态的次数")
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--seed", type=int, help="随机种子 (默认随机)")
+    parser.add_argument("--spots", type=int, help="顾客位数量")
+    parser.add_argument("--spot-columns", type=int, help="每行顾客位数")
+    parser.add_argument("--report-every", type=float, default=10, help="每隔多少秒打印统计")
+    args = parser.parse_args(argv)
+
+    game = load_game(num_spots=args.spots, spot_columns=args.spot_columns)
+    game.begin_session(args.seed if args.seed is not None else runtime.new_seed(), args.level)
+    server = CoopServer(game, stations=args.stations, send_rate=args.send_rate)
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.report_every))
+    except KeyboardInterrupt:
+        pass
+    print(server.format_text())
+    game.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
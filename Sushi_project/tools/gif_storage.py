@@ -0,0 +1,152 @@
+# tools/gif_storage.py
+"""比较顾客动画帧的两种存储格式：32 位 RGBA 与 8 位调色板 + colorkey (config.CUSTOMER_ANIMATION_PALETTIZED)
+
+用法 (在 Sushi_project 目录下):
+    python -m tools.gif_storage [--blits 3000] [--output report.json]
+
+对三个顾客 GIF 分别解码出两种格式的全部帧 (与游戏中的尺寸相同)，报告:
+    画质: 把两种格式的每一帧分别画到黑色和白色背景上逐像素比较 (背景不同能发现透明度的差别)，
+          给出不同的像素数和最大的通道误差；
+    内存: 像素字节数 (8 位格式另加 256 项调色板)；
+    blit: 在显示格式的窗口上循环绘制各帧的平均耗时，另列出 convert_alpha 后的 RGBA 作参考
+          (游戏中的 RGBA 帧没有转换为显示格式)。
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from tools.headless import setup_headless_environment
+
+setup_headless_environment()
+
+import pygame  # noqa: E402
+
+import config  # noqa: E402
+from game_logic.memory_report import surface_nbytes  # noqa: E402
+from game_logic.sushi_elements import enable_palette_gif_decoding, load_gif_frames  # noqa: E402
+
+PALETTE_BYTES = 256 * 4
+BACKGROUNDS = ((0, 0, 0), (255, 255, 255))
+
+
+def composite(frame, background):
+    canvas = pygame.Surface(frame.get_size())
+    canvas.fill(background)
+    canvas.blit(frame, (0, 0))
+    return pygame.image.tobytes(canvas, "RGB")
+
+
+def compare_frames(reference, candidate):
+    """返回 (不同的像素数, 最大通道误差)"""
+    differing = max_error = 0
+    for background in BACKGROUNDS:
+        expected = composite(reference, background)
+        actual = composite(candidate, background)
+        if expected == actual:
+            continue
+        for offset in range(0, len(expected), 3):
+            if expected[offset:offset + 3] != actual[offset:offset + 3]:
+                differing += 1
+                max_error = max(max_error, *(abs(a - b) for a, b in zip(expected[offset:offset + 3],
+                                                                       actual[offset:offset + 3])))
+    return differing, max_error
+
+
+def frames_nbytes(frames):
+    return sum(surface_nbytes(frame) + (PALETTE_BYTES if frame.get_bitsize() == 8 else 0) for frame in frames)
+
+
+def time_blits(screen, frames, count, repeat=3):
+    """循环绘制 count 次 (依次换帧)，返回最快一轮中每次 blit 的平均微秒数"""
+    position = (config.SCREEN_WIDTH // 3, config.SCREEN_HEIGHT // 4)
+    for frame in frames:  # 第一次 blit 时 SDL 才做 RLE 编码，不计入测量
+        screen.blit(frame, position)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for index in range(count):
+            screen.blit(frames[index % len(frames)], position)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / count * 1e6
+
+
+def compare_clip(screen, filename, blits):
+    kwargs = {"directory": config.CUSTOMER_IMAGES_DIR}
+    start = time.perf_counter()
+    rgba = load_gif_frames(filename, config.CUSTOMER_IMAGE_SIZE, **kwargs)
+    rgba_decode_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    palettized = load_gif_frames(filename, config.CUSTOMER_IMAGE_SIZE, palettized=True, **kwargs)
+    palettized_decode_ms = (time.perf_counter() - start) * 1000
+    converted = [frame.convert_alpha() for frame in rgba]
+
+    differing = max_error = 0
+    for reference, candidate in zip(rgba, palettized):
+        frame_differing, frame_error = compare_frames(reference, candidate)
+        differing += frame_differing
+        max_error = max(max_error, frame_error)
+    width, height = config.CUSTOMER_IMAGE_SIZE
+    return {
+        "file": filename,
+        "frames": len(rgba),
+        "quality": {"differing_pixels": differing, "max_channel_error": max_error,
+                    "compared_pixels": width * height * len(rgba) * len(BACKGROUNDS),
+                    "lossless": differing == 0 and len(rgba) == len(palettized)},
+        "bytes": {"rgba": frames_nbytes(rgba), "palettized": frames_nbytes(palettized)},
+        "decode_ms": {"rgba": round(rgba_decode_ms, 1), "palettized": round(palettized_decode_ms, 1)},
+        "blit_us": {"rgba": round(time_blits(screen, rgba, blits), 2),
+                    "rgba_display": round(time_blits(screen, converted, blits), 2),
+                    "palettized": round(time_blits(screen, palettized, blits), 2)},
+    }
+
+
+def format_result(result):
+    quality = result["quality"]
+    nbytes = result["bytes"]
+    blit = result["blit_us"]
+    decode = result["decode_ms"]
+    verdict = "无损" if quality["lossless"] else (f"有损: {quality['differing_pixels']} 个像素不同, "
+                                                  f"最大通道误差 {quality['max_channel_error']}")
+    return (f"{result['file']} ({result['frames']} 帧)\n"
+            f"    画质: {verdict}\n"
+            f"    内存: RGBA {nbytes['rgba'] / 1024:.0f} KB, 8 位调色板 {nbytes['palettized'] / 1024:.0f} KB "
+            f"({nbytes['palettized'] / nbytes['rgba']:.0%})\n"
+            f"    解码: RGBA {decode['rgba']:.1f}ms, 8 位调色板 {decode['palettized']:.1f}ms\n"
+            f"    blit: RGBA {blit['rgba']:.1f}us, RGBA 显示格式 {blit['rgba_display']:.1f}us, "
+            f"8 位调色板 + colorkey {blit['palettized']:.1f}us")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="比较顾客动画帧的 RGBA 与 8 位调色板存储")
+    parser.add_argument("--blits", type=int, default=3000, help="每种格式测量的 blit 次数")
+    parser.add_argument("--output", help="把结果写成 JSON")
+    args = parser.parse_args(argv)
+
+    enable_palette_gif_decoding()  # 与游戏打开该选项时相同；RGBA 格式的解码结果不受影响
+    pygame.init()
+    screen = pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+    results = [compare_clip(screen, filename, args.blits)
+               for filename in (config.CUSTOMER_WAITING_IMG_FILENAME, config.CUSTOMER_HAPPY_IMG_FILENAME,
+                                config.CUSTOMER_ANGRY_IMG_FILENAME)]
+    for result in results:
+        print(format_result(result))
+    rgba_total = sum(result["bytes"]["rgba"] for result in results)
+    palettized_total = sum(result["bytes"]["palettized"] for result in results)
+    lossless = all(result["quality"]["lossless"] for result in results)
+    print(f"合计: RGBA {rgba_total / 1024:.0f} KB, 8 位调色板 {palettized_total / 1024:.0f} KB, "
+          f"省下 {(rgba_total - palettized_total) / 1024:.0f} KB; "
+          f"{'全部无损' if lossless else '有帧不是无损的，切换前请检查画面'}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"image_size": list(config.CUSTOMER_IMAGE_SIZE), "results": results}, f,
+                      ensure_ascii=False, indent=1)
+        print(f"结果已写入 {args.output}")
+    pygame.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+# tools/headless.py
+"""以无显示方式 (SDL dummy 驱动) 加载游戏，供基准测试、回放、压力测试等工具使用"""
+
+import os
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_headless_environment(layout_scale=None):
+    """在导入 pygame 之前调用：使用 dummy 视频/音频驱动，并让 config、game_logic 可被导入
+
+    layout_scale 不为 None 时设置布局缩放 (必须在第一次导入 config 之前)
+    """
+    if layout_scale is not None:
+        os.environ["SUSHI_LAYOUT_SCALE"] = str(layout_scale)
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+
+
+def load_game(render=False, audio=False, analytics_dir=None, num_spots=None, spot_columns=None):
+    """无显示创建并加载游戏引擎 (加载全部资源，但不进入主循环)
+
+    render=True 时打开 dummy 显示窗口，图片转换为显示格式，与实际游戏的绘制性能一致；
+    audio=True 时初始化 dummy 混音器。模拟类工具两者都不需要。
+    analytics_dir 不为 None 时把订单事件记录到该目录。
+    num_spots / spot_columns 指定顾客位数量和每行个数 (见 GameEngine)。
+    """
+    setup_headless_environment()
+    from game_logic.engine import GameEngine
+    # 工具不读写玩家存档
+    game = GameEngine(audio_enabled=audio, save_enabled=False, analytics_dir=analytics_dir,
+                      num_spots=num_spots, spot_columns=spot_columns)
+    if render:
+        game.init_video()
+    return game.load()
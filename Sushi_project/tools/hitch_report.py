@@ -0,0 +1,119 @@
+# tools/hitch_report.py
+"""汇总卡顿记录器写出的报告 (见 game_logic/flight_recorder.py)
+
+用法 (在 Sushi_project 目录下):
+    python -m tools.hitch_report [报告目录或文件 ...] [--frames 10]
+
+目录默认是存档目录下的 hitches 子目录，从其他机器取回的报告可以放在任意目录中。
+先按推断的原因类别汇总全部卡顿的次数和最长间隔，再逐份列出每次卡顿的候选原因，
+以及卡顿帧前后 --frames 帧的各阶段耗时 (0 表示不列出)。
+"""
+
+import argparse
+import os
+import sys
+from collections import defaultdict
+
+from tools.headless import setup_headless_environment
+
+setup_headless_environment()
+
+import config  # noqa: E402
+from game_logic.flight_recorder import FIELDS, PHASE_NAMES, PHASES, list_reports, load_report  # noqa: E402
+from game_logic.save_store import resolve_save_dir  # noqa: E402
+
+KIND_NAMES = {"gc": "垃圾回收", "load": "主线程加载资源", "preload_wait": "等待场景预加载",
+              "background_load": "后台加载资源", "music": "背景音乐解码", "save": "存档写盘",
+              "catch_up": "逻辑帧追赶", "stall": "帧间停顿",
+              **{f"phase:{name}": f"{label}耗时" for name, label in PHASE_NAMES.items()}}
+
+
+def likely_kind(hitch):
+    for candidate in hitch["candidates"]:
+        if candidate["cause"] == hitch["likely_cause"]:
+            return candidate["kind"]
+    return "unknown"
+
+
+def format_frame(frame):
+    phases = " ".join(f"{frame[f'{name}_ms']:6.1f}" for name in PHASES)
+    extras = []
+    if frame["gc"]:
+        by_generation = defaultdict(lambda: [0, 0.0])
+        for gen, ms, _ in frame["gc"]:
+            by_generation[gen][0] += 1
+            by_generation[gen][1] += ms
+        extras.append("GC " + ",".join(f"第{gen}代 {count} 次 {ms:.1f}ms"
+                                       for gen, (count, ms) in sorted(by_generation.items())))
+    if frame["loads"]:
+        extras.append("加载 " + ",".join(f"{name}{'' if main else '(后台)'} {ms:.1f}ms"
+                                        for _, name, ms, main in frame["loads"]))
+    if frame["music"]:
+        extras.append("音乐解码 " + ",".join(f"{name} {ms:.0f}ms" for name, ms in frame["music"]))
+    if frame["save_writes"]:
+        extras.append(f"存档写盘 {frame['save_write_ms']:.1f}ms")
+    if frame["preload_waits"]:
+        extras.append("等待预加载")
+    if frame["logic_steps"] > 1:
+        extras.append(f"{frame['logic_steps']} 个逻辑帧")
+    return (f"  {frame['frame']:>7} {frame['interval_ms']:7.1f} {frame['frame_ms']:7.1f} {frame['stall_ms']:6.1f}  {phases}"
+            f"  画质{frame['quality_level']}  {'; '.join(e for e in extras if e)}")
+
+
+def print_report(path, report, context_frames):
+    context = report["context"]
+    print(f"\n{os.path.basename(path)}  ({report['created']}, 第 {context['level']} 关, "
+          f"{context['num_spots']} 个顾客位, 画质 {context['quality']['level']} 级, {context['platform']})")
+    frames = [dict(zip(report["fields"], values)) for values in report["frames"]]
+    by_number = {frame["frame"]: index for index, frame in enumerate(frames)}
+    for hitch in report["hitches"]:
+        print(f"  第 {hitch['frame']} 帧: 间隔 {hitch['interval_ms']:.1f}ms (工作 {hitch['frame_ms']:.1f}ms), "
+              f"可能原因: {hitch['likely_cause']}")
+        for candidate in hitch["candidates"]:
+            print(f"      {candidate['ms']:8.1f}ms  {candidate['cause']}")
+        index = by_number.get(hitch["frame"])
+        if context_frames and index is not None:
+            print("       帧号    间隔    工作   停顿    事件   逻辑   绘制   翻转")
+            for frame in frames[max(0, index - context_frames):index + context_frames + 1]:
+                print(format_frame(frame))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="汇总卡顿报告")
+    parser.add_argument("paths", nargs="*", help="报告目录或文件 (默认是存档目录下的 hitches)")
+    parser.add_argument("--frames", type=int, default=10, help="列出卡顿帧前后多少帧 (0 表示不列出)")
+    args = parser.parse_args(argv)
+
+    paths = []
+    for path in args.paths or [os.path.join(resolve_save_dir(config.SAVE_DIR, config.BASE_DIR), "hitches")]:
+        paths.extend(list_reports(path) if os.path.isdir(path) else [path])
+    if not paths:
+        print("没有找到卡顿报告")
+        return 1
+
+    by_kind = defaultdict(list)
+    reports = []
+    for path in paths:
+        try:
+            report = load_report(path)
+        except (OSError, ValueError) as e:
+            print(f"跳过 {path}: {e}")
+            continue
+        if FIELDS != tuple(report["fields"]):
+            print(f"注意: {path} 的字段与当前版本不同，按报告中的字段名读取")
+        reports.append((path, report))
+        for hitch in report["hitches"]:
+            by_kind[likely_kind(hitch)].append(hitch["interval_ms"])
+
+    total = sum(len(intervals) for intervals in by_kind.values())
+    print(f"{len(reports)} 份报告, {total} 次卡顿; 按可能原因:")
+    for kind, intervals in sorted(by_kind.items(), key=lambda item: -len(item[1])):
+        print(f"  {len(intervals):>4} 次  {KIND_NAMES.get(kind, kind)}: 最长间隔 {max(intervals):.0f}ms, "
+              f"平均 {sum(intervals) / len(intervals):.0f}ms")
+    for path, report in reports:
+        print_report(path, report, args.frames)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
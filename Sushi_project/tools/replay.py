@@ -0,0 +1,166 @@
+# tools/replay.py
+"""无显示、不限速地回放录像，并比对结果
+
+用法 (在 Sushi_project 目录下):
+    python main.py --record session.rec          # 录制一局
+    python -m tools.replay session.rec ...       # 回放并与录制时的结果比对
+    python -m tools.replay recs/*.rec --outcomes outcomes.json
+    python -m tools.replay recs/*.rec --diff outcomes.json   # 与之前保存的结果逐项比对
+    python -m tools.replay session.rec --seek 1800 --snapshot-out s.snap  # 定位到某帧并导出状态快照
+
+录像记录了录制时的顾客位布局和布局缩放，回放时按同样的设置加载游戏
+(一次回放的录像必须是同一个布局缩放，布局不同的录像各自加载一个游戏实例)。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+from tools.headless import load_game, setup_headless_environment
+
+
+def _diff_outcome(old, new):
+    """列出两次结果中不同的字段"""
+    diffs = []
+    for key in ("total_tips", "level", "rounds", "orders"):
+        if old.get(key) != new.get(key):
+            if key == "orders":
+                diffs.append(f"orders: {len(old.get(key, []))} -> {len(new.get(key, []))} 个"
+                             f" (首个不同: #{_first_difference(old.get(key, []), new.get(key, []))})")
+            else:
+                diffs.append(f"{key}: {old.get(key)} -> {new.get(key)}")
+    return diffs
+
+
+def _first_difference(a, b):
+    for index, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return index
+    return min(len(a), len(b))
+
+
+class GameCache:
+    """按录像记录的顾客位布局加载游戏，同一布局的录像共用一个游戏实例"""
+
+    def __init__(self, render=False):
+        self.render = render
+        self.games = {}
+
+    def get(self, recording):
+        layout = (recording.num_spots, recording.spot_columns)
+        game = self.games.get(layout)
+        if game is None:
+            game = load_game(render=self.render, num_spots=recording.num_spots, spot_columns=recording.spot_columns)
+            game.progress_saving_enabled = False  # 回放不写存档
+            self.games[layout] = game
+        return game
+
+
+def seek_recording(game, recording, path, tick, snapshot_out=None, verbose=False):
+    """定位到录像中的某一帧，打印当时的状态，可选导出快照 (用于分叉模拟)"""
+    from game_logic.replay import ReplayCursor
+    from game_logic.snapshot import take_snapshot
+
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        cursor = ReplayCursor(game, recording)
+        reached = cursor.seek(tick)
+    print(f"{path} 第 {reached} 帧: 状态 {game.current_game_state}  关卡 {game.current_level}  "
+          f"小费 {game.total_tips}/{game.current_target_tips}  剩余 {game.remaining_time}s")
+    for customer in game.customers:
+        print(f"    顾客位 {customer.spot_index}: {customer.state}  订单 {customer.order}  "
+              f"剩余 {customer.order_remaining_seconds}s")
+    if snapshot_out:
+        with open(snapshot_out, "wb") as f:
+            f.write(take_snapshot(game))
+        print(f"快照已写入 {snapshot_out}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="回放录像并比对结果")
+    parser.add_argument("recordings", nargs="+")
+    parser.add_argument("--render", action="store_true", help="回放时也绘制每一帧")
+    parser.add_argument("--outcomes", help="把每个录像的回放结果写入 JSON 文件")
+    parser.add_argument("--diff", help="与之前保存的结果 JSON 逐项比对")
+    parser.add_argument("--verbose", action="store_true", help="显示游戏自身的控制台输出")
+    parser.add_argument("--seek", type=int, metavar="TICK", help="只定位到指定帧并显示当时的状态")
+    parser.add_argument("--snapshot-out", metavar="PATH", help="与 --seek 一起使用：把该帧的状态快照写入文件")
+    parser.add_argument("--capture", metavar="DIR",
+                        help="把回放画面录制到 DIR/<录像名>/ (离线渲染，等待写线程，不丢帧)")
+    parser.add_argument("--capture-format", choices=("png", "raw"), default="png")
+    args = parser.parse_args(argv)
+
+    # 录像中的坐标是录制时布局缩放下的屏幕坐标：先读出录像记录的缩放，在导入 config 之前设置
+    setup_headless_environment()
+    from game_logic.recording import read_recording
+    recordings = [(path, read_recording(path)) for path in args.recordings]
+    scales = {recording.layout_scale for _, recording in recordings if recording.layout_scale is not None}
+    if len(scales) > 1:
+        print(f"录像的布局缩放不同 ({', '.join(f'{scale:g}' for scale in sorted(scales))})，请按缩放分开回放")
+        return 2
+    setup_headless_environment(scales.pop() if scales else None)
+
+    games = GameCache(render=args.render or bool(args.capture))
+    from game_logic.capture import FrameCapture
+    from game_logic.replay import replay_session, check_outcome
+
+    if args.seek is not None:
+        path, recording = recordings[0]
+        return seek_recording(games.get(recording), recording, path, args.seek,
+                              args.snapshot_out, args.verbose)
+
+    previous = {}
+    if args.diff:
+        with open(args.diff, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+
+    outcomes = {}
+    failures = 0
+    total_ticks = 0
+    start = time.perf_counter()
+    for path, recording in recordings:
+        game = games.get(recording)
+        capture = None
+        if args.capture:
+            name = os.path.splitext(os.path.basename(path))[0]
+            capture = FrameCapture(os.path.join(args.capture, name), game.render_surface(),
+                                   args.capture_format, fps=recording.fps, block=True)
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            outcome = replay_session(game, recording, render=args.render, capture=capture)
+        if capture:
+            capture.close()
+            print(capture.format_stats())
+        total_ticks += recording.end_tick
+        outcomes[path] = outcome
+
+        matched = check_outcome(recording, outcome)
+        status = {True: "一致", False: "不一致", None: "无录制结果"}[matched]
+        if matched is False:
+            failures += 1
+        line = (f"{path}: {status}  小费 {outcome['total_tips']}  关卡 {outcome['level']}  "
+                f"订单 {len(outcome['orders'])}  帧数 {recording.end_tick}")
+        if path in previous:
+            diffs = _diff_outcome(previous[path], outcome)
+            if diffs:
+                failures += 1
+                line += "\n    与之前结果不同: " + "; ".join(diffs)
+        print(line)
+
+    elapsed = time.perf_counter() - start
+    print(f"回放 {len(args.recordings)} 段录像, 共 {total_ticks} 帧, 用时 {elapsed:.2f}s "
+          f"({total_ticks / elapsed if elapsed else 0:.0f} 帧/秒)")
+
+    if args.outcomes:
+        with open(args.outcomes, "w", encoding="utf-8") as f:
+            json.dump(outcomes, f, indent=1, ensure_ascii=False)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
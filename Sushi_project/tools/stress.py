@@ -0,0 +1,214 @@
+# tools/stress.py
+"""点击风暴压力测试：用随机或对抗性的点击流驱动 main.py 的真实事件处理路径
+
+用法 (在 Sushi_project 目录下):
+    python -m tools.stress [--events 200000] [--mode mixed] [--events-per-tick 20] [--seed 1]
+
+在无显示模式下以每秒数万个事件的速度送入 handle_event()，统计吞吐量和单个事件的
+最坏延迟，并在每个事件之后检查不变量：
+    - 小费只会按 TIP_* 的金额增加 (新一局开始时归零除外)
+    - 一个订单不会收到两份寿司 (或两份饮品)
+    - 菜板和手上的物品不会处于不可能的状态
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from contextlib import redirect_stdout
+
+from tools.headless import load_game, setup_headless_environment
+
+setup_headless_environment()
+
+import config  # noqa: E402
+from game_logic import runtime  # noqa: E402
+
+MODES = ("random", "targeted", "adversarial", "mixed")
+
+
+class ClickStream:
+    """生成点击位置：random 为全屏随机；targeted 只点可交互区域；adversarial 专门制造非法操作序列"""
+
+    def __init__(self, game, mode, rng):
+        self.game = game
+        self.mode = mode
+        self.rng = rng
+        self.containers = [element.rect for element in game.interactive_elements]
+        self.board = game.cutting_b.rect
+        self.spots = list(game.customer_spot_rects)
+        self.buttons = [game.start_button_rect, game.reset_button_rect]
+        self._pending = []
+
+    def _point_in(self, rect):
+        return (self.rng.randint(rect.left, rect.right - 1), self.rng.randint(rect.top, rect.bottom - 1))
+
+    def _random(self):
+        return (self.rng.randrange(config.SCREEN_WIDTH), self.rng.randrange(config.SCREEN_HEIGHT))
+
+    def _targeted(self):
+        rect = self.rng.choice(self.containers + [self.board] * 3 + self.spots * 2 + self.buttons[:1])
+        return self._point_in(rect)
+
+    def _adversarial(self):
+        if not self._pending:
+            pattern = self.rng.randrange(5)
+            spot = self.rng.choice(self.spots)
+            if pattern == 0:    # 同一个顾客位连续猛点 (重复送餐)
+                self._pending = [spot] * self.rng.randint(3, 10)
+            elif pattern == 1:  # 没有米饭就放配料、重复放米饭
+                self._pending = [self.rng.choice(self.containers[1:5]), self.containers[0],
+                                 self.containers[0], self.rng.choice(self.containers[1:5]),
+                                 self.rng.choice(self.containers[1:5])]
+            elif pattern == 2:  # 菜板未完成时拿起，完成后连续拿两次
+                self._pending = [self.board, self.containers[0], self.board,
+                                 self.rng.choice(self.containers[1:5]), self.board, self.board]
+            elif pattern == 3:  # 拿着寿司时再去拿饮品，再连续送给同一顾客
+                self._pending = [self.containers[0], self.rng.choice(self.containers[1:5]), self.board,
+                                 self.rng.choice(self.containers[5:]), spot, spot,
+                                 self.rng.choice(self.containers[5:]), spot]
+            else:               # 区域边界上的点击
+                rect = self.rng.choice(self.containers + self.spots + [self.board])
+                edge = self.rng.choice([rect.topleft, (rect.right - 1, rect.bottom - 1),
+                                        (rect.right, rect.top), (rect.left, rect.bottom)])
+                return edge
+        return self._point_in(self._pending.pop(0))
+
+    def next_pos(self):
+        mode = self.mode
+        if mode == "mixed":
+            mode = self.rng.choice(MODES[:3])
+        if mode == "random":
+            return self._random()
+        if mode == "targeted":
+            return self._targeted()
+        return self._adversarial()
+
+
+class InvariantChecker:
+    """每个事件之后检查不变量，记录违规"""
+
+    def __init__(self, game):
+        self.game = game
+        self.allowed_tip_steps = {tip for tip in (config.TIP_PERFECT_ORDER, config.TIP_PARTIAL_ORDER,
+                                                  config.TIP_WRONG_ORDER) if tip > 0}
+        self.violations = []
+        self.last_tips = game.total_tips
+        self.last_received = {}  # 顾客位 -> (订单对象, 已收寿司, 已收饮品)
+
+    def _fail(self, index, message):
+        self.violations.append(f"事件 #{index} (第 {runtime.logic_tick} 帧): {message}")
+
+    def check(self, index, round_started=False):
+        game = self.game
+        delta = game.total_tips - self.last_tips
+        if round_started and game.total_tips == 0:
+            pass
+        elif delta < 0:
+            self._fail(index, f"小费减少了 {self.last_tips} -> {game.total_tips}")
+        elif delta and delta not in self.allowed_tip_steps:
+            self._fail(index, f"小费增加了非法金额 {delta}")
+        self.last_tips = game.total_tips
+
+        board = game.cutting_b
+        if board.topping_key is not None and not board.has_rice:
+            self._fail(index, f"菜板上有配料 {board.topping_key} 却没有米饭")
+        if board.topping_key is not None and board.topping_key not in config.TOPPINGS:
+            self._fail(index, f"菜板上的配料未知: {board.topping_key}")
+
+        hand = game.player_h
+        fields = (hand.held_item_category, hand.held_item_key, hand.held_item_image)
+        if hand.is_holding != all(field is not None for field in fields) or \
+                (not hand.is_holding and any(field is not None for field in fields)):
+            self._fail(index, f"手持状态不一致: is_holding={hand.is_holding}, {fields[:2]}")
+        if hand.is_holding:
+            catalog = config.SUSHI_TYPES if hand.held_item_category == "sushi" else config.DRINK_TYPES
+            if hand.held_item_category not in ("sushi", "drink") or hand.held_item_key not in catalog:
+                self._fail(index, f"手上拿着未知物品: {hand.held_item_category}/{hand.held_item_key}")
+
+        for customer in game.customers:
+            if customer.state not in ("empty", "waiting", "happy", "angry"):
+                self._fail(index, f"顾客位 {customer.spot_index} 状态未知: {customer.state}")
+            if (customer.state == "empty") != (customer.order is None):
+                self._fail(index, f"顾客位 {customer.spot_index} 状态 {customer.state} 与订单 {customer.order} 不符")
+            previous = self.last_received.get(customer.spot_index)
+            current = (customer.order, customer.sushi_received_key, customer.drink_received_key)
+            if previous and previous[0] is current[0] and current[0] is not None:
+                if previous[1] is not None and previous[1] != current[1]:
+                    self._fail(index, f"顾客位 {customer.spot_index} 收到了两份寿司: {previous[1]}, {current[1]}")
+                if previous[2] is not None and previous[2] != current[2]:
+                    self._fail(index, f"顾客位 {customer.spot_index} 收到了两份饮品: {previous[2]}, {current[2]}")
+            self.last_received[customer.spot_index] = current
+
+
+def run_stress(game, events, mode, events_per_tick, seed):
+    import pygame
+
+    game.progress_saving_enabled = False
+    game.begin_session(seed)
+    rng = random.Random(seed)
+    stream = ClickStream(game, mode, rng)
+    checker = InvariantChecker(game)
+    latencies = []
+    handle_event = game.handle_event
+    perf_counter = time.perf_counter
+
+    start = perf_counter()
+    for index in range(events):
+        if game.current_game_state != config.STATE_GAME_RUNNING and rng.random() < 0.5:
+            pos = stream._point_in(game.start_button_rect)  # 尽快回到游戏中
+        else:
+            pos = stream.next_pos()
+        event = pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=pos)
+        state_before = game.current_game_state
+
+        t0 = perf_counter()
+        handle_event(event)
+        latencies.append(perf_counter() - t0)
+
+        round_started = state_before != config.STATE_GAME_RUNNING and \
+            game.current_game_state == config.STATE_GAME_RUNNING
+        checker.check(index, round_started)
+        if (index + 1) % events_per_tick == 0:
+            game.update_game()
+            runtime.advance_tick()
+            checker.check(index)
+    elapsed = perf_counter() - start
+    return latencies, elapsed, checker.violations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="点击风暴压力测试与不变量检查")
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--mode", choices=MODES, default="mixed")
+    parser.add_argument("--events-per-tick", type=int, default=20, help="每个逻辑帧之间送入的事件数")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--show", type=int, default=20, help="最多显示多少条违规")
+    args = parser.parse_args(argv)
+
+    game = load_game()
+    # 游戏在非法操作时会打印提示，压力测试中丢弃这些输出
+    with open(os.devnull, "w", encoding="utf-8") as devnull, redirect_stdout(devnull):
+        latencies, elapsed, violations = run_stress(
+            game, args.events, args.mode, args.events_per_tick, args.seed)
+
+    latencies.sort()
+    handled = sum(latencies)
+    print(f"模式 {args.mode}, 种子 {args.seed}: {args.events} 个事件, 总用时 {elapsed:.2f}s")
+    print(f"吞吐量: {args.events / elapsed:,.0f} 事件/秒 (含不变量检查)，"
+          f"{args.events / handled:,.0f} 事件/秒 (仅事件处理)")
+    print(f"单个事件延迟: 中位数 {statistics.median(latencies) * 1e6:.1f}us  "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.1f}us  最坏 {latencies[-1] * 1e3:.3f}ms")
+    if violations:
+        print(f"发现 {len(violations)} 处不变量违规:")
+        for line in violations[:args.show]:
+            print("    " + line)
+        return 1
+    print("所有不变量均成立。")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())